@@ -1,6 +1,14 @@
 import os
+import numpy as np
 import pandas as pd
 
+import dataloader
+import tradingcalendar
+from barstore import BarStore
+
+# Columns of the per-window summary from apply_opening_range_windows()
+WINDOW_COLUMNS = ['window', 'breakouts', 'breakdowns', 'successful_trades', 'failed_trades', 'success_rate']
+
 # Function to apply 9:15-9:30 rule for each day
 class NineFifteenRuleBacktest:
     def __init__(self, df):
@@ -10,6 +18,7 @@ class NineFifteenRuleBacktest:
         self.failed_trades = []  # To store dates of failed trades
         self.successful_trades = []  # To store dates of successful trades
         self.total_days = 0  # To store total number of days
+        self.window_results = {}  # Per-window lists from apply_opening_range_windows()
 
     def apply_9_15_rule(self):
         # Group the data by day to apply the 9:15-9:30 rule per day
@@ -59,6 +68,136 @@ class NineFifteenRuleBacktest:
                             self.successful_trades.append((date, next_candle.name))
                     break  # Move to the next day after detecting a breakdown
 
+    def bar_arrays(self):
+        # Plain arrays for the vectorized rule, ordered day by day like groupby('date').
+        # Session ids and times of day (wall-clock, like between_time) come from the shared
+        # trading calendar, which is computed once per index.
+        calendar = tradingcalendar.calendar_for(self.df.index)
+        order = np.argsort(calendar.session_id, kind='stable')  # groupby keeps the row order inside each day
+
+        codes = calendar.session_id[order]
+        starts = np.flatnonzero(np.diff(codes, prepend=-1) != 0)
+        return {
+            'calendar': calendar,
+            'order': order,
+            'codes': codes,
+            'starts': starts,
+            'days': calendar.days,
+            'seconds': calendar.seconds[order],  # Seconds since the 9:15 open
+            'high': self.df['High'].to_numpy(dtype=np.float64)[order],
+            'low': self.df['Low'].to_numpy(dtype=np.float64)[order],
+            'close': self.df['Close'].to_numpy(dtype=np.float64)[order],
+        }
+
+    def apply_9_15_rule_vectorized(self, end_time='09:30:00'):
+        # Same rule as apply_9_15_rule(), without the per-day loop and iterrows()
+        arrays = self.bar_arrays()
+        codes, starts, seconds = arrays['codes'], arrays['starts'], arrays['seconds']
+        self.total_days = len(starts)
+        if not len(codes):
+            return
+
+        # Step 1: Opening range per day (between_time includes both ends)
+        in_range = (seconds >= 0) & (seconds <= arrays['calendar'].offset(end_time))
+
+        positions = np.arange(len(codes))
+        range_high = np.fmax.reduceat(np.where(in_range, arrays['high'], np.nan), starts)  # fmax skips NaN like max()
+        range_low = np.fmin.reduceat(np.where(in_range, arrays['low'], np.nan), starts)
+        last_in_range = np.maximum.reduceat(np.where(in_range, positions, -1), starts)
+
+        # Step 2: Scan from the last opening-range candle onwards
+        breakouts, breakdowns, successful, failed = self.evaluate_opening_range(
+            arrays, range_high, range_low, last_in_range)
+        self.breakouts.extend(breakouts)
+        self.breakdowns.extend(breakdowns)
+        self.successful_trades.extend(successful)
+        self.failed_trades.extend(failed)
+
+    def apply_opening_range_windows(self, end_times=('09:20:00', '09:30:00', '09:45:00', '10:00:00')):
+        # Evaluate several 9:15-X windows in one go. The running per-day high/low from 9:15 is
+        # computed once; each window just reads it at its last candle before the end time.
+        arrays = self.bar_arrays()
+        codes, starts, seconds = arrays['codes'], arrays['starts'], arrays['seconds']
+        calendar = arrays['calendar']
+        self.total_days = len(starts)
+        self.window_results = {}
+        if not len(codes):
+            return pd.DataFrame(columns=WINDOW_COLUMNS)
+
+        # Bars sorted by (day, time) let every window find its range edges with searchsorted
+        day_seconds = 86400
+        key = codes.astype(np.int64) * day_seconds + seconds  # seconds stays within one day's span
+        if np.any(np.diff(key) < 0):
+            raise ValueError("apply_opening_range_windows needs the bars in time order within each day")
+
+        after_open = seconds >= 0
+        grouped_high = pd.Series(np.where(after_open, arrays['high'], np.nan)).groupby(codes)
+        grouped_low = pd.Series(np.where(after_open, arrays['low'], np.nan)).groupby(codes)
+        # cummax leaves NaN on NaN candles, ffill carries the running value over them
+        running_high = grouped_high.cummax().groupby(codes).ffill().to_numpy()
+        running_low = grouped_low.cummin().groupby(codes).ffill().to_numpy()
+
+        day_base = np.arange(len(starts), dtype=np.int64) * day_seconds
+        first_in_range = np.searchsorted(key, day_base, side='left')
+
+        rows = []
+        for end_time in end_times:
+            last_in_range = np.searchsorted(key, day_base + calendar.offset(end_time), side='right') - 1
+            last_in_range[last_in_range < first_in_range] = -1  # No candle inside the window that day
+
+            has_range = last_in_range >= 0
+            range_high = np.full(len(starts), np.nan)
+            range_low = np.full(len(starts), np.nan)
+            range_high[has_range] = running_high[last_in_range[has_range]]
+            range_low[has_range] = running_low[last_in_range[has_range]]
+
+            breakouts, breakdowns, successful, failed = self.evaluate_opening_range(
+                arrays, range_high, range_low, last_in_range)
+            self.window_results[end_time] = {'breakouts': breakouts, 'breakdowns': breakdowns,
+                                             'successful_trades': successful, 'failed_trades': failed}
+            decided = len(successful) + len(failed)
+            rows.append((f"09:15-{end_time[:5]}", len(breakouts), len(breakdowns), len(successful), len(failed),
+                         len(successful) / decided if decided else np.nan))
+
+        return pd.DataFrame(rows, columns=WINDOW_COLUMNS)
+
+    def evaluate_opening_range(self, arrays, range_high, range_low, last_in_range):
+        # Per-day range_high/range_low/last_in_range in, breakout lists out (days without a range are skipped)
+        codes, starts, close = arrays['codes'], arrays['starts'], arrays['close']
+        positions = np.arange(len(codes))
+        eligible = (last_in_range[codes] >= 0) & (positions >= last_in_range[codes])
+
+        with np.errstate(invalid='ignore'):
+            up = eligible & (arrays['high'] > range_high[codes])
+            down = eligible & (arrays['low'] < range_low[codes])
+        breach = up | down
+
+        # The first breach of each day is where the running count inside that day reaches 1
+        running = np.cumsum(breach)
+        before_day = running[starts] - breach[starts]
+        first = np.flatnonzero(breach & (running - before_day[codes] == 1))
+
+        # Classify the candle after each breach in one go (only when it is on the same day)
+        following = first + 1
+        has_next = following < len(codes)
+        has_next[has_next] = codes[following[has_next]] == codes[first[has_next]]
+        following = np.where(has_next, following, first)
+
+        is_up = up[first]
+        day = codes[first]
+        with np.errstate(invalid='ignore'):
+            failed = np.where(is_up, close[following] < range_high[day], close[following] > range_low[day])
+
+        breakouts, breakdowns, successful_trades, failed_trades = [], [], [], []
+        dates = arrays['days'][day].astype(object)
+        stamps = self.df.index[arrays['order'][first]]
+        next_stamps = self.df.index[arrays['order'][following]]
+        for date, stamp, next_stamp, breakout, next_ok, fail in zip(dates, stamps, next_stamps, is_up, has_next, failed):
+            (breakouts if breakout else breakdowns).append((date, stamp))
+            if next_ok:
+                (failed_trades if fail else successful_trades).append((date, next_stamp))
+        return breakouts, breakdowns, successful_trades, failed_trades
+
     def print_results(self):
         # Print dates of breakouts, breakdowns, successful and failed trades
         print(f"\nBreakout Dates: {self.breakouts}")
@@ -74,22 +213,30 @@ class NineFifteenRuleBacktest:
         print(f"Total Failed Trades: {len(self.failed_trades)}")
         print(f"Total Number of Days: {self.total_days}")
 
-# Step 3: Load the CSV file (prompt user for input)
-file_name = input("Enter the name of the CSV file (including the extension): ")
+if __name__ == "__main__":
+    # Step 3: Load the CSV file (prompt user for input)
+    file_name = input("Enter the name of the CSV file (including the extension): ")
+
+    # Check if the file exists and load it (a barstore.BarStore folder works too)
+    if os.path.exists(file_name):
+        if os.path.isdir(file_name):
+            df = BarStore(file_name).frame()  # Memory-mapped, pages are read on demand
+        else:
+            df = dataloader.load_ohlcv(file_name, index_col='Datetime')  # Cached after the first read
+        print(f"CSV file loaded: {file_name}")
 
-# Check if the file exists and load it
-if os.path.exists(file_name):
-    df = pd.read_csv(file_name, parse_dates=['Datetime'], index_col='Datetime')
-    print(f"CSV file loaded: {file_name}")
+        # Initialize the NineFifteenRuleBacktest with the DataFrame
+        backtest = NineFifteenRuleBacktest(df)
 
-    # Initialize the NineFifteenRuleBacktest with the DataFrame
-    backtest = NineFifteenRuleBacktest(df)
+        # Apply the 9:15-9:30 rule (vectorized, same results as apply_9_15_rule())
+        backtest.apply_9_15_rule_vectorized()
 
-    # Apply the 9:15-9:30 rule
-    backtest.apply_9_15_rule()
+        # Print the results (dates of breakouts, successes, and failures)
+        backtest.print_results()
 
-    # Print the results (dates of breakouts, successes, and failures)
-    backtest.print_results()
+        # Compare a few other opening-range windows in the same pass
+        print("\nOpening range windows:")
+        print(backtest.apply_opening_range_windows().to_string(index=False))
 
-else:
-    print("CSV file not found. Please check the file name and try again.")
+    else:
+        print("CSV file not found. Please check the file name and try again.")
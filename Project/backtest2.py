@@ -1,17 +1,19 @@
 import os
 import backtrader as bt
-import yfinance as yf
-import mplfinance as mpf
-import pandas as pd
-import numpy as np
+
+import dataloader
+import indicatorcache
+import tradingcalendar
+import tradeledger
 
 # Step 1: Define the trading strategy with separate profit/loss tracking
-class MovingAverageCrossStrategy(bt.Strategy):
-    params = (('short_period', 14), ('long_period', 50),)
+class MovingAverageCrossStrategy(tradeledger.LedgerPoints, bt.Strategy):
+    params = (('short_period', 14), ('long_period', 50), ('sma_cache', None),)
 
     def __init__(self):
-        self.short_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.short_period)
-        self.long_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.long_period)
+        # With sma_cache set (e.g. indicatorcache.default_cache) the SMAs come from a shared cache
+        self.short_ma, self.long_ma = indicatorcache.moving_averages(
+            self, self.params.short_period, self.params.long_period, self.params.sma_cache)
 
         # Initialize trade tracking variables
         self.trade_count = 0
@@ -21,26 +23,25 @@ class MovingAverageCrossStrategy(bt.Strategy):
         self.total_loss = 0     # Track total loss in ₹
         self.total_gain = 0     # Track total gain in ₹
         self.entry_price = None
-        self.entry_date = None  # Track the date of the entry (buy)
+        self.entry_session = None  # Track the session (trading day) of the entry (buy)
+        # Session id per bar, shared by every run on the same data (tradingcalendar.py)
+        self.session_of = tradingcalendar.feed_sessions(self.data)
 
-        # Track the positions for chart plotting
-        self.buy_signals = []
-        self.sell_signals = []
-        self.successful_trades_points = []
-        self.failed_trades_points = []
+        # Track the trades for chart plotting (buy_signals etc. are read from the ledger)
+        self.ledger = tradeledger.TradeLedger(index=tradingcalendar.feed_index(self.data))
 
     def next(self):
-        current_date = self.data.datetime.date(0)  # Get the current date
+        current_session = self.session_of(len(self) - 1)  # Session id of the current bar
         if not self.position:  # Not in a position
             if self.short_ma > self.long_ma:  # Buy signal
                 self.buy()
                 self.entry_price = self.data.close[0]  # Record the entry price
-                self.entry_date = current_date  # Record the entry date
+                self.entry_session = current_session  # Record the entry session
                 self.trade_count += 1
-                self.buy_signals.append(self.data.datetime.datetime(0).replace(tzinfo=None))  # Mark buy time for plotting
+                self.ledger.open(len(self) - 1, 1, self.entry_price)  # Mark buy bar for plotting
         else:
             # Exit if the short MA crosses below the long MA or if it's the end of the day
-            if self.short_ma < self.long_ma or current_date != self.entry_date:  # Sell signal or different day
+            if self.short_ma < self.long_ma or current_session != self.entry_session:  # Sell signal or different day
                 self.sell()
                 exit_price = self.data.close[0]  # Record the exit price
 
@@ -55,90 +56,88 @@ class MovingAverageCrossStrategy(bt.Strategy):
                 if profit > 0:
                     self.total_gain += profit
                     self.successful_trades += 1
-                    self.successful_trades_points.append(self.data.datetime.datetime(0).replace(tzinfo=None))  # Mark success
                 else:
                     self.total_loss += abs(profit)
                     self.failed_trades += 1
-                    self.failed_trades_points.append(self.data.datetime.datetime(0).replace(tzinfo=None))  # Mark failure
+                self.ledger.close(len(self) - 1, exit_price, profit)  # Success or failure mark comes from the profit
 
                 # Update total profit/loss
                 self.total_profit = self.total_gain - self.total_loss
 
 # Step 2: Load the historical data from CSV
-file_name = "nifty50_data_5d_5m_20240917_014831.csv"  # Replace with actual file name including .csv extension
-file_path = os.path.join(os.getcwd(), file_name)  # Full path to the file
-
-# Try to load the data
-try:
-    data = pd.read_csv(file_path, index_col=0, parse_dates=True)
+def load_data(file_path):
+    data = dataloader.load_ohlcv(file_path)  # Parses the CSV once, then reads the .cols cache
     data.index = data.index.tz_localize(None)  # Ensure the dataframe's index is timezone-naive
-    print("Data loaded successfully!")
-except FileNotFoundError:
-    print(f"File not found: {file_path}. Please check the file name and location.")
-    exit()  # Exit if the file is not found
-
-# Convert the data into Backtrader-compatible feed
-data_feed = bt.feeds.PandasData(dataname=data)
-
-# Step 3: Set up Backtrader for backtesting
-cerebro = bt.Cerebro()
-strategies = cerebro.addstrategy(MovingAverageCrossStrategy)
-
-# Add the data feed to cerebro
-cerebro.adddata(data_feed)
-
-# Set initial capital
-cerebro.broker.setcash(100000)  # Initial capital set to 100,000
-
-# Print starting conditions
-print('Starting Portfolio Value: %.2f' % cerebro.broker.getvalue())
-
-# Step 4: Run the backtest and retrieve the strategy instance
-strategies = cerebro.run()
-strategy = strategies[0]  # Get the instance of the first strategy
-
-# Print ending portfolio value
-print('Ending Portfolio Value: %.2f' % cerebro.broker.getvalue())
-
-# Step 5: Display results of trades
-print(f"Total trades taken: {strategy.trade_count}")
-print(f"Successful trades: {strategy.successful_trades}")
-print(f"Failed trades: {strategy.failed_trades}")
-print(f"Total Gain points: {strategy.total_gain:.2f}")
-print(f"Total Loss points: {strategy.total_loss:.2f}")
-print(f"Net Profit (Total Points): {strategy.total_profit:.2f}")
-
-# Step 6: Prepare marker data for plotting
-# Create an empty array matching the data index for buy/sell markers
-buy_marker = np.nan * np.ones(len(data))
-sell_marker = np.nan * np.ones(len(data))
-success_marker = np.nan * np.ones(len(data))
-fail_marker = np.nan * np.ones(len(data))
-
-# Populate the marker arrays at corresponding dates
-for buy_time in strategy.buy_signals:
-    buy_marker[data.index.get_loc(buy_time)] = data['Close'].loc[buy_time]
-
-for sell_time in strategy.sell_signals:
-    sell_marker[data.index.get_loc(sell_time)] = data['Close'].loc[sell_time]
-
-for success_time in strategy.successful_trades_points:
-    success_marker[data.index.get_loc(success_time)] = data['Close'].loc[success_time]
-
-for fail_time in strategy.failed_trades_points:
-    fail_marker[data.index.get_loc(fail_time)] = data['Close'].loc[fail_time]
-
-# Step 7: Check if marker arrays are not empty and plot the candlestick chart
-apdict = []
-if not np.isnan(buy_marker).all():
-    apdict.append(mpf.make_addplot(buy_marker, scatter=True, markersize=100, marker='^', color='g'))  # Buy markers
-if not np.isnan(sell_marker).all():
-    apdict.append(mpf.make_addplot(sell_marker, scatter=True, markersize=100, marker='v', color='r'))  # Sell markers
-if not np.isnan(success_marker).all():
-    apdict.append(mpf.make_addplot(success_marker, scatter=True, markersize=100, marker='o', color='b'))  # Successful trades
-if not np.isnan(fail_marker).all():
-    apdict.append(mpf.make_addplot(fail_marker, scatter=True, markersize=100, marker='x', color='y'))  # Failed trades
-
-# Plot the candlestick chart with moving averages and markers
-mpf.plot(data, type='candle', style='charles', title='Nifty 50 - Candlestick Chart with Backtesting',
-         volume=True, mav=(14, 50), addplot=apdict)
\ No newline at end of file
+    return data
+
+# Step 3: Set up Backtrader and run the backtest
+def run_strategy(data, **params):
+    # Convert the data into Backtrader-compatible feed
+    data_feed = bt.feeds.PandasData(dataname=data)
+
+    cerebro = bt.Cerebro()
+    cerebro.addstrategy(MovingAverageCrossStrategy, **params)
+
+    # Add the data feed to cerebro
+    cerebro.adddata(data_feed)
+
+    # Set initial capital
+    cerebro.broker.setcash(100000)  # Initial capital set to 100,000
+
+    # Print starting conditions
+    print('Starting Portfolio Value: %.2f' % cerebro.broker.getvalue())
+
+    # Run the backtest and retrieve the strategy instance
+    strategies = cerebro.run()
+    strategy = strategies[0]  # Get the instance of the first strategy
+
+    # Print ending portfolio value
+    print('Ending Portfolio Value: %.2f' % cerebro.broker.getvalue())
+    return strategy
+
+# Step 4: Display results of trades
+def print_results(strategy):
+    print(f"Total trades taken: {strategy.trade_count}")
+    print(f"Successful trades: {strategy.successful_trades}")
+    print(f"Failed trades: {strategy.failed_trades}")
+    print(f"Total Gain points: {strategy.total_gain:.2f}")
+    print(f"Total Loss points: {strategy.total_loss:.2f}")
+    print(f"Net Profit (Total Points): {strategy.total_profit:.2f}")
+
+# Step 5: Prepare marker data and plot the candlestick chart
+def plot_results(data, strategy, start=None, end=None):
+    import chartrender
+
+    # Marker arrays matching the data index (close at the marker bars, NaN elsewhere),
+    # filled straight from the trade ledger's bar indices
+    markers = strategy.ledger.markers(data['Close'].to_numpy())
+    buy_marker = markers['buy']
+    sell_marker = markers['sell']
+    success_marker = markers['success']
+    fail_marker = markers['failure']
+
+    # Plot the candlestick chart with moving averages and markers; chartrender merges the candles
+    # down to the width of the figure (marker bars always stay) and re-renders a zoomed range
+    chartrender.plot_candles(data, title='Nifty 50 - Candlestick Chart with Backtesting',
+                             mav=(strategy.params.short_period, strategy.params.long_period),
+                             markers=[(buy_marker, dict(marker='^', color='g')),  # Buy markers
+                                      (sell_marker, dict(marker='v', color='r')),  # Sell markers
+                                      (success_marker, dict(marker='o', color='b')),  # Successful trades
+                                      (fail_marker, dict(marker='x', color='y'))],  # Failed trades
+                             start=start, end=end)
+
+if __name__ == "__main__":
+    file_name = "nifty50_data_5d_5m_20240917_014831.csv"  # Replace with actual file name including .csv extension
+    file_path = os.path.join(os.getcwd(), file_name)  # Full path to the file
+
+    # Try to load the data
+    try:
+        data = load_data(file_path)
+        print("Data loaded successfully!")
+    except FileNotFoundError:
+        print(f"File not found: {file_path}. Please check the file name and location.")
+        exit()  # Exit if the file is not found
+
+    strategy = run_strategy(data)
+    print_results(strategy)
+    plot_results(data, strategy)
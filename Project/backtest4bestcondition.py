@@ -1,15 +1,20 @@
 import os
 import backtrader as bt
-import pandas as pd
-import numpy as np
+
+import dataloader
+import indicatorcache
+import tradingcalendar
+import optimizer
+import resultcache
 
 # Step 1: Define the trading strategy with profit/loss tracking
 class MovingAverageCrossStrategy(bt.Strategy):
-    params = (('short_period', 14), ('long_period', 50),)
+    params = (('short_period', 14), ('long_period', 50), ('sma_cache', None), ('stop_loss', 0),)
 
     def __init__(self):
-        self.short_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.short_period)
-        self.long_ma = bt.indicators.SimpleMovingAverage(self.data.close, period=self.params.long_period)
+        # With sma_cache set (e.g. indicatorcache.default_cache) the SMAs come from a shared cache
+        self.short_ma, self.long_ma = indicatorcache.moving_averages(
+            self, self.params.short_period, self.params.long_period, self.params.sma_cache)
 
         # Initialize trade tracking variables
         self.trade_count = 0
@@ -19,19 +24,23 @@ class MovingAverageCrossStrategy(bt.Strategy):
         self.total_loss = 0     # Track total loss in ₹
         self.total_gain = 0     # Track total gain in ₹
         self.entry_price = None
-        self.entry_date = None  # Track the date of the entry (buy)
+        self.entry_session = None  # Track the session (trading day) of the entry (buy)
+        # Session id per bar, shared by every run on the same data (tradingcalendar.py)
+        self.session_of = tradingcalendar.feed_sessions(self.data)
 
     def next(self):
-        current_date = self.data.datetime.date(0)  # Get the current date
+        current_session = self.session_of(len(self) - 1)  # Session id of the current bar
         if not self.position:  # Not in a position
             if self.short_ma > self.long_ma:  # Buy signal
                 self.buy()
                 self.entry_price = self.data.close[0]  # Record the entry price
-                self.entry_date = current_date  # Record the entry date
+                self.entry_session = current_session  # Record the entry session
                 self.trade_count += 1
         else:
-            # Exit if the short MA crosses below the long MA or if it's the end of the day
-            if self.short_ma < self.long_ma or current_date != self.entry_date:  # Sell signal or different day
+            # Exit if the short MA crosses below the long MA or if it's the end of the day,
+            # or (with a stop loss set) if the close has fallen stop_loss points below the entry
+            stopped = self.params.stop_loss and self.data.close[0] <= self.entry_price - self.params.stop_loss
+            if self.short_ma < self.long_ma or current_session != self.entry_session or stopped:  # Sell signal or different day
                 self.sell()
                 exit_price = self.data.close[0]  # Record the exit price
 
@@ -53,34 +62,11 @@ class MovingAverageCrossStrategy(bt.Strategy):
                 # Update total profit/loss
                 self.total_profit = self.total_gain - self.total_loss
 
-# Step 2: Load the historical data from CSV
-# Request user input for file name
-file_name = input("Enter the name of the CSV file (including the extension): ")
-
-# Automatically detect the file path in the same folder or parent folder
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-
-# First check in the current directory
-file_path = os.path.join(current_dir, file_name)
-
-# If not found, check in the parent directory
-if not os.path.isfile(file_path):
-    file_path = os.path.join(parent_dir, file_name)
-
-# Try to load the data
-try:
-    data = pd.read_csv(file_path, index_col=0, parse_dates=True)
-    data.index = data.index.tz_localize(None)  # Ensure the dataframe's index is timezone-naive
-    print("Data loaded successfully!")
-except FileNotFoundError:
-    print(f"File not found: {file_path}. Please check the file name and location.")
-    exit()  # Exit if the file is not found
-
-# Step 3: Define the function to run the backtest
-def run_backtest(short_period, long_period):
+# Step 2: Define the function to run the backtest
+def run_backtest(data, short_period, long_period, sma_cache=None, stop_loss=0):
     cerebro = bt.Cerebro()
-    cerebro.addstrategy(MovingAverageCrossStrategy, short_period=short_period, long_period=long_period)
+    cerebro.addstrategy(MovingAverageCrossStrategy, short_period=short_period, long_period=long_period,
+                        sma_cache=sma_cache, stop_loss=stop_loss)
 
     # Convert the data into Backtrader-compatible feed
     data_feed = bt.feeds.PandasData(dataname=data)
@@ -96,30 +82,58 @@ def run_backtest(short_period, long_period):
     # Return the net profit and total trades
     return strategy.total_profit, strategy.trade_count, strategy.successful_trades, strategy.failed_trades
 
-# Step 4: Run the optimization loop for best MA values
-best_profit = -float('inf')
-best_short_ma = None
-best_long_ma = None
-best_trade_count = 0
-best_successful_trades = 0
-best_failed_trades = 0
-
-for short_ma in range(5, 20):  # Short MA from 5 to 20
-    for long_ma in range(50, 101):  # Long MA from 50 to 100
-        net_profit, trade_count, successful_trades, failed_trades = run_backtest(short_ma, long_ma)
-        
-        if net_profit > best_profit:
-            best_profit = net_profit
-            best_short_ma = short_ma
-            best_long_ma = long_ma
-            best_trade_count = trade_count
-            best_successful_trades = successful_trades
-            best_failed_trades = failed_trades
-
-# Step 5: Print the best result
-print(f"Best Combination: Short MA = {best_short_ma}, Long MA = {best_long_ma}")
-print(f"Net Profit: {best_profit:.2f}")
-print(f"Total Trades: {best_trade_count}")
-print(f"Successful Trades: {best_successful_trades}")
-print(f"Failed Trades: {best_failed_trades}")
-print(f"Success Rate: {best_successful_trades / best_trade_count:.2f}" if best_trade_count > 0 else "No trades taken")
+# Step 3: Find and load the historical data from CSV
+def find_data_file(file_name):
+    # Automatically detect the file path in the same folder or parent folder
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+
+    # First check in the current directory
+    file_path = os.path.join(current_dir, file_name)
+
+    # If not found, check in the parent directory
+    if not os.path.isfile(file_path):
+        file_path = os.path.join(parent_dir, file_name)
+    return file_path
+
+def load_data(file_path):
+    data = dataloader.load_ohlcv(file_path)  # Parses the CSV once, then reads the .cols cache
+    data.index = data.index.tz_localize(None)  # Ensure the dataframe's index is timezone-naive
+    return data
+
+if __name__ == "__main__":
+    # Request user input for file name
+    file_name = input("Enter the name of the CSV file (including the extension): ")
+    file_path = find_data_file(file_name)
+
+    # Try to load the data
+    try:
+        data = load_data(file_path)
+        print("Data loaded successfully!")
+    except FileNotFoundError:
+        print(f"File not found: {file_path}. Please check the file name and location.")
+        exit()  # Exit if the file is not found
+
+    # numpy runs the whole grid at once, backtrader runs one Cerebro per combination,
+    # parallel spreads the backtrader runs over every CPU core, halving and bayesian only run
+    # the promising part of the grid, walkforward picks the pair on rolling 20-day windows and
+    # reports how it did on the 5 days after each one
+    engine = input("Choose engine - numpy, backtrader, parallel, halving, bayesian or walkforward "
+                   "(default: numpy): ").strip().lower() or "numpy"
+
+    if engine == "walkforward":
+        import walkforward
+        walkforward.print_summary(walkforward.walk_forward(data))
+        exit()
+
+    # Step 4: Run the optimization loop for best MA values
+    # (the numpy winner is re-run through backtrader so both engines stay in sync, and pairs
+    # already in backtest_cache.sqlite for these bars are not run again)
+    results, best = optimizer.optimize(data, engine=engine, verify=True, progress=True,
+                                       result_cache=resultcache.ResultCache())
+    if engine == "parallel":
+        print("\nTop 10 combinations:")
+        print(results.head(10).to_string(index=False))
+
+    # Step 5: Print the best result
+    optimizer.print_best(best)
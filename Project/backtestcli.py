@@ -0,0 +1,232 @@
+import argparse
+import os
+import sys
+
+# One headless entry point for the backtest scripts:
+#
+#   python backtestcli.py ma-cross data.csv --short 14 --long 50 --no-plot
+#   python backtestcli.py ma-cross-longshort data.csv --no-plot
+#   python backtestcli.py ma-cross-longshort data.csv --engine numpy --verify --no-plot
+#   python backtestcli.py ma-cross data.csv --plot-from "2024-09-12 09:15" --plot-to "2024-09-12 15:30"
+#   python backtestcli.py orb-915 data.csv --windows 09:20 09:45 10:00
+#   python backtestcli.py optimize data.csv --engine numpy           # results cached in backtest_cache.sqlite
+#   python backtestcli.py optimize data.csv --engine halving --stop-losses 0 25 50 --lot-sizes 15 30
+#   python backtestcli.py walk-forward data.csv --train-days 20 --test-days 5
+#   python backtestcli.py batch ^NSEI ^NSEBANK BTC-USD --strategy ma-cross-longshort --engine numpy
+#   python backtestcli.py download --ticker ^NSEBANK --period 5d --interval 5m --no-plot
+#
+# Nothing heavy is imported at the top: backtrader, mplfinance and yfinance are only
+# imported by the commands (and the code paths) that actually use them.
+
+
+def load_bars(file_path):
+    import dataloader
+
+    data = dataloader.load_ohlcv(file_path)
+    data.index = data.index.tz_localize(None)  # The backtests run on timezone-naive bars
+    return data
+
+
+def run_ma_cross(args, module_name):
+    import importlib
+
+    params = {}
+    if args.short is not None:
+        params['short_period'] = args.short
+    if args.long is not None:
+        params['long_period'] = args.long
+    if getattr(args, 'engine', 'backtrader') == 'numpy':
+        import livecrossover
+        import vectorlongshort
+
+        data = load_bars(args.file)
+        strategy = vectorlongshort.run_strategy(data, **params)
+        livecrossover.print_results(strategy)  # Same report as the script, without backtrader
+        if args.verify:
+            vectorlongshort.verify_with_backtrader(strategy, data)
+        if not args.no_plot:
+            importlib.import_module(module_name).plot_results(data, strategy, args.plot_from, args.plot_to)
+        return
+
+    script = importlib.import_module(module_name)
+    data = script.load_data(args.file)
+    strategy = script.run_strategy(data, **params)
+    script.print_results(strategy)
+    if not args.no_plot:
+        script.plot_results(data, strategy, args.plot_from, args.plot_to)
+
+
+def cmd_ma_cross(args):
+    run_ma_cross(args, 'backtest2')
+
+
+def cmd_ma_cross_longshort(args):
+    run_ma_cross(args, 'backtest3')
+
+
+def cmd_orb_915(args):
+    import dataloader
+    from back930rule1 import NineFifteenRuleBacktest
+
+    df = dataloader.load_ohlcv(args.file, index_col=args.index_col)
+    backtest = NineFifteenRuleBacktest(df)
+    backtest.apply_9_15_rule_vectorized(end_time=f"{args.end}:00")
+    backtest.print_results()
+    if args.windows:
+        print("\nOpening range windows:")
+        windows = backtest.apply_opening_range_windows([f"{end}:00" for end in args.windows])
+        print(windows.to_string(index=False))
+
+
+def cmd_optimize(args):
+    import optimizer
+    import resultcache
+
+    data = load_bars(args.file)
+    if args.engine not in optimizer.SEARCH_ENGINES and (args.stop_losses != [0] or args.lot_sizes):
+        print("--stop-losses and --lot-sizes need --engine halving or bayesian.")
+        return 1
+    result_cache = None if args.no_cache else resultcache.ResultCache(args.cache)
+    results, best = optimizer.optimize(data, engine=args.engine,
+                                       short_periods=range(args.short_min, args.short_max + 1),
+                                       long_periods=range(args.long_min, args.long_max + 1),
+                                       lot_size=args.lot_size, verify=args.verify, progress=args.progress,
+                                       stop_losses=args.stop_losses, lot_sizes=args.lot_sizes,
+                                       result_cache=result_cache)
+    if args.top:
+        ranked = results.sort_values('total_profit', ascending=False, kind='stable')
+        print(f"Top {args.top} combinations:")
+        print(ranked.head(args.top).to_string(index=False))
+    optimizer.print_best(best)
+
+
+def cmd_walk_forward(args):
+    import walkforward
+
+    data = load_bars(args.file)
+    folds = walkforward.walk_forward(data, short_periods=range(args.short_min, args.short_max + 1),
+                                     long_periods=range(args.long_min, args.long_max + 1),
+                                     train_days=args.train_days, test_days=args.test_days,
+                                     step_days=args.step_days, anchored=args.anchored, lot_size=args.lot_size)
+    walkforward.print_summary(folds)
+
+
+def cmd_batch(args):
+    import batchrunner
+
+    return batchrunner.run(args)
+
+
+def cmd_download(args):
+    import dataBacktest
+
+    try:
+        data = dataBacktest.download(args.ticker, args.period, args.interval, store_dir=args.store)
+    except ValueError as e:  # Unknown period or interval
+        print(e)
+        return 1
+    if data.empty:
+        print("No data found, please check the period or interval.")
+        return 1
+    file_path = dataBacktest.save_csv(data, args.period, args.interval, file_name=args.out)
+    print(f"Saved {len(data)} bars to {file_path}")
+    if not args.no_plot:
+        dataBacktest.plot_data(data, args.period, args.interval, args.plot_from, args.plot_to)
+
+
+def add_plot_range(command):
+    # The chart shows this time range only, at full resolution when it fits (chartrender.py)
+    command.add_argument('--plot-from', help="first bar time of the chart, e.g. 2024-09-12 09:15")
+    command.add_argument('--plot-to', help="last bar time of the chart")
+
+
+def batchrunner_arguments(command):
+    import batchrunner  # Light: the strategies are only imported by the workers
+
+    batchrunner.add_arguments(command)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run the backtests without prompts.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name, handler, help_text in (('ma-cross', cmd_ma_cross, "long-only MA crossover (backtest2.py)"),
+                                     ('ma-cross-longshort', cmd_ma_cross_longshort,
+                                      "long/short MA crossover (backtest3.py)")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('file', help="CSV written by dataBacktest.py")
+        command.add_argument('--short', type=int, help="short SMA period (strategy default if omitted)")
+        command.add_argument('--long', type=int, help="long SMA period (strategy default if omitted)")
+        command.add_argument('--no-plot', action='store_true', help="skip the candlestick chart")
+        add_plot_range(command)
+        if name == 'ma-cross-longshort':
+            command.add_argument('--engine', choices=('backtrader', 'numpy'), default='backtrader',
+                                 help="numpy: array engine (vectorlongshort.py)")
+            command.add_argument('--verify', action='store_true', help="numpy engine: compare with backtrader")
+        command.set_defaults(handler=handler)
+
+    command = commands.add_parser('orb-915', help="9:15 opening-range breakout (back930rule1.py)")
+    command.add_argument('file', help="CSV with a Datetime index column")
+    command.add_argument('--index-col', default='Datetime')
+    command.add_argument('--end', default='09:30', help="opening range end time, HH:MM")
+    command.add_argument('--windows', nargs='*', help="extra window end times to compare, HH:MM")
+    command.set_defaults(handler=cmd_orb_915)
+
+    command = commands.add_parser('optimize', help="best short/long MA pair (backtest4bestcondition.py)")
+    command.add_argument('file', help="CSV written by dataBacktest.py")
+    command.add_argument('--engine', choices=('numpy', 'backtrader', 'parallel', 'halving', 'bayesian'),
+                         default='numpy', help="halving / bayesian: adaptive search (paramsearch.py)")
+    command.add_argument('--short-min', type=int, default=5)
+    command.add_argument('--short-max', type=int, default=19)
+    command.add_argument('--long-min', type=int, default=50)
+    command.add_argument('--long-max', type=int, default=100)
+    command.add_argument('--lot-size', type=int, default=15)
+    command.add_argument('--stop-losses', type=float, nargs='+', default=[0],
+                         help="stop losses in points to search, 0 = none (halving / bayesian)")
+    command.add_argument('--lot-sizes', type=int, nargs='+', help="lot sizes to search (halving / bayesian)")
+    command.add_argument('--cache', default='backtest_cache.sqlite', help="result cache file")
+    command.add_argument('--no-cache', action='store_true', help="run every combination again")
+    command.add_argument('--verify', action='store_true', help="re-run the numpy winner through backtrader")
+    command.add_argument('--progress', action='store_true', help="print every finished parallel run")
+    command.add_argument('--top', type=int, default=0, help="also print the N best pairs")
+    command.set_defaults(handler=cmd_optimize)
+
+    command = commands.add_parser('walk-forward', help="out-of-sample check of the optimizer (walkforward.py)")
+    command.add_argument('file', help="CSV written by dataBacktest.py")
+    command.add_argument('--train-days', type=int, default=20)
+    command.add_argument('--test-days', type=int, default=5)
+    command.add_argument('--step-days', type=int, help="days between folds (default: --test-days)")
+    command.add_argument('--anchored', action='store_true', help="every train window starts at the first day")
+    command.add_argument('--short-min', type=int, default=5)
+    command.add_argument('--short-max', type=int, default=19)
+    command.add_argument('--long-min', type=int, default=50)
+    command.add_argument('--long-max', type=int, default=100)
+    command.add_argument('--lot-size', type=int, default=15)
+    command.set_defaults(handler=cmd_walk_forward)
+
+    command = commands.add_parser('batch', help="one strategy over many symbols in parallel (batchrunner.py)")
+    batchrunner_arguments(command)
+    command.set_defaults(handler=cmd_batch)
+
+    command = commands.add_parser('download', help="fetch bars into the local store (dataBacktest.py)")
+    command.add_argument('--ticker', default='^NSEBANK')
+    command.add_argument('--period', default='5d')
+    command.add_argument('--interval', default='5m')
+    command.add_argument('--store', help="store folder (default: ./ohlcv_store)")
+    command.add_argument('--out', help="CSV file name (default: niftyBank_data_{period}_{interval}.csv)")
+    command.add_argument('--no-plot', action='store_true', help="skip the candlestick chart")
+    add_plot_range(command)
+    command.set_defaults(handler=cmd_download)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, 'file', None) and not os.path.exists(args.file):
+        print(f"File not found: {args.file}. Please check the file name and location.")
+        return 1
+    return args.handler(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
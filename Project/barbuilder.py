@@ -0,0 +1,202 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Streaming tick -> OHLCV bar aggregator for the NSE session.
+#
+# Every tick costs O(1) per interval: the IST time of day is plain integer arithmetic on the
+# UTC ns timestamp (IST has no DST), the bucket is (time_of_day - 9:15) // interval, and the
+# open bar is either updated in place or emitted and replaced. Bars are labelled by their
+# start time like the yfinance CSVs, the first bar of a day starts at 9:15 and the last one
+# ends at 15:30; ticks outside the session are counted and skipped. Intervals without a
+# single tick produce no bar.
+#
+#   builder = BarBuilder(('1m', '5m', '15m'))
+#   builder.subscribe(lambda interval, bar: print(interval, bar))
+#   builder.on_tick(time_ns, price, quantity)
+#
+#   python barbuilder.py ticks/ticks-20261016.bin --security 1333 --out bars   # tickingest files -> CSVs
+
+INTERVALS = {'1m': 60, '5m': 300, '15m': 900}  # seconds
+IST_OFFSET_NS = 19_800_000_000_000  # +05:30
+DAY_NS = 86_400_000_000_000
+SESSION_OPEN_NS = (9 * 3600 + 15 * 60) * 1_000_000_000
+SESSION_CLOSE_NS = (15 * 3600 + 30 * 60) * 1_000_000_000
+CSV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']  # dataBacktest.py / yfinance schema
+
+
+class BarBuilder:
+    def __init__(self, intervals=('1m', '5m', '15m')):
+        self.intervals = sorted(intervals, key=INTERVALS.get)  # Finest first, see the late-tick check
+        self.steps = [INTERVALS[name] * 1_000_000_000 for name in self.intervals]
+        # Open bar per interval: [bucket_key, open, high, low, close, volume], bucket_key = (day, bucket)
+        self.current = [None] * len(self.intervals)
+        self.subscribers = []
+        self.ticks = 0
+        self.outside_session = 0
+        self.late_ticks = 0
+
+    def subscribe(self, callback):
+        # callback(interval, bar) for every completed bar; bar is a dict in the CSV schema
+        self.subscribers.append(callback)
+
+    def emit(self, i, bar):
+        day, bucket = bar[0]
+        start = day * DAY_NS + SESSION_OPEN_NS + bucket * self.steps[i] - IST_OFFSET_NS
+        record = {
+            'Datetime': pd.Timestamp(start, tz='UTC').tz_convert('Asia/Kolkata'),
+            'Open': bar[1], 'High': bar[2], 'Low': bar[3], 'Close': bar[4], 'Adj Close': bar[4], 'Volume': bar[5],
+        }
+        for callback in self.subscribers:
+            callback(self.intervals[i], record)
+
+    def on_tick(self, time_ns, price, quantity=0):
+        local = time_ns + IST_OFFSET_NS
+        day, since_open = divmod(local, DAY_NS)
+        since_open -= SESSION_OPEN_NS
+        if since_open < 0 or since_open >= SESSION_CLOSE_NS - SESSION_OPEN_NS:
+            self.outside_session += 1
+            self.advance(time_ns)  # A post-close tick still closes the day's last bars
+            return
+        self.ticks += 1
+
+        for i, step in enumerate(self.steps):
+            key = (day, since_open // step)
+            bar = self.current[i]
+            if bar is None or key > bar[0]:
+                if bar is not None:
+                    self.emit(i, bar)
+                self.current[i] = [key, price, price, price, price, quantity]
+            elif key == bar[0]:
+                if price > bar[2]:
+                    bar[2] = price
+                if price < bar[3]:
+                    bar[3] = price
+                bar[4] = price
+                bar[5] += quantity
+            else:
+                # Older than the open bar, which was already emitted. Intervals nest, so this can
+                # only happen on the finest one and the tick is dropped for all of them.
+                self.late_ticks += 1
+                break
+
+    def advance(self, now_ns):
+        # Emit bars whose time is over even though no newer tick arrived (call from a timer)
+        local = now_ns + IST_OFFSET_NS
+        day, since_open = divmod(local, DAY_NS)
+        since_open -= SESSION_OPEN_NS
+        for i, step in enumerate(self.steps):
+            bar = self.current[i]
+            if bar is None:
+                continue
+            bar_day, bucket = bar[0]
+            bar_end = min((bucket + 1) * step, SESSION_CLOSE_NS - SESSION_OPEN_NS)
+            if day > bar_day or since_open >= bar_end:
+                self.emit(i, bar)
+                self.current[i] = None
+
+    def flush(self):
+        # Emit whatever is still open (end of a replay or of the session)
+        for i, bar in enumerate(self.current):
+            if bar is not None:
+                self.emit(i, bar)
+                self.current[i] = None
+
+
+class CsvBarWriter:
+    # Subscriber that appends completed bars to {directory}/{name}_{interval}.csv in the same
+    # layout dataBacktest.py saves, so dataloader.load_ohlcv and the backtests read them as is
+    def __init__(self, directory='bars', name='bars'):
+        self.directory = directory
+        self.name = name
+        os.makedirs(directory, exist_ok=True)
+        self.files = {}
+
+    def path(self, interval):
+        return os.path.join(self.directory, f"{self.name}_{interval}.csv")
+
+    def __call__(self, interval, bar):
+        f = self.files.get(interval)
+        if f is None:
+            path = self.path(interval)
+            new = not os.path.exists(path) or os.path.getsize(path) == 0
+            f = self.files[interval] = open(path, 'a', newline='')
+            if new:
+                f.write('Datetime,' + ','.join(CSV_COLUMNS) + '\n')
+        f.write(f"{bar['Datetime']},{bar['Open']},{bar['High']},{bar['Low']},{bar['Close']},"
+                f"{bar['Adj Close']},{bar['Volume']}\n")
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+
+class BarCollector:
+    # Subscriber that keeps bars in memory; frame(interval) returns the same shape as the CSVs
+    def __init__(self):
+        self.bars = {}
+
+    def __call__(self, interval, bar):
+        self.bars.setdefault(interval, []).append(bar)
+
+    def frame(self, interval):
+        rows = self.bars.get(interval, [])
+        frame = pd.DataFrame(rows, columns=['Datetime'] + CSV_COLUMNS)
+        return frame.set_index('Datetime')
+
+
+def record_ticks(records, security_id=None):
+    # tickingest records -> (time_ns, price, quantity) arrays for one security. The exchange
+    # trade time (ltt) is used when present, on the IST date the tick was received; the
+    # quantity is the change in cumulative day volume (LTQ when the feed has no volume).
+    if security_id is not None:
+        records = records[records['security_id'] == security_id]
+    records = records[np.isfinite(records['ltp'])]
+    local_day = (records['recv_ns'] + IST_OFFSET_NS) // DAY_NS
+    exchange_ns = local_day * DAY_NS + records['ltt'].astype(np.int64) * 1_000_000_000 - IST_OFFSET_NS
+    times = np.where(records['ltt'] >= 0, exchange_ns, records['recv_ns'])
+
+    volume = records['volume']
+    quantity = np.diff(volume, prepend=volume[:1])
+    if len(quantity):
+        quantity[0] = records['ltq'][0]
+    quantity = np.where((volume > 0) & (quantity >= 0), quantity, records['ltq'])
+    return times, records['ltp'], quantity
+
+
+def build_from_records(records, security_id=None, intervals=('1m', '5m', '15m'), subscribers=()):
+    builder = BarBuilder(intervals)
+    for callback in subscribers:
+        builder.subscribe(callback)
+    times, prices, quantities = record_ticks(records, security_id)
+    on_tick = builder.on_tick
+    for time_ns, price, quantity in zip(times.tolist(), prices.tolist(), quantities.tolist()):
+        on_tick(time_ns, price, quantity)
+    builder.flush()
+    return builder
+
+
+def main(argv=None):
+    import tickingest
+
+    parser = argparse.ArgumentParser(description="Build 1m/5m/15m OHLCV CSVs from recorded ticks.")
+    parser.add_argument('files', nargs='+', help="tick files written by tickingest.py")
+    parser.add_argument('--security', type=int, required=True, help="security id to build bars for")
+    parser.add_argument('--intervals', nargs='+', default=['1m', '5m', '15m'], choices=list(INTERVALS))
+    parser.add_argument('--out', default='bars')
+    args = parser.parse_args(argv)
+
+    records = np.concatenate([tickingest.read_ticks(path) for path in sorted(args.files)])
+    writer = CsvBarWriter(args.out, name=str(args.security))
+    builder = build_from_records(records, args.security, args.intervals, [writer])
+    writer.close()
+    print(f"{builder.ticks} ticks, {builder.outside_session} outside the session, {builder.late_ticks} late")
+    for interval in args.intervals:
+        print(f"Saved {writer.path(interval)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import dataloader
+
+# Memory-mapped bar store for multi-year minute data.
+# Same folder layout as the dataloader sidecar (index.npy + one colN.npy per column), but the
+# timestamps are always sorted int64 UTC nanoseconds and every file is opened with mmap, so
+# only the pages a query touches are read from disk. Range selection is a searchsorted on the
+# timestamp column and returns views into the mapped files, not copies.
+
+
+class BarStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta = dataloader.read_meta(directory)
+        self.timestamps = np.load(os.path.join(directory, 'index.npy'), mmap_mode='r')
+        self.columns = {name: dataloader.read_column(directory, i, mmap=True)
+                        for i, name in enumerate(self.meta['columns'])}
+
+    @classmethod
+    def create(cls, directory, data):
+        # Write a DataFrame (DatetimeIndex + numeric columns) as a new store
+        data = data[~data.index.duplicated(keep='last')].sort_index()
+        data.index = pd.DatetimeIndex(data.index).as_unit('ns')
+        dataloader.write_columns(data, directory, {'sorted': True})
+        return cls(directory)
+
+    @classmethod
+    def from_csv(cls, directory, file_path, index_col=0):
+        return cls.create(directory, dataloader.load_ohlcv(file_path, index_col=index_col))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def to_ns(self, timestamp):
+        # Query bounds are read in the store's timezone when they have none
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tzinfo is None and self.meta['tz'] is not None:
+            timestamp = timestamp.tz_localize(self.meta['tz'])
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+        return timestamp.as_unit('ns').value
+
+    def locate(self, start=None, end=None):
+        # Row positions [i, j) for start <= t < end, O(log n)
+        i = 0 if start is None else int(np.searchsorted(self.timestamps, self.to_ns(start), side='left'))
+        j = len(self) if end is None else int(np.searchsorted(self.timestamps, self.to_ns(end), side='left'))
+        return i, max(i, j)
+
+    def arrays(self, start=None, end=None):
+        # Zero-copy views: {'timestamps': int64 UTC ns, 'Open': ..., 'Close': ...}
+        i, j = self.locate(start, end)
+        views = {name: column[i:j] for name, column in self.columns.items()}
+        views['timestamps'] = self.timestamps[i:j]
+        return views
+
+    def index(self, start=None, end=None):
+        i, j = self.locate(start, end)
+        index = pd.DatetimeIndex(self.timestamps[i:j].view('datetime64[ns]'), name=self.meta['index_name'], copy=False)
+        if self.meta['tz'] is not None:
+            index = index.tz_localize('UTC').tz_convert(self.meta['tz'])  # Only the index is copied
+        return index
+
+    def frame(self, start=None, end=None):
+        # DataFrame over mapped columns, usable by bt.feeds.PandasData and NineFifteenRuleBacktest
+        i, j = self.locate(start, end)
+        data = {name: column[i:j] for name, column in self.columns.items()}
+        return pd.DataFrame(data, index=self.index(start, end), copy=False)
+
+    def feed(self, start=None, end=None, **kwargs):
+        import backtrader as bt  # Only needed for backtrader runs
+        data = self.frame(start, end)
+        if data.index.tz is not None:
+            data.index = data.index.tz_localize(None)  # The backtests run on timezone-naive bars
+        return bt.feeds.PandasData(dataname=data, **kwargs)
+
+    def append(self, data):
+        # Add newer bars. The store is rewritten file by file through memmaps, so the
+        # existing years are streamed from disk instead of being loaded into a DataFrame.
+        index = pd.DatetimeIndex(data.index)
+        index = index.tz_convert('UTC').tz_localize(None) if index.tz is not None else index
+        stamps = index.as_unit('ns').asi8
+        if len(self) and len(stamps) and stamps.min() <= self.timestamps[-1]:
+            raise ValueError("append only takes bars newer than the last stored bar")
+        order = np.argsort(stamps, kind='stable')
+
+        tmp_dir = f"{self.directory}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        total = len(self) + len(stamps)
+        self.write_column(os.path.join(tmp_dir, 'index.npy'), self.timestamps, stamps[order], total)
+        for i, name in enumerate(self.meta['columns']):
+            new = data[name].to_numpy(dtype=self.columns[name].dtype)[order]
+            self.write_column(os.path.join(tmp_dir, f'col{i}.npy'), self.columns[name], new, total)
+
+        meta = dict(self.meta, length=total)
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        # Drop our maps before swapping the folders (Windows will not replace mapped files)
+        self.timestamps = None
+        self.columns = {}
+        shutil.rmtree(self.directory)
+        os.replace(tmp_dir, self.directory)
+        self.__init__(self.directory)
+
+    @staticmethod
+    def write_column(path, old, new, total, block=1 << 22):
+        out = np.lib.format.open_memmap(path, mode='w+', dtype=old.dtype, shape=(total,))
+        for i in range(0, len(old), block):
+            stop = min(i + block, len(old))
+            out[i:stop] = old[i:stop]
+        out[len(old):] = new
+        out.flush()
+        del out
@@ -0,0 +1,312 @@
+import argparse
+import contextlib
+import io
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+# Run one strategy over a universe of symbols in parallel worker processes:
+#
+#   python batchrunner.py ^NSEI ^NSEBANK BTC-USD --strategy ma-cross-longshort --engine numpy
+#   python batchrunner.py --universe symbols.txt --strategy orb-915 --period 1mo --interval 5m
+#   python batchrunner.py nifty.csv banknifty.csv --strategy ma-cross --workers 4 --out report.csv
+#
+# A symbol is a CSV file, a barstore.BarStore folder, or a ticker that is read from the local
+# ohlcvstore.OHLCVStore (only missing ranges are downloaded). The tasks only carry that name;
+# every worker loads its symbol itself, runs it, sends back one summary row and drops the
+# data, so peak memory is about one symbol per worker. The rows are collected into one report
+# with a total line; a symbol that fails is listed with its error instead of stopping the batch.
+# Files are named by their file name in the report, with the parent folders added as far as
+# needed when two files share a name (data/nifty.csv and old/nifty.csv).
+
+STRATEGIES = ('ma-cross', 'ma-cross-longshort', 'orb-915')
+MA_COLUMNS = ['symbol', 'bars', 'trade_count', 'successful_trades', 'failed_trades', 'total_gain', 'total_loss',
+              'total_profit', 'seconds']
+ORB_COLUMNS = ['symbol', 'bars', 'days', 'breakouts', 'breakdowns', 'successful_trades', 'failed_trades',
+               'success_rate', 'seconds']
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+INDIAN_TICKERS = (('^NSE', '^BSE', '^CNX', '^INDIA'), ('.NS', '.BO'))  # (index prefixes, listing suffixes)
+
+
+class SymbolError(Exception):
+    # A symbol that cannot be run; the message is shown as is in the report
+    pass
+
+
+def read_universe(file_path):
+    # One symbol (ticker, CSV or store folder) per line; blank lines and # comments are skipped
+    with open(file_path) as f:
+        lines = [line.split('#', 1)[0].strip() for line in f]
+    return [line for line in lines if line]
+
+
+def source_key(source):
+    # Same file, same key (nifty.csv and ./nifty.csv); tickers are kept as they are
+    return os.path.abspath(source) if os.path.exists(source) else source
+
+
+def unique_sources(sources):
+    # A symbol listed twice (also as nifty.csv and ./nifty.csv) is run once
+    first = {}
+    for source in sources:
+        first.setdefault(source_key(source), source)
+    return list(first.values())
+
+
+def symbol_names(sources):
+    # {source: report name}: the file name without extension, plus as many parent folders as
+    # it takes to tell files with the same name apart; tickers keep their name
+    parts = {source: os.path.splitext(source_key(source))[0].split(os.sep) if os.path.exists(source) else [source]
+             for source in sources}
+    depth = {source: 1 for source in sources}
+    while True:
+        names = {source: '/'.join(parts[source][-depth[source]:]) for source in sources}
+        seen = {}
+        for source, name in names.items():
+            seen.setdefault(name, []).append(source)
+        clashes = [source for group in seen.values() if len(group) > 1 for source in group
+                   if depth[source] < len(parts[source])]
+        if not clashes:
+            return names
+        for source in clashes:
+            depth[source] += 1
+
+
+def trades_nse_sessions(ticker):
+    # Indian indices and listings count "5d" in NSE sessions; BTC-USD, AAPL, ES=F ... in calendar days
+    prefixes, suffixes = INDIAN_TICKERS
+    return ticker.upper().startswith(prefixes) or ticker.upper().endswith(suffixes)
+
+
+def load_symbol(source, store_dir=None, period='5d', interval='5m'):
+    import dataloader
+
+    if os.path.isdir(source):
+        from barstore import BarStore
+        return BarStore(source).frame()  # Memory-mapped, pages are read on demand
+    if os.path.exists(source):
+        return dataloader.load_ohlcv(source)  # Cached after the first read
+
+    from ohlcvstore import OHLCVStore, period_start
+    # A new store per symbol, so its in-memory frame goes away with the task
+    store = OHLCVStore(store_dir or os.path.join(os.getcwd(), "ohlcv_store"))
+    end = pd.Timestamp.now(tz="UTC")
+
+    # yfinance reports failed downloads on stderr and through its logger; keep that out of the
+    # progress output and use its last line as the error instead
+    messages = io.StringIO()
+    logger = logging.getLogger('yfinance')
+    handler = logging.StreamHandler(messages)
+    propagate = logger.propagate
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        with contextlib.redirect_stderr(messages):
+            data = store.get(source, interval, period_start(period, end, sessions=trades_nse_sessions(source)),
+                             end, now=end)
+    finally:
+        logger.removeHandler(handler)
+        logger.propagate = propagate
+    if data.empty:
+        lines = [line.strip() for line in messages.getvalue().splitlines() if line.strip()]
+        raise SymbolError(f"no data for {period} {interval}" + (f" - {lines[-1][:200]}" if lines else ""))
+    return data
+
+
+def run_ma_cross(data, strategy, engine, params):
+    # Same runs as backtestcli's ma-cross commands; the strategies want timezone-naive bars
+    if data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+    if engine == 'numpy':
+        import indicatorcache
+        import vectorlongshort
+        result = vectorlongshort.run_strategy(data, sma_cache=indicatorcache.SMACache(), **params)
+    else:
+        import backtest2
+        import backtest3
+        module = backtest2 if strategy == 'ma-cross' else backtest3
+        result = module.run_strategy(data, **params)
+    return {name: getattr(result, name) for name in MA_COLUMNS[2:-1]}
+
+
+def run_orb(data, end_time):
+    from back930rule1 import NineFifteenRuleBacktest
+
+    backtest = NineFifteenRuleBacktest(data)
+    backtest.apply_9_15_rule_vectorized(end_time=end_time)
+    successful, failed = len(backtest.successful_trades), len(backtest.failed_trades)
+    return {
+        'days': backtest.total_days,
+        'breakouts': len(backtest.breakouts),
+        'breakdowns': len(backtest.breakdowns),
+        'successful_trades': successful,
+        'failed_trades': failed,
+        'success_rate': successful / (successful + failed) if successful + failed else float('nan'),
+    }
+
+
+# Per-process state, filled in by init_worker()
+worker_options = None
+
+
+def init_worker(options):
+    global worker_options
+    worker_options = options
+
+
+def check_bars(data):
+    if not isinstance(data.index, pd.DatetimeIndex):
+        raise SymbolError("not an OHLCV file (the first column is not a date/time)")
+    missing = [column for column in PRICE_COLUMNS if column not in data]
+    if missing:
+        raise SymbolError(f"not an OHLCV file (no {', '.join(missing)} column)")
+    if data.empty:
+        raise SymbolError("no data")
+
+
+def run_symbol(source):
+    # Worker task: (source, row, None) or (source, None, error text)
+    options = worker_options
+    started = time.perf_counter()
+    try:
+        # The scripts print as they go, and pandas warns about odd files; the report has the errors
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            data = load_symbol(source, options['store_dir'], options['period'], options['interval'])
+            check_bars(data)
+            if options['strategy'] == 'orb-915':
+                row = run_orb(data, options['end_time'])
+            else:
+                row = run_ma_cross(data, options['strategy'], options['engine'], options['params'])
+    except SymbolError as e:
+        return source, None, str(e)
+    except Exception as e:
+        return source, None, f"{type(e).__name__}: {e}"
+    row = dict(row, bars=len(data), seconds=time.perf_counter() - started)
+    return source, row, None
+
+
+def run_batch(sources, strategy='ma-cross', engine='backtrader', params=None, end_time='09:30:00',
+              max_workers=None, store_dir=None, period='5d', interval='5m', on_result=None):
+    # Returns (report DataFrame in universe order, [(symbol, error)]).
+    # on_result(symbol, row, error) is called as every symbol finishes.
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+    if engine == 'numpy' and strategy != 'ma-cross-longshort':
+        raise ValueError("The numpy engine only runs ma-cross-longshort (vectorlongshort.py)")
+    sources = unique_sources(sources)
+    names = symbol_names(sources)
+    options = {'strategy': strategy, 'engine': engine, 'params': params or {}, 'end_time': end_time,
+               'store_dir': store_dir, 'period': period, 'interval': interval}
+    max_workers = min(max_workers or os.cpu_count() or 1, max(1, len(sources)))
+
+    rows, errors = {}, {}  # Both keyed by source
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(options,)) as pool:
+        futures = [pool.submit(run_symbol, source) for source in sources]
+        for future in as_completed(futures):
+            source, row, error = future.result()
+            if row is not None:
+                row['symbol'] = names[source]
+                rows[source] = row
+            else:
+                errors[source] = error
+            if on_result is not None:
+                on_result(names[source], row, error)
+
+    columns = ORB_COLUMNS if strategy == 'orb-915' else MA_COLUMNS
+    report = pd.DataFrame([rows[source] for source in sources if source in rows], columns=columns)
+    return report, [(names[source], errors[source]) for source in sources if source in errors]
+
+
+def total_row(report):
+    # Sums over all symbols; the success rate is recomputed from the summed trades
+    total = {column: report[column].sum() for column in report.columns if column not in ('symbol', 'success_rate')}
+    total['symbol'] = 'TOTAL'
+    if 'success_rate' in report:
+        closed = total['successful_trades'] + total['failed_trades']
+        total['success_rate'] = total['successful_trades'] / closed if closed else float('nan')
+    return pd.DataFrame([total], columns=report.columns)
+
+
+def print_report(report, errors):
+    if report.empty:
+        print("No symbol produced a result.")
+    else:
+        sort_by = 'total_profit' if 'total_profit' in report else 'success_rate'
+        ranked = report.sort_values(sort_by, ascending=False, kind='stable')
+        print(pd.concat([ranked, total_row(report)], ignore_index=True).to_string(
+            index=False, float_format=lambda value: f"{value:.2f}"))
+    for symbol, error in errors:
+        print(f"{symbol}: failed ({error})")
+
+
+def print_progress(total):
+    # Simple on_result callback: one line per finished symbol
+    done = [0]
+
+    def report(symbol, row, error):
+        done[0] += 1
+        status = f"failed ({error})" if error else f"{row['bars']} bars in {row['seconds']:.1f}s"
+        print(f"[{done[0]}/{total}] {symbol}: {status}")
+
+    return report
+
+
+def add_arguments(parser):
+    # Shared with the batch command in backtestcli.py
+    parser.add_argument('symbols', nargs='*', help="tickers, CSV files or barstore folders")
+    parser.add_argument('--universe', help="text file with one symbol per line")
+    parser.add_argument('--strategy', choices=STRATEGIES, default='ma-cross')
+    parser.add_argument('--engine', choices=('backtrader', 'numpy'), default='backtrader',
+                        help="numpy: array engine, ma-cross-longshort only (vectorlongshort.py)")
+    parser.add_argument('--short', type=int, help="short SMA period (strategy default if omitted)")
+    parser.add_argument('--long', type=int, help="long SMA period (strategy default if omitted)")
+    parser.add_argument('--end', default='09:30', help="orb-915 opening range end time, HH:MM")
+    parser.add_argument('--period', default='5d', help="history for tickers read from the store")
+    parser.add_argument('--interval', default='5m')
+    parser.add_argument('--store', help="store folder (default: ./ohlcv_store)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--out', help="also save the per-symbol report as CSV")
+    parser.add_argument('--quiet', action='store_true', help="no line per finished symbol")
+    return parser
+
+
+def build_parser():
+    return add_arguments(argparse.ArgumentParser(description="Run one strategy over many symbols in parallel."))
+
+
+def run(args):
+    sources = list(args.symbols)
+    if args.universe:
+        sources += read_universe(args.universe)
+    if not sources:
+        print("No symbols given (list them or pass --universe).")
+        return 1
+    params = {}
+    if args.short is not None:
+        params['short_period'] = args.short
+    if args.long is not None:
+        params['long_period'] = args.long
+    on_result = None if args.quiet else print_progress(len(unique_sources(sources)))
+    try:
+        report, errors = run_batch(sources, strategy=args.strategy, engine=args.engine, params=params,
+                                   end_time=f"{args.end}:00", max_workers=args.workers, store_dir=args.store,
+                                   period=args.period, interval=args.interval, on_result=on_result)
+    except ValueError as e:
+        print(e)
+        return 1
+    print_report(report, errors)
+    if args.out:
+        report.to_csv(args.out, index=False)
+        print(f"Report saved to {args.out}")
+    return 1 if report.empty else 0
+
+
+def main(argv=None):
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
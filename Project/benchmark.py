@@ -0,0 +1,257 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import synthdata
+
+# Benchmark harness for the strategy paths and engines.
+#
+#   python benchmark.py --sizes 1000 100000 10000000 --out bench.json
+#   python benchmark.py --sizes 1000 100000 --compare bench_old.json
+#   python benchmark.py --sizes 100000 --interval 5min --symbols NIFTY BANKNIFTY FINNIFTY
+#
+# Every case runs on seeded synthetic bars (synthdata.py, 1-minute unless --interval says
+# otherwise), first untraced for the time, then again under tracemalloc for the peak memory.
+# Cases with a max_bars limit are skipped above it (a single backtrader run over 10M bars
+# takes hours). Sizes are bars per symbol: with several --symbols the single-symbol cases run
+# once per symbol, and the batch_* cases run all symbols through batchrunner.py's worker
+# pool (their peak memory only covers the parent process).
+
+
+def case_ma_backtrader(data):
+    from backtest4bestcondition import run_backtest
+    run_backtest(data, 14, 50)
+    return 1
+
+
+def case_ma_backtrader_cached(data):
+    import indicatorcache
+    from backtest4bestcondition import run_backtest
+    run_backtest(data, 14, 50, sma_cache=indicatorcache.SMACache())
+    return 1
+
+
+def case_ma_numpy(data):
+    import indicatorcache
+    import vectorbacktest
+    vectorbacktest.ma_cross_grid(data, [14], [50], cache=indicatorcache.SMACache())
+    return 1
+
+
+def case_optimizer_numpy(data):
+    import indicatorcache
+    import optimizer
+    import vectorbacktest
+    vectorbacktest.ma_cross_grid(data, optimizer.SHORT_PERIODS, optimizer.LONG_PERIODS,
+                                 cache=indicatorcache.SMACache())
+    return len(optimizer.SHORT_PERIODS) * len(optimizer.LONG_PERIODS)
+
+
+def case_longshort_backtrader(data):
+    import contextlib
+    import io
+
+    import backtest3
+    import indicatorcache
+    with contextlib.redirect_stdout(io.StringIO()):  # run_strategy prints the portfolio values
+        backtest3.run_strategy(data, sma_cache=indicatorcache.SMACache())
+    return 1
+
+
+def case_longshort_numpy(data):
+    import indicatorcache
+    import vectorlongshort
+    vectorlongshort.run_strategy(data, sma_cache=indicatorcache.SMACache())
+    return 1
+
+
+def case_orb_loop(data):
+    from back930rule1 import NineFifteenRuleBacktest
+    NineFifteenRuleBacktest(data.copy()).apply_9_15_rule()
+    return 1
+
+
+def case_orb_vectorized(data):
+    from back930rule1 import NineFifteenRuleBacktest
+    NineFifteenRuleBacktest(data).apply_9_15_rule_vectorized()
+    return 1
+
+
+def case_orb_windows(data):
+    from back930rule1 import NineFifteenRuleBacktest
+    NineFifteenRuleBacktest(data).apply_opening_range_windows()
+    return 1
+
+
+def write_stores(frames, directory):
+    # One barstore.BarStore folder per symbol: the batch workers load them memory-mapped
+    from barstore import BarStore
+    paths = []
+    for symbol, frame in frames.items():
+        path = os.path.join(directory, symbol)
+        BarStore.create(path, frame)
+        paths.append(path)
+    return paths
+
+
+def run_batch_case(frames, strategy, engine):
+    import batchrunner
+    with tempfile.TemporaryDirectory() as directory:
+        report, errors = batchrunner.run_batch(write_stores(frames, directory), strategy=strategy, engine=engine)
+    if errors:
+        raise RuntimeError(f"batch case failed: {errors}")
+    return len(report)
+
+
+def case_batch_longshort_numpy(frames):
+    return run_batch_case(frames, 'ma-cross-longshort', 'numpy')
+
+
+def case_batch_orb(frames):
+    return run_batch_case(frames, 'orb-915', 'backtrader')
+
+
+# name -> (function, max_bars or None); the function returns how many strategy runs it did
+CASES = {
+    'ma_cross_backtrader': (case_ma_backtrader, 200_000),
+    'ma_cross_backtrader_cached': (case_ma_backtrader_cached, 200_000),
+    'ma_cross_numpy': (case_ma_numpy, None),
+    'optimizer_numpy_765': (case_optimizer_numpy, 1_000_000),
+    'ma_longshort_backtrader': (case_longshort_backtrader, 200_000),
+    'ma_longshort_numpy': (case_longshort_numpy, None),
+    'orb915_loop': (case_orb_loop, 1_000_000),
+    'orb915_vectorized': (case_orb_vectorized, None),
+    'orb915_windows': (case_orb_windows, None),
+}
+
+# Same, for cases that take every symbol at once ({symbol: frame})
+MULTI_CASES = {
+    'batch_longshort_numpy': (case_batch_longshort_numpy, None),
+    'batch_orb915': (case_batch_orb, None),
+}
+ALL_CASES = {**CASES, **MULTI_CASES}
+
+
+def case_runner(name):
+    # function(frames): a single-symbol case runs once per symbol
+    function = ALL_CASES[name][0]
+    if name in MULTI_CASES:
+        return function
+    return lambda frames: sum(function(frame) for frame in frames.values())
+
+
+def symbol_frames(bars, symbols, interval, seed):
+    # {symbol: about `bars` bars}, every symbol with its own seed and start price
+    return {symbol: synthdata.frame_with_bars(bars, interval=interval, seed=seed + i,
+                                              start_price=synthdata.START_PRICES.get(symbol, 10000.0))
+            for i, symbol in enumerate(symbols)}
+
+
+def measure(function, data, memory=True):
+    gc.collect()
+    start = time.perf_counter()
+    runs = function(data)
+    seconds = time.perf_counter() - start
+
+    peak_mb = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        function(data)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return runs, seconds, peak_mb
+
+
+def run_benchmarks(sizes, cases=None, seed=0, memory=True, max_bars_override=False, interval='1min',
+                   symbols=('NIFTY',)):
+    results = []
+    names = cases or (list(CASES) if len(symbols) == 1 else list(ALL_CASES))
+    warmup = symbol_frames(500, symbols[:1], interval, seed)
+    for name in names:
+        case_runner(name)(warmup)  # Imports and first-call setup stay out of the timings
+
+    for bars in sizes:
+        data = symbol_frames(bars, symbols, interval, seed)
+        for name in names:
+            max_bars = ALL_CASES[name][1]
+            if max_bars is not None and bars > max_bars and not max_bars_override:
+                print(f"{name:28s} {bars:>10,} bars  skipped (limit {max_bars:,})")
+                continue
+            runs, seconds, peak_mb = measure(case_runner(name), data, memory)
+            record = {
+                'case': name,
+                'bars': bars,
+                'symbols': len(symbols),
+                'interval': interval,
+                'runs': runs,
+                'seconds': seconds,
+                'bars_per_sec': bars * runs / seconds if seconds else None,
+                'peak_mem_mb': peak_mb,
+            }
+            results.append(record)
+            memory_text = f"{peak_mb:9.1f} MB" if peak_mb is not None else ""
+            print(f"{name:28s} {bars:>10,} bars  {seconds:9.3f} s  {record['bars_per_sec']:>14,.0f} bars/s  {memory_text}")
+        del data
+    return results
+
+
+def compare(results, old_path):
+    # Print new/old time ratios for the cases both files have
+    with open(old_path) as f:
+        old = {(r['case'], r['bars'], r.get('symbols', 1), r.get('interval', '1min')): r
+               for r in json.load(f)['results']}
+    print(f"\nCompared with {old_path} (ratio > 1 means slower now):")
+    for record in results:
+        before = old.get((record['case'], record['bars'], record['symbols'], record['interval']))
+        if before:
+            ratio = record['seconds'] / before['seconds'] if before['seconds'] else float('nan')
+            print(f"{record['case']:28s} {record['bars']:>10,} bars  x{ratio:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time every strategy path on synthetic bars.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 10_000_000])
+    parser.add_argument('--cases', nargs='+', choices=list(ALL_CASES),
+                        help="default: all cases (the batch_* cases only with several --symbols)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--interval', default='1min', help="bar interval of the synthetic data, e.g. 5min")
+    parser.add_argument('--symbols', nargs='+', default=['NIFTY'], help="synthetic symbols, sizes are per symbol")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--no-limits', action='store_true', help="run slow cases on every size too")
+    parser.add_argument('--out', default='benchmark_results.json')
+    parser.add_argument('--compare', help="earlier JSON output to diff against")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.cases, args.seed, not args.no_memory, args.no_limits,
+                             args.interval, args.symbols)
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'seed': args.seed,
+        'interval': args.interval,
+        'symbols': args.symbols,
+        'results': results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {len(results)} results to {args.out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
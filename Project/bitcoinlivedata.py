@@ -1,72 +1,294 @@
-import yfinance as yf
-import mplfinance as mpf
+import argparse
+
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PolyCollection
 from matplotlib.widgets import Button
 
+import dataloader
+import ohlcvstore
+
 # BTC/USD ka ticker symbol
 ticker = "BTC-USD"
 #ticker = "^NSEI"
 #ticker = "^NSEBANK"
 
+INTERVAL = "5m"
+REFRESH_MS = 30_000  # Auto refresh har 30 second
+MAX_CANDLES = 288  # Chart pe ek din ke 5-minute candles
 
-# Create figure and axes for plotting
-fig, (ax1, ax2) = plt.subplots(2, 1, gridspec_kw={'height_ratios': [3, 1]}, sharex=True)
+# Incremental live chart:
+#   - candles are kept in a CandleBuffer; every refresh asks the source only for bars from the
+#     last buffered timestamp on (the last candle is still forming, so it is fetched again),
+#   - the forming candle and the live price line are animated artists redrawn with blitting,
+#   - a full redraw only happens when a new candle is appended or leaves the current y range.
+# The source is any function source(since) -> DataFrame, so a local replay works like yfinance:
+#
+#   python bitcoinlivedata.py                         # live BTC-USD from yfinance
+#   python bitcoinlivedata.py --replay data.csv       # replay a CSV written by dataBacktest.py
 
 
-# Create a new axes for the button
-button_ax = plt.axes([0.81, 0.01, 0.1, 0.05])  # Position: [left, bottom, width, height]
-refresh_button = Button(button_ax, 'Refresh', color='lightblue', hovercolor='lightgreen')
+def yfinance_source(symbol=ticker, interval=INTERVAL, period="1d"):
+    def source(since=None):
+        now = pd.Timestamp.now(tz='UTC')
+        start = ohlcvstore.period_start(period, now, sessions=False) if since is None else ohlcvstore.utc(since)
+        return ohlcvstore.yfinance_downloader(symbol, start, None, interval)
+    return source
 
-# Real-time data fetch karne ka function
-def update_chart(event=None):
-    try:
-        # 5 minute ke interval me latest data fetch karna (last 1 day ka data)
-        data = yf.download(ticker, period="1d", interval="5m")
 
-        # Check if the data has been fetched properly
-        if data.empty:
-            print("No data available, skipping update.")
-            return
+class ReplaySource:
+    # Plays a saved DataFrame back as if it was live: every call reveals `step` more bars,
+    # and the newest bar is first shown half-formed, like a candle that is still open
+    def __init__(self, data, start_bars=50, step=1):
+        self.data = data
+        self.position = min(start_bars, len(data))
+        self.step = step
+        self.forming = False
+
+    def __call__(self, since=None):
+        if self.forming:
+            self.forming = False
+        elif self.position < len(self.data):
+            self.position = min(self.position + self.step, len(self.data))
+            self.forming = True
+        bars = self.data.iloc[:self.position].copy()
+        if self.forming:
+            last = bars.iloc[-1].copy()
+            last['Close'] = (last['Open'] + last['Close']) / 2
+            last['High'] = max(last['Open'], last['Close'])
+            last['Low'] = min(last['Open'], last['Close'])
+            last['Volume'] = last['Volume'] // 2
+            bars.iloc[-1] = last
+        if since is not None:
+            bars = bars[bars.index >= since]
+        return bars
 
-        # Clear previous plots
-        ax1.clear()
-        ax2.clear()
 
-        # Candlestick chart plot karna
-        mpf.plot(data, type='candle', style='charles', ax=ax1, volume=ax2)
+class CandleBuffer:
+    # Last `maxlen` candles as numpy columns (open, high, low, close, volume)
+    def __init__(self, maxlen=MAX_CANDLES):
+        self.maxlen = maxlen
+        self.index = pd.DatetimeIndex([])
+        self.values = np.empty((0, 5))
+        self.appended = 0  # Candles appended since the buffer was created
 
-        # Latest live price fetch karna
-        live_price = data['Close'][-1]
+    def __len__(self):
+        return len(self.values)
 
-        # Latest candle ke open aur close prices nikalna
-        last_candle = data.iloc[-1]  # Get the last row (most recent candle)
-        open_price = last_candle['Open']
-        close_price = last_candle['Close']
+    def last_time(self):
+        return self.index[-1] if len(self.index) else None
 
-        # Candle ka color check karna
-        if close_price > open_price:
-            line_color = 'green'  # Candle is bullish (green)
+    def update(self, bars):
+        # Merge freshly fetched bars. Returns (last_changed, appended_count).
+        if bars is None or bars.empty:
+            return False, 0
+        bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+        values = bars[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(dtype=float)
+        last_changed = False
+        if len(self.index):
+            last = self.index[-1]
+            bars_index = bars.index
+            if bars_index.tz is None and self.index.tz is not None:
+                bars_index = bars_index.tz_localize(self.index.tz)
+            newer = bars_index > last
+            same = bars_index == last
+            if same.any():
+                row = values[np.flatnonzero(same)[-1]]
+                last_changed = not np.array_equal(row, self.values[-1])
+                self.values[-1] = row
+            values = values[newer]
+            new_index = bars_index[newer]
         else:
-            line_color = 'red'  # Candle is bearish (red)
+            new_index = bars.index
+
+        if len(values):
+            self.index = self.index.append(new_index) if len(self.index) else new_index
+            self.values = np.vstack([self.values, values])
+            self.appended += len(values)
+            if len(self.values) > self.maxlen:
+                self.index = self.index[-self.maxlen:]
+                self.values = self.values[-self.maxlen:]
+        return last_changed, len(values)
+
+
+def candle_geometry(values, positions, width=0.6):
+    # Body rectangles, wick segments and volume bars for candles at x = positions
+    opens, highs, lows, closes, volumes = values.T
+    left, right = positions - width / 2, positions + width / 2
+    bottoms, tops = np.minimum(opens, closes), np.maximum(opens, closes)
+    tops = np.where(tops == bottoms, tops + 1e-9, tops)  # Doji ko bhi thin body milni chahiye
+    bodies = np.stack([np.column_stack([left, bottoms]), np.column_stack([left, tops]),
+                       np.column_stack([right, tops]), np.column_stack([right, bottoms])], axis=1)
+    wicks = np.stack([np.column_stack([positions, lows]), np.column_stack([positions, highs])], axis=1)
+    zeros = np.zeros(len(values))
+    volume_bars = np.stack([np.column_stack([left, zeros]), np.column_stack([left, volumes]),
+                            np.column_stack([right, volumes]), np.column_stack([right, zeros])], axis=1)
+    colors = np.where(closes >= opens, 'green', 'red')
+    return bodies, wicks, volume_bars, colors
+
+
+class LiveCandleChart:
+    def __init__(self, fig, ax1, ax2, source, buffer=None, title="BTC/USD Realtime Candlestick Chart (5-minute)"):
+        self.fig, self.ax1, self.ax2 = fig, ax1, ax2
+        self.source = source
+        self.buffer = buffer if buffer is not None else CandleBuffer()
+        self.title = title
+        self.background = None
+        self.full_redraws = 0
+        self.blits = 0
+
+        # Closed candles: one collection each, only redrawn on a full draw
+        self.bodies = PolyCollection([], linewidths=0.5)
+        self.wicks = LineCollection([], linewidths=1)
+        self.volumes = PolyCollection([])
+        ax1.add_collection(self.wicks)
+        ax1.add_collection(self.bodies)
+        ax2.add_collection(self.volumes)
+
+        # Forming candle and live price: animated, blitted on every refresh
+        self.live_body = PolyCollection([], linewidths=0.5, animated=True)
+        self.live_wick = LineCollection([], linewidths=1, animated=True)
+        self.live_volume = PolyCollection([], animated=True)
+        self.price_line = ax1.axhline(np.nan, linestyle='--', animated=True)
+        self.price_text = ax1.text(0.01, 0.97, "", transform=ax1.transAxes, va='top', animated=True)
+        ax1.add_collection(self.live_wick)
+        ax1.add_collection(self.live_body)
+        ax2.add_collection(self.live_volume)
+        self.animated = [self.live_wick, self.live_body, self.live_volume, self.price_line, self.price_text]
+
+        ax1.set_title(title)
+        ax1.xaxis.set_major_formatter(plt.FuncFormatter(self.format_time))
+        fig.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def format_time(self, x, pos=None):
+        position = int(round(x)) - (self.buffer.appended - len(self.buffer))
+        if 0 <= position < len(self.buffer):
+            return self.buffer.index[position].strftime('%H:%M')
+        return ""
+
+    def positions(self):
+        # Candle x positions keep counting up, so old candles never move when the buffer trims
+        first = self.buffer.appended - len(self.buffer)
+        return np.arange(first, self.buffer.appended, dtype=float)
+
+    def on_draw(self, event=None):
+        # After any full draw: save the static background, then put the animated artists on top
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        for artist in self.animated:
+            artist.axes.draw_artist(artist)
+
+    def set_closed_candles(self):
+        bodies, wicks, volume_bars, colors = candle_geometry(self.buffer.values[:-1], self.positions()[:-1])
+        self.bodies.set_verts(bodies)
+        self.bodies.set_facecolors(colors)
+        self.bodies.set_edgecolors(colors)
+        self.wicks.set_segments(wicks)
+        self.wicks.set_colors(colors)
+        self.volumes.set_verts(volume_bars)
+        self.volumes.set_facecolors(colors)
+
+    def set_live_candle(self):
+        bodies, wicks, volume_bars, colors = candle_geometry(self.buffer.values[-1:], self.positions()[-1:])
+        self.live_body.set_verts(bodies)
+        self.live_body.set_facecolors(colors)
+        self.live_body.set_edgecolors(colors)
+        self.live_wick.set_segments(wicks)
+        self.live_wick.set_colors(colors)
+        self.live_volume.set_verts(volume_bars)
+        self.live_volume.set_facecolors(colors)
+
+        # Latest live price, candle ke color ke saath
+        live_price = self.buffer.values[-1, 3]
+        self.price_line.set_ydata([live_price, live_price])
+        self.price_line.set_color(colors[0])
+        self.price_text.set_text(f"Live Price: ${live_price:.2f}")
+        self.price_text.set_color(colors[0])
+
+    def fits_view(self):
+        # The forming candle can be blitted only while it stays inside the current limits
+        _, high, low, _, volume = self.buffer.values[-1]
+        y_low, y_high = self.ax1.get_ylim()
+        return low >= y_low and high <= y_high and volume <= self.ax2.get_ylim()[1]
+
+    def rescale(self):
+        positions = self.positions()
+        values = self.buffer.values
+        pad = (values[:, 1].max() - values[:, 2].min()) * 0.05 or 1.0
+        self.ax1.set_xlim(positions[0] - 1, positions[-1] + 3)  # Thodi jagah agle candles ke liye
+        self.ax1.set_ylim(values[:, 2].min() - pad, values[:, 1].max() + pad)
+        self.ax2.set_ylim(0, values[:, 4].max() * 1.1 or 1.0)
+
+    def refresh(self, event=None):
+        try:
+            bars = self.source(self.buffer.last_time())  # Sirf naye bars (aur forming candle)
+        except Exception as e:
+            print(f"Error fetching data: {e}")
+            return
+
+        last_changed, appended = self.buffer.update(bars)
+        if not len(self.buffer):
+            print("No data available, skipping update.")
+            return
+        if not appended and not last_changed and self.background is not None:
+            return
+
+        self.set_live_candle()
+        if appended or self.background is None or not self.fits_view():
+            self.set_closed_candles()
+            self.rescale()
+            self.full_redraws += 1
+            self.fig.canvas.draw_idle()  # on_draw saves the new background
+        else:
+            self.blits += 1
+            self.fig.canvas.restore_region(self.background)
+            self.draw_animated()
+            self.fig.canvas.blit(self.fig.bbox)
+            self.fig.canvas.flush_events()
+
+    def start_timer(self, interval_ms=REFRESH_MS):
+        # Timer-driven auto refresh on the GUI event loop; keep a reference to the timer
+        self.timer = self.fig.canvas.new_timer(interval=interval_ms)
+        self.timer.add_callback(self.refresh)
+        self.timer.start()
+        return self.timer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live candlestick chart with incremental updates.")
+    parser.add_argument('--ticker', default=ticker)
+    parser.add_argument('--interval', default=INTERVAL)
+    parser.add_argument('--replay', help="CSV to replay instead of downloading live bars")
+    parser.add_argument('--refresh-ms', type=int, default=REFRESH_MS, help="0 turns auto refresh off")
+    args = parser.parse_args(argv)
 
-        # Chart me live price ko show karna (horizontal line)
-        ax1.axhline(live_price, color=line_color, linestyle='--', label=f'Live Price: ${live_price:.2f}')
-        ax1.legend()
+    if args.replay:
+        source = ReplaySource(dataloader.load_ohlcv(args.replay))
+        title = f"Replay: {args.replay}"
+    else:
+        source = yfinance_source(args.ticker, args.interval)
+        title = f"{args.ticker} Realtime Candlestick Chart ({args.interval})"
 
-        # Chart title update karna
-        ax1.set_title(f"BTC/USD Realtime Candlestick Chart (5-minute)\nLive Price: ${live_price:.2f}")
+    # Create figure and axes for plotting
+    fig, (ax1, ax2) = plt.subplots(2, 1, gridspec_kw={'height_ratios': [3, 1]}, sharex=True)
+    chart = LiveCandleChart(fig, ax1, ax2, source, title=title)
 
-        # Redraw the figure with the updated chart
-        fig.canvas.draw()
+    # Create a new axes for the button
+    button_ax = plt.axes([0.81, 0.01, 0.1, 0.05])  # Position: [left, bottom, width, height]
+    refresh_button = Button(button_ax, 'Refresh', color='lightblue', hovercolor='lightgreen')
+    refresh_button.on_clicked(chart.refresh)
 
-    except Exception as e:
-        print(f"Error fetching or plotting data: {e}")
+    # Initial chart render
+    chart.refresh()
+    if args.refresh_ms:
+        chart.start_timer(args.refresh_ms)
 
-# Assign the button to the update_chart function
-refresh_button.on_clicked(update_chart)
+    # Show the chart with refresh button
+    plt.show()
 
-# Initial chart render
-update_chart()
 
-# Show the chart with refresh button
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
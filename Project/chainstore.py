@@ -0,0 +1,321 @@
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Time-series store for option-chain snapshots, one folder per symbol.
+#
+# Every leg (side, expiry, strike) gets an integer id in legs.npy. Snapshots are stored as
+# typed row arrays (snapshot, leg, lastPrice, openInterest, ...) appended in segments, and
+# consecutive snapshots are delta-encoded: a snapshot only stores the legs that changed, or a
+# tombstone for a leg that disappeared. Every `keyframe_every` snapshots the full chain is
+# written again, so:
+#   - chain_at(T) reads only the rows from the last keyframe before T up to T,
+#   - strike_history(...) uses a per-leg index (rows sorted by leg) and reads only that
+#     leg's change points, plus the state just before the range.
+#
+#   store = ChainStore('chain_store/NIFTY')
+#   store.append(pd.Timestamp.now(tz='Asia/Kolkata'), optionchainpoller.chain_rows(data))
+#   store.chain_at('2026-10-16 11:00')
+#   store.strike_history(24500, side='CE', field='openInterest', start='2026-10-16')
+
+FIELDS = ['lastPrice', 'openInterest', 'changeinOpenInterest', 'totalTradedVolume']
+ROW_DTYPE = np.dtype([('snapshot', 'i4'), ('leg', 'i4'), ('lastPrice', 'f8'), ('openInterest', 'i8'),
+                      ('changeinOpenInterest', 'i8'), ('totalTradedVolume', 'i8'), ('deleted', 'i1')])
+SNAPSHOT_DTYPE = np.dtype([('time', 'i8'), ('first_row', 'i8'), ('keyframe', '?')])
+LEG_DTYPE = np.dtype([('side', 'S2'), ('expiry', 'M8[D]'), ('strike', 'f8')])
+FORMAT_VERSION = 1
+
+
+def to_utc_ns(timestamp):
+    # Snapshot times are stored as UTC ns; naive times are read as IST like the NSE feed
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('Asia/Kolkata')
+    return timestamp.tz_convert('UTC').as_unit('ns').value
+
+
+def parse_expiry(values):
+    # NSE writes expiries as "30-Oct-2026"; already parsed dates pass through
+    return pd.to_datetime(pd.Series(values), format='mixed', dayfirst=True).to_numpy().astype('M8[D]')
+
+
+class ChainStore:
+    def __init__(self, directory, keyframe_every=100, tz='Asia/Kolkata'):
+        self.directory = directory
+        self.tz = tz
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {'version': FORMAT_VERSION, 'keyframe_every': keyframe_every, 'next_segment': 0}
+
+        self.legs = self.load_array('legs.npy', LEG_DTYPE)
+        self.leg_ids = {(leg['side'].decode(), leg['expiry'], leg['strike']): i for i, leg in enumerate(self.legs)}
+        self.row_buffer = self.load_segments('rows-*.npy', ROW_DTYPE)
+        self.snapshot_buffer = self.load_segments('snapshots-*.npy', SNAPSHOT_DTYPE)
+        self.row_count, self.snapshot_count = len(self.row_buffer), len(self.snapshot_buffer)
+        self.saved_rows, self.saved_snapshots = len(self.rows), len(self.snapshots)
+        self.leg_index = None  # (rows sorted by leg, their leg ids), built on the first history query
+
+        # Current value of every leg, used to find the changes of the next snapshot
+        self.state = np.zeros(len(self.legs), dtype=ROW_DTYPE)
+        self.present = np.zeros(len(self.legs), dtype=bool)
+        if len(self.snapshots):
+            latest = self.latest_rows(len(self.snapshots) - 1)
+            self.state[latest['leg']] = latest
+            self.present[latest['leg']] = latest['deleted'] == 0
+
+    def load_array(self, name, dtype):
+        path = os.path.join(self.directory, name)
+        return np.load(path) if os.path.exists(path) else np.empty(0, dtype=dtype)
+
+    def load_segments(self, pattern, dtype):
+        paths = sorted(glob.glob(os.path.join(self.directory, pattern)))
+        return np.concatenate([np.load(path) for path in paths]) if paths else np.empty(0, dtype=dtype)
+
+    @property
+    def rows(self):
+        return self.row_buffer[:self.row_count]
+
+    @property
+    def snapshots(self):
+        return self.snapshot_buffer[:self.snapshot_count]
+
+    def __len__(self):
+        return self.snapshot_count
+
+    @staticmethod
+    def grow(buffer, used, extra):
+        # Capacity doubling, so appending a day of snapshots stays linear
+        if used + extra <= len(buffer):
+            return buffer
+        bigger = np.empty(max(2 * len(buffer), used + extra, 1024), dtype=buffer.dtype)
+        bigger[:used] = buffer[:used]
+        return bigger
+
+    def leg_id_array(self, sides, expiries, strikes):
+        # Map (side, expiry, strike) to leg ids, adding unseen legs at the end
+        ids = np.empty(len(sides), dtype=np.int32)
+        new_legs = []
+        for i, key in enumerate(zip(sides, expiries, strikes)):
+            leg = self.leg_ids.get(key)
+            if leg is None:
+                leg = self.leg_ids[key] = len(self.legs) + len(new_legs)
+                new_legs.append(key)
+            ids[i] = leg
+        if new_legs:
+            added = np.array(new_legs, dtype=LEG_DTYPE)
+            self.legs = np.concatenate([self.legs, added])
+            self.state = np.concatenate([self.state, np.zeros(len(added), dtype=ROW_DTYPE)])
+            self.present = np.concatenate([self.present, np.zeros(len(added), dtype=bool)])
+        return ids
+
+    def append(self, timestamp, rows, partial=False):
+        # rows: DataFrame with side, expiryDate, strikePrice and the FIELDS columns.
+        # partial=True means rows are only updates, so legs missing from them are kept;
+        # otherwise a missing leg is recorded as deleted.
+        time_ns = to_utc_ns(timestamp)
+        if len(self.snapshots) and time_ns <= self.snapshots['time'][-1]:
+            raise ValueError("snapshots must be appended in time order")
+
+        rows = rows.drop_duplicates(['side', 'expiryDate', 'strikePrice'], keep='last')
+        legs = self.leg_id_array(rows['side'].to_numpy(dtype=str), parse_expiry(rows['expiryDate']),
+                                 rows['strikePrice'].to_numpy(dtype=float))
+        new = np.zeros(len(rows), dtype=ROW_DTYPE)
+        new['leg'] = legs
+        new['lastPrice'] = rows['lastPrice'].to_numpy(dtype=float)
+        for field in FIELDS[1:]:
+            new[field] = pd.to_numeric(rows[field], errors='coerce').fillna(0).to_numpy().astype(np.int64)
+
+        snapshot = len(self.snapshots)
+        keyframe = snapshot % self.meta['keyframe_every'] == 0
+        old = self.state[legs]
+        same_price = (old['lastPrice'] == new['lastPrice']) | (np.isnan(old['lastPrice']) & np.isnan(new['lastPrice']))
+        changed = ~self.present[legs] | ~same_price
+        for field in FIELDS[1:]:
+            changed |= old[field] != new[field]
+
+        self.state[legs] = new
+        if partial:
+            self.present[legs] = True
+            gone = np.empty(0, dtype=np.int32)
+        else:
+            seen = np.zeros(len(self.legs), dtype=bool)
+            seen[legs] = True
+            gone = np.flatnonzero(self.present & ~seen).astype(np.int32)
+            self.present = seen
+
+        if keyframe:
+            written = self.state[np.flatnonzero(self.present)]
+        else:
+            tombstones = np.zeros(len(gone), dtype=ROW_DTYPE)
+            tombstones['leg'] = gone
+            tombstones['deleted'] = 1
+            written = np.concatenate([new[changed], tombstones])
+        written = np.sort(written, order='leg', kind='stable')
+        written['snapshot'] = snapshot
+
+        self.snapshot_buffer = self.grow(self.snapshot_buffer, self.snapshot_count, 1)
+        self.snapshot_buffer[self.snapshot_count] = (time_ns, self.row_count, keyframe)
+        self.snapshot_count += 1
+        self.row_buffer = self.grow(self.row_buffer, self.row_count, len(written))
+        self.row_buffer[self.row_count:self.row_count + len(written)] = written
+        self.row_count += len(written)
+        self.leg_index = None
+        return len(written)
+
+    def flush(self):
+        # Write the rows and snapshots added since the last flush as one new segment
+        if len(self.snapshots) == self.saved_snapshots:
+            return
+        number = self.meta['next_segment']
+        self.meta['next_segment'] = number + 1
+        np.save(os.path.join(self.directory, f'rows-{number:06d}.npy'), self.rows[self.saved_rows:])
+        np.save(os.path.join(self.directory, f'snapshots-{number:06d}.npy'), self.snapshots[self.saved_snapshots:])
+        np.save(os.path.join(self.directory, 'legs.tmp.npy'), self.legs)
+        os.replace(os.path.join(self.directory, 'legs.tmp.npy'), os.path.join(self.directory, 'legs.npy'))
+        with open(os.path.join(self.directory, 'meta.json.tmp'), 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(os.path.join(self.directory, 'meta.json.tmp'), os.path.join(self.directory, 'meta.json'))
+        self.saved_rows, self.saved_snapshots = len(self.rows), len(self.snapshots)
+
+    def times(self):
+        return pd.DatetimeIndex(self.snapshots['time'].view('M8[ns]')).tz_localize('UTC').tz_convert(self.tz)
+
+    def snapshot_before(self, timestamp, side='right'):
+        # Index of the last snapshot at or before timestamp (-1 if none)
+        return int(np.searchsorted(self.snapshots['time'], to_utc_ns(timestamp), side=side)) - 1
+
+    def latest_rows(self, snapshot):
+        # Newest row of every leg as of `snapshot`: scan back to the last keyframe only
+        keyframes = np.flatnonzero(self.snapshots['keyframe'][:snapshot + 1])
+        start = self.snapshots['first_row'][keyframes[-1]]
+        stop = self.snapshots['first_row'][snapshot + 1] if snapshot + 1 < len(self.snapshots) else len(self.rows)
+        block = self.rows[start:stop][::-1]
+        _, first = np.unique(block['leg'], return_index=True)
+        latest = block[first]
+        return latest
+
+    def frame(self, rows, times=None):
+        legs = self.legs[rows['leg']]
+        data = {'side': legs['side'].astype(str), 'expiryDate': legs['expiry'], 'strikePrice': legs['strike']}
+        data.update({field: rows[field] for field in FIELDS})
+        frame = pd.DataFrame(data)
+        if times is not None:
+            frame.insert(0, 'time', times)
+        return frame
+
+    def chain_at(self, timestamp, side=None, expiry=None):
+        # Full chain as it was at `timestamp`
+        snapshot = self.snapshot_before(timestamp)
+        if snapshot < 0:
+            return self.frame(np.empty(0, dtype=ROW_DTYPE))
+        latest = self.latest_rows(snapshot)
+        latest = latest[latest['deleted'] == 0]
+        chain = self.frame(latest)
+        if side is not None:
+            chain = chain[chain['side'] == side]
+        if expiry is not None:
+            chain = chain[chain['expiryDate'] == parse_expiry([expiry])[0]]
+        return chain.sort_values(['side', 'expiryDate', 'strikePrice'], kind='stable').reset_index(drop=True)
+
+    def strike_history(self, strike, side='CE', expiry=None, start=None, end=None, field=None):
+        # Change points of one strike over [start, end): the value in force at start, then
+        # every snapshot that changed it. Without expiry the nearest expiry is used.
+        matches = np.flatnonzero((self.legs['strike'] == strike) & (self.legs['side'] == side.encode()))
+        if expiry is not None:
+            matches = matches[self.legs['expiry'][matches] == parse_expiry([expiry])[0]]
+        elif len(matches):
+            matches = matches[self.legs['expiry'][matches] == self.legs['expiry'][matches].min()]
+        if not len(matches):
+            raise KeyError(f"no {side} leg for strike {strike}")
+        leg = matches[0]
+
+        if self.leg_index is None:
+            order = np.argsort(self.rows['leg'], kind='stable')  # Rows of a leg stay in time order
+            self.leg_index = (order, self.rows['leg'][order])
+        order, sorted_legs = self.leg_index
+        postings = order[np.searchsorted(sorted_legs, leg, 'left'):np.searchsorted(sorted_legs, leg, 'right')]
+        snapshots = self.rows['snapshot'][postings]
+
+        first = 0 if start is None else self.snapshot_before(start, side='left') + 1
+        last = len(self.snapshots) if end is None else self.snapshot_before(end, side='left') + 1
+        lo = max(0, int(np.searchsorted(snapshots, first, 'right')) - 1)  # State in force at start
+        hi = int(np.searchsorted(snapshots, last, 'left'))
+        rows = self.rows[postings[lo:hi]]
+
+        times = self.snapshots['time'][rows['snapshot']]
+        times = np.maximum(times, self.snapshots['time'][first]) if first < len(self.snapshots) else times
+        history = self.frame(rows, pd.DatetimeIndex(times.view('M8[ns]')).tz_localize('UTC').tz_convert(self.tz))
+        history[FIELDS] = history[FIELDS].where(pd.Series(rows['deleted'] == 0), axis=0)  # NaN while the strike was gone
+        # Keyframes repeat unchanged values; keep the first row and then real changes only
+        values = history[FIELDS]
+        repeated = ((values == values.shift()) | (values.isna() & values.shift().isna())).all(axis=1)
+        repeated.iloc[:1] = False
+        history = history[~repeated.to_numpy()].set_index('time')
+        return history[field] if field is not None else history
+
+    def replay(self, start=None, end=None, fields=('lastPrice',), every=1):
+        # Every snapshot in [start, end) as dense (snapshots x legs) matrices, rebuilt by applying
+        # the deltas in order (one pass over the rows, no per-snapshot keyframe lookups).
+        # Returns (times, {field: matrix}, present mask); legs follow self.legs.
+        first = 0 if start is None else self.snapshot_before(start, side='left') + 1
+        last = len(self) if end is None else self.snapshot_before(end, side='left') + 1
+        picked = np.arange(first, max(first, last), every)
+        matrices = {field: np.zeros((len(picked), len(self.legs)), dtype=ROW_DTYPE[field]) for field in fields}
+        present = np.zeros((len(picked), len(self.legs)), dtype=bool)
+        if not len(picked):
+            return self.times()[picked], matrices, present
+
+        current = np.zeros(len(self.legs), dtype=ROW_DTYPE)
+        alive = np.zeros(len(self.legs), dtype=bool)
+        latest = self.latest_rows(first)
+        current[latest['leg']] = latest
+        alive[latest['leg']] = latest['deleted'] == 0
+        first_rows = np.append(self.snapshots['first_row'], len(self.rows))
+        keyframes = self.snapshots['keyframe']
+        out = 0
+        for snapshot in range(first, picked[-1] + 1):
+            if snapshot > first:
+                block = self.rows[first_rows[snapshot]:first_rows[snapshot + 1]]
+                if keyframes[snapshot]:
+                    alive[:] = False  # A keyframe lists every leg that is still there
+                current[block['leg']] = block
+                alive[block['leg']] = block['deleted'] == 0
+            if (snapshot - first) % every == 0:
+                for field in fields:
+                    matrices[field][out] = current[field]
+                present[out] = alive
+                out += 1
+        return self.times()[picked], matrices, present
+
+
+class ChainStoreSink:
+    # optionchainpoller sink: one ChainStore per symbol, flushed every `flush_every` snapshots.
+    # It stores the full snapshot, not the poller's changed rows: append() does its own delta
+    # encoding and records the legs that left the chain (expired expiries, dropped strikes).
+    def __init__(self, root='chain_store', keyframe_every=100, flush_every=20):
+        self.root = root
+        self.keyframe_every = keyframe_every
+        self.flush_every = flush_every
+        self.stores = {}
+
+    def store(self, symbol):
+        if symbol not in self.stores:
+            self.stores[symbol] = ChainStore(os.path.join(self.root, symbol), self.keyframe_every)
+        return self.stores[symbol]
+
+    def __call__(self, symbol, timestamp, changed, rows):
+        store = self.store(symbol)
+        store.append(timestamp, rows)
+        if len(store) - store.saved_snapshots >= self.flush_every:
+            store.flush()
+
+    def close(self):
+        for store in self.stores.values():
+            store.flush()
@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+import indicatorcache
+
+# Candlestick charts that stay fast on months of 1-minute bars. mplfinance draws every bar it
+# is given, so the bars are first merged into about as many OHLC buckets as the figure has room
+# for (first open, highest high, lowest low, last close, summed volume), and only those are
+# plotted. Bars that carry a trade marker always get a bucket of their own, so every marker
+# sits on its real candle at its real price. Moving averages are computed on the full data and
+# sampled at the last bar of every bucket, so they do not change with the zoom level.
+#
+#   plot_candles(data, title="NIFTY", mav=(14, 50), markers=[(buy_marker, {'marker': '^', 'color': 'g'})])
+#   plot_candles(data, start='2024-09-10', end='2024-09-12')    # one slice, full resolution if it fits
+#
+# In an interactive window the chart re-renders the visible range whenever you zoom with the
+# toolbar (press 'r' to go back to the whole range). mplfinance is only imported when a chart
+# is actually drawn.
+
+PIXELS_PER_CANDLE = 3  # A candle needs a body and a gap to stay readable
+
+
+def bucket_starts(n, max_candles, keep_rows=()):
+    # First bar of every bucket: evenly spaced edges plus a bucket of its own for every kept row.
+    # Each kept row costs up to two buckets, which come out of the budget for the even edges
+    # (a chart with more markers than pixels keeps them all and gets wider than the budget).
+    if n <= max_candles:
+        return np.arange(n)
+    keep_rows = np.asarray(keep_rows, dtype=np.int64)
+    edges = np.linspace(0, n, max(1, max_candles - 2 * len(keep_rows)), endpoint=False).astype(np.int64)
+    after = keep_rows + 1
+    return np.unique(np.concatenate([edges, keep_rows, after[after < n]]))
+
+
+def downsample(data, starts):
+    # OHLCV frame with one row per bucket, indexed by the time of the bucket's first bar
+    ends = np.append(starts[1:], len(data)) - 1
+    columns = {
+        'Open': data['Open'].to_numpy(dtype=np.float64)[starts],
+        'High': np.fmax.reduceat(data['High'].to_numpy(dtype=np.float64), starts),
+        'Low': np.fmin.reduceat(data['Low'].to_numpy(dtype=np.float64), starts),
+        'Close': data['Close'].to_numpy(dtype=np.float64)[ends],
+    }
+    if 'Volume' in data:
+        columns['Volume'] = np.add.reduceat(np.nan_to_num(data['Volume'].to_numpy(dtype=np.float64)), starts)
+    return pd.DataFrame(columns, index=data.index[starts])
+
+
+def bucket_values(values, starts):
+    # Per-bar marker array -> per-bucket array (markers sit on their own buckets, so nothing merges)
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(starts), np.nan)
+    rows = np.flatnonzero(~np.isnan(values))
+    out[np.searchsorted(starts, rows, side='right') - 1] = values[rows]
+    return out
+
+
+class CandleChart:
+    def __init__(self, data, title='', mav=(), markers=(), width_px=1600, volume=True, style='charles'):
+        # markers: [(array of len(data) with NaN where there is no marker, make_addplot kwargs)]
+        self.data = data
+        self.title = title
+        self.markers = [(np.asarray(values, dtype=np.float64), kwargs) for values, kwargs in markers
+                        if not np.isnan(np.asarray(values, dtype=np.float64)).all()]
+        self.keep_rows = np.unique(np.concatenate(
+            [np.flatnonzero(~np.isnan(values)) for values, _ in self.markers] or [np.zeros(0, dtype=np.int64)]))
+        close = data['Close'].to_numpy(dtype=np.float64)
+        self.averages = [(period, indicatorcache.simple_moving_average(close, period)) for period in mav]
+        self.max_candles = max(10, width_px // PIXELS_PER_CANDLE)
+        self.volume = volume and 'Volume' in data and bool(np.nansum(data['Volume'].to_numpy(dtype=np.float64)))
+        self.style = style
+        self.figure = None
+        self.axes = None
+        self.frame = None  # What is on screen right now
+        self.range = (0, len(data))
+        self.rendering = False
+        self.timer = None
+
+    def bound(self, timestamp):
+        # start/end in the index's timezone: naive times are read as local to the data
+        timestamp, tz = pd.Timestamp(timestamp), self.data.index.tz
+        if tz is None:
+            return timestamp.tz_localize(None) if timestamp.tzinfo is not None else timestamp
+        return timestamp.tz_localize(tz) if timestamp.tzinfo is None else timestamp.tz_convert(tz)
+
+    def rows_between(self, start=None, end=None):
+        index = self.data.index
+        lo = 0 if start is None else int(index.searchsorted(self.bound(start), side='left'))
+        hi = len(index) if end is None else int(index.searchsorted(self.bound(end), side='right'))
+        return lo, max(hi, lo + 1)
+
+    def prepare(self, lo, hi):
+        # (bucket frame, addplot specs) for bars [lo, hi)
+        keep = self.keep_rows[(self.keep_rows >= lo) & (self.keep_rows < hi)] - lo
+        starts = bucket_starts(hi - lo, self.max_candles, keep)
+        frame = downsample(self.data.iloc[lo:hi], starts)
+        ends = np.append(starts[1:], hi - lo) - 1
+        lines = [(period, values[lo:hi][ends]) for period, values in self.averages]
+        points = [(bucket_values(values[lo:hi], starts), kwargs) for values, kwargs in self.markers]
+        return frame, lines, points
+
+    def render(self, start=None, end=None, lo=None, hi=None):
+        import mplfinance as mpf  # Only imported when a chart is actually drawn
+
+        if lo is None:
+            lo, hi = self.rows_between(start, end)
+        frame, lines, points = self.prepare(lo, hi)
+        if self.figure is None:
+            self.figure = mpf.figure(style=self.style, figsize=(12, 8))
+            price = self.figure.add_axes([0.08, 0.3 if self.volume else 0.08, 0.88, 0.62 if self.volume else 0.84])
+            volume = self.figure.add_axes([0.08, 0.08, 0.88, 0.2], sharex=price) if self.volume else None
+            self.axes = (price, volume)
+            self.figure.canvas.mpl_connect('key_press_event', self.on_key)
+
+        price, volume = self.axes
+        self.rendering = True
+        try:
+            price.clear()
+            if volume is not None:
+                volume.clear()
+            addplot = [mpf.make_addplot(values, ax=price, width=1.0) for _, values in lines
+                       if not np.isnan(values).all()]
+            addplot += [mpf.make_addplot(values, ax=price, type='scatter', markersize=100, **kwargs)
+                        for values, kwargs in points if not np.isnan(values).all()]
+            mpf.plot(frame, type='candle', ax=price, volume=volume if volume is not None else False,
+                     addplot=addplot, warn_too_much_data=len(frame) + 1)
+            shown = f"{len(frame):,} of {hi - lo:,} bars" if len(frame) < hi - lo else f"{hi - lo:,} bars"
+            price.set_title(f"{self.title} ({shown})" if self.title else shown)
+            if volume is not None:
+                price.tick_params(labelbottom=False)  # The dates are under the volume panel
+            price.callbacks.connect('xlim_changed', self.on_xlim)  # clear() drops the axes callbacks
+        finally:
+            self.rendering = False
+        self.frame = frame
+        self.range = (lo, hi)
+        self.figure.canvas.draw_idle()
+        return self.figure
+
+    def on_xlim(self, ax):
+        # Toolbar zoom/pan: re-render the visible candles from the full data, once the zoom settles
+        if self.rendering or self.frame is None or not len(self.frame):
+            return
+        left, right = ax.get_xlim()
+        first = int(np.clip(np.ceil(left), 0, len(self.frame) - 1))
+        last = int(np.clip(np.floor(right), first, len(self.frame) - 1))
+        lo = self.range[0] + int(self.data.index[self.range[0]:self.range[1]].searchsorted(self.frame.index[first]))
+        hi = (self.range[0] + int(self.data.index[self.range[0]:self.range[1]].searchsorted(self.frame.index[last + 1]))
+              if last + 1 < len(self.frame) else self.range[1])
+        if (lo, hi) != self.range:
+            self.schedule(lo, hi)
+
+    def on_key(self, event):
+        if event.key == 'r':
+            self.schedule(0, len(self.data))
+
+    def schedule(self, lo, hi):
+        # Re-render from the event loop, not from inside matplotlib's own callback
+        if self.timer is not None:
+            self.timer.stop()
+        self.timer = self.figure.canvas.new_timer(interval=50)
+        self.timer.single_shot = True
+        self.timer.add_callback(self.render, lo=lo, hi=hi)
+        self.timer.start()
+
+
+def plot_candles(data, title='', mav=(), markers=(), start=None, end=None, width_px=1600, volume=True,
+                 show=True):
+    # One call for the scripts: downsampled (or sliced) candles, moving averages and markers
+    chart = CandleChart(data, title=title, mav=mav, markers=markers, width_px=width_px, volume=volume)
+    chart.render(start, end)
+    if show:
+        import matplotlib.pyplot as plt
+        plt.show()
+    return chart
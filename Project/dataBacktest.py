@@ -1,40 +1,54 @@
-import yfinance as yf
-import mplfinance as mpf
 import os
-from datetime import datetime
+import pandas as pd
+
+from ohlcvstore import OHLCVStore, period_start
 
 # NIFTY50 ka ticker symbol
 #ticker = "^NSEI"
 #FOR BANK NIFTY
 ticker = "^NSEBANK"
 
-# User se input lena period aur interval ke liye
-period = input("Enter period (e.g., 1d, 5d, 1mo, 3mo, 6mo, 1y): ")
-interval = input("Enter interval (e.g., 1m, 5m, 15m, 30m, 1h, 1d): ")
-
-try:
-    # Data fetch karna
-    data = yf.download(ticker, period=period, interval=interval)
-
-    # Check agar data empty to error handle karna
-    if data.empty:
-        print("No data found, please check the period or interval.")
-    else:
-        # Add a timestamp to the file name to make it unique
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_name = f"niftyBank_data_{period}_{interval}_{timestamp}.csv"
-        file_path = os.path.join(os.getcwd(), file_name)  # Full file path
-        
-        # Data ko CSV file me save karna
-        data.to_csv(file_path)
-        
-        # Success message with file path
-        print(f"Data successfully downloaded and saved as {file_name}")
-        print(f"File path: {file_path}")
-        
-        # Candlestick chart plot karna
-        mpf.plot(data, type='candle', style='charles', title=f"Candlestick Chart ({period}, {interval})", volume=True)
-
-except Exception as e:
-    # Error handling if download fails
-    print("Unsuccessful to download. Error: ", str(e))
\ No newline at end of file
+def download(ticker, period, interval, store_dir=None):
+    # Local store: sirf missing time ranges download hote hain, baaki data disk se aata hai
+    store = OHLCVStore(store_dir or os.path.join(os.getcwd(), "ohlcv_store"))
+    end = pd.Timestamp.now(tz="UTC")
+    return store.get(ticker, interval, period_start(period, end), end, now=end)
+
+def save_csv(data, period, interval, file_name=None):
+    # One CSV per period/interval, overwritten on every run instead of piling up timestamped copies
+    file_name = file_name or f"niftyBank_data_{period}_{interval}.csv"
+    file_path = os.path.join(os.getcwd(), file_name)  # Full file path
+
+    # Data ko CSV file me save karna
+    data.to_csv(file_path)
+    return file_path
+
+def plot_data(data, period, interval, start=None, end=None):
+    import chartrender
+
+    # Candlestick chart plot karna (lambe data ke candles figure ki width tak merge hote hain)
+    chartrender.plot_candles(data, title=f"Candlestick Chart ({period}, {interval})", start=start, end=end)
+
+if __name__ == "__main__":
+    # User se input lena period aur interval ke liye
+    period = input("Enter period (e.g., 1d, 5d, 1mo, 3mo, 6mo, 1y): ")
+    interval = input("Enter interval (e.g., 1m, 5m, 15m, 30m, 1h, 1d): ")
+
+    try:
+        data = download(ticker, period, interval)
+
+        # Check agar data empty to error handle karna
+        if data.empty:
+            print("No data found, please check the period or interval.")
+        else:
+            file_path = save_csv(data, period, interval)
+
+            # Success message with file path
+            print(f"Data successfully saved as {os.path.basename(file_path)} ({len(data)} bars)")
+            print(f"File path: {file_path}")
+
+            plot_data(data, period, interval)
+
+    except Exception as e:
+        # Error handling if download fails
+        print("Unsuccessful to download. Error: ", str(e))
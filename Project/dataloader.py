@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# CSV loader with a columnar binary sidecar.
+# The first read of "data.csv" parses it as before and also writes "data.csv.cols/":
+# one .npy file per column plus the timestamps as int64, and a meta.json that remembers
+# the CSV's size and mtime. Later reads load the .npy files directly and skip the slow
+# datetime parsing. If the CSV changes (size or mtime), the sidecar is rebuilt.
+
+SIDECAR_SUFFIX = '.cols'
+FORMAT_VERSION = 1
+
+
+def sidecar_path(file_path):
+    return file_path + SIDECAR_SUFFIX
+
+
+def write_columns(data, directory, extra_meta=None):
+    # Save a DataFrame with a DatetimeIndex as index.npy + one .npy per column
+    index = pd.DatetimeIndex(data.index)
+    meta = {
+        'version': FORMAT_VERSION,
+        'length': len(data),
+        'index_name': index.name,
+        'unit': index.unit,
+        'tz': str(index.tz) if index.tz is not None else None,  # asi8 of an aware index is UTC
+        'columns': [str(column) for column in data.columns],
+    }
+    meta.update(extra_meta or {})
+
+    # Write into a temp folder first so readers never see a half-written sidecar
+    tmp_dir = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, 'index.npy'), index.asi8)
+    for i, column in enumerate(data.columns):
+        np.save(os.path.join(tmp_dir, f'col{i}.npy'), data[column].to_numpy())
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+
+
+def read_meta(directory):
+    with open(os.path.join(directory, 'meta.json')) as f:
+        return json.load(f)
+
+
+def read_index(directory, meta, mmap=False):
+    stamps = np.load(os.path.join(directory, 'index.npy'), mmap_mode='r' if mmap else None)
+    index = pd.DatetimeIndex(np.asarray(stamps).view(f"datetime64[{meta['unit']}]"), name=meta['index_name'])
+    if meta['tz'] is not None:
+        index = index.tz_localize('UTC').tz_convert(meta['tz'])
+    return index
+
+
+def read_column(directory, position, mmap=False):
+    return np.load(os.path.join(directory, f'col{position}.npy'), mmap_mode='r' if mmap else None)
+
+
+def read_columns(directory, columns=None):
+    # Rebuild the DataFrame from a sidecar (optionally only some columns)
+    meta = read_meta(directory)
+    names = meta['columns']
+    wanted = names if columns is None else [name for name in names if name in columns]
+    data = {name: read_column(directory, names.index(name)) for name in wanted}
+    return pd.DataFrame(data, index=read_index(directory, meta))
+
+
+def source_stamp(file_path):
+    stat = os.stat(file_path)  # Raises FileNotFoundError like read_csv does
+    return {'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns}
+
+
+def sidecar_is_fresh(directory, stamp, index_col):
+    try:
+        meta = read_meta(directory)
+    except (OSError, ValueError):
+        return False
+    return (meta.get('version') == FORMAT_VERSION and meta.get('index_col') == index_col
+            and meta.get('source_size') == stamp['source_size']
+            and meta.get('source_mtime_ns') == stamp['source_mtime_ns'])
+
+
+def load_ohlcv(file_path, index_col=0):
+    # Same result as pd.read_csv(file_path, index_col=index_col, parse_dates=True)
+    stamp = source_stamp(file_path)
+    directory = sidecar_path(file_path)
+    if sidecar_is_fresh(directory, stamp, index_col):
+        try:
+            return read_columns(directory)
+        except (OSError, ValueError, KeyError):
+            pass  # Damaged sidecar: fall back to the CSV and rewrite it
+
+    data = pd.read_csv(file_path, index_col=index_col, parse_dates=True)
+
+    # Only plain numeric columns on a parsed DatetimeIndex go into the sidecar
+    storable = isinstance(data.index, pd.DatetimeIndex) and all(
+        pd.api.types.is_numeric_dtype(dtype) for dtype in data.dtypes)
+    if storable:
+        try:
+            write_columns(data, directory, dict(stamp, index_col=index_col))
+        except OSError as e:
+            print(f"Could not write column cache for {file_path}: {e}")
+    return data
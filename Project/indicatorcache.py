@@ -0,0 +1,134 @@
+import hashlib
+import math
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+# Shared SMA cache for the parameter sweeps.
+# One cumulative-sum array is built per close series; any SMA period is then a single
+# O(n) difference of that array. Results are memoized by (series fingerprint, period)
+# and the least recently used entries are dropped once the cache is full.
+
+
+def prefix_sums(close):
+    # Sum the distance from the first close so the running sum stays small and precise
+    close = np.asarray(close, dtype=np.float64)
+    base = close[0] if len(close) else 0.0
+    return base, np.concatenate(([0.0], np.cumsum(close - base)))
+
+
+def sma_from_prefix(base, csum, period):
+    n = len(csum) - 1
+    sma = np.full(n, np.nan)
+    if 1 <= period <= n:
+        sma[period - 1:] = base + (csum[period:] - csum[:-period]) / period
+    return sma
+
+
+def simple_moving_average(close, period):
+    # Uncached SMA, NaN until the window is full
+    base, csum = prefix_sums(close)
+    return sma_from_prefix(base, csum, period)
+
+
+def fingerprint(close):
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    return f"{len(close)}:{hashlib.blake2b(close.tobytes(), digest_size=16).hexdigest()}"
+
+
+class SMACache:
+    def __init__(self, maxsize=128, max_series=4):
+        self.maxsize = maxsize  # Number of (series, period) SMA arrays to keep
+        self.max_series = max_series  # Number of prefix-sum arrays to keep
+        self.prefixes = OrderedDict()
+        self.values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def sma(self, close, period, key=None):
+        # key is the series fingerprint; pass it in when asking for many periods of one series
+        key = key or fingerprint(close)
+        entry = self.values.get((key, period))
+        if entry is not None:
+            self.values.move_to_end((key, period))
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        base, csum = self.prefix(close, key)
+        entry = sma_from_prefix(base, csum, period)
+        entry.flags.writeable = False  # Shared between callers, so keep it read-only
+        self.values[(key, period)] = entry
+        while len(self.values) > self.maxsize:
+            self.values.popitem(last=False)
+        return entry
+
+    def prefix(self, close, key):
+        entry = self.prefixes.get(key)
+        if entry is None:
+            entry = prefix_sums(close)
+            self.prefixes[key] = entry
+            while len(self.prefixes) > self.max_series:
+                self.prefixes.popitem(last=False)
+        else:
+            self.prefixes.move_to_end(key)
+        return entry
+
+    def clear(self):
+        self.prefixes.clear()
+        self.values.clear()
+
+
+# Process-wide cache, shared by every strategy run in this process
+default_cache = SMACache()
+
+
+def build_cached_sma():
+    import backtrader as bt  # Imported on first use, the numpy engines never need it
+
+    class CachedSMA(bt.Indicator):
+        # Drop-in for bt.indicators.SimpleMovingAverage that reads from an SMACache
+        lines = ('sma',)
+        params = (('period', 30), ('cache', None),)
+
+        def __init__(self):
+            self.addminperiod(self.params.period)
+
+        def next(self):
+            # Live / non-preloaded data: the full series is unknown, so sum the window
+            self.lines.sma[0] = math.fsum(self.data.get(size=self.params.period)) / self.params.period
+
+        def once(self, start, end):
+            cache = self.params.cache or default_cache
+            close = np.frombuffer(self.data.array, dtype=np.float64)
+            values = cache.sma(close, self.params.period)
+            chunk = array('d')
+            chunk.frombytes(values[start:end].tobytes())
+            self.lines.sma.array[start:end] = chunk
+
+    return CachedSMA
+
+
+def cached_sma_class():
+    if 'CachedSMA' not in globals():
+        globals()['CachedSMA'] = build_cached_sma()
+    return globals()['CachedSMA']
+
+
+def __getattr__(name):
+    # indicatorcache.CachedSMA is created (and backtrader imported) the first time it is used
+    if name == 'CachedSMA':
+        return cached_sma_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def moving_averages(strategy, short_period, long_period, cache):
+    # Build the two SMA lines for a MovingAverageCrossStrategy, from the cache when given one
+    if cache is None:
+        import backtrader as bt
+        return (bt.indicators.SimpleMovingAverage(strategy.data.close, period=short_period),
+                bt.indicators.SimpleMovingAverage(strategy.data.close, period=long_period))
+    cached_sma = cached_sma_class()
+    return (cached_sma(strategy.data.close, period=short_period, cache=cache),
+            cached_sma(strategy.data.close, period=long_period, cache=cache))
@@ -0,0 +1,167 @@
+import math
+from collections import deque
+
+import numpy as np
+
+import indicatorcache
+
+# Streaming indicators for live bars, with batch functions that give identical arrays on
+# historical data. Each object keeps O(period) state at most and updates in O(1) per bar
+# (the rolling high/low are amortized O(1) through a monotonic deque).
+#
+#   fast = SMA(14)
+#   for close in stream:
+#       value = fast.update(close)          # NaN until the window is full
+#
+#   sma(closes, 14)                         # == [SMA(14).update(c) for c in closes], bit for bit
+#
+# SMA uses the same arithmetic as indicatorcache (running sum of close - first close, then a
+# difference of two running sums), so live signals match the numpy sweep and the cached
+# backtrader indicator exactly. EMA has no closed form that rounds the same way, so its batch
+# function runs the same recurrence over a float list.
+
+
+class SMA:
+    def __init__(self, period):
+        self.period = period
+        self.base = None
+        self.running = 0.0
+        self.sums = deque([0.0], maxlen=period + 1)  # Last period + 1 running sums
+        self.value = math.nan
+
+    def update(self, close):
+        if self.base is None:
+            self.base = close
+        self.running += close - self.base
+        self.sums.append(self.running)
+        if len(self.sums) > self.period:
+            self.value = self.base + (self.sums[-1] - self.sums[0]) / self.period
+        return self.value
+
+
+class EMA:
+    # Seeded with the SMA of the first `period` closes, like backtrader's EMA
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.count = 0
+        self.seed = 0.0
+        self.value = math.nan
+
+    def update(self, close):
+        self.count += 1
+        if self.count < self.period:
+            self.seed += close
+        elif self.count == self.period:
+            self.value = (self.seed + close) / self.period
+        else:
+            self.value = self.value + self.alpha * (close - self.value)
+        return self.value
+
+
+class RollingExtreme:
+    # Highest (or lowest) value of the last `period` bars through a monotonic deque of
+    # (bar number, value): every value enters and leaves the deque once
+    def __init__(self, period, highest=True):
+        self.period = period
+        self.highest = highest
+        self.window = deque()
+        self.count = 0
+        self.value = math.nan
+
+    def update(self, value):
+        window = self.window
+        if self.highest:
+            while window and window[-1][1] <= value:
+                window.pop()
+        else:
+            while window and window[-1][1] >= value:
+                window.pop()
+        window.append((self.count, value))
+        if window[0][0] <= self.count - self.period:
+            window.popleft()
+        self.count += 1
+        self.value = window[0][1] if self.count >= self.period else math.nan
+        return self.value
+
+
+class RollingHigh(RollingExtreme):
+    def __init__(self, period):
+        super().__init__(period, highest=True)
+
+
+class RollingLow(RollingExtreme):
+    def __init__(self, period):
+        super().__init__(period, highest=False)
+
+
+class VWAP:
+    # Session VWAP on the typical price (high + low + close) / 3, reset when the day changes.
+    # NaN while the session has no volume (index feeds such as ^NSEBANK report zero volume).
+    def __init__(self):
+        self.day = None
+        self.price_volume = 0.0
+        self.volume = 0.0
+        self.value = math.nan
+
+    def update(self, day, high, low, close, volume):
+        if day != self.day:
+            self.day = day
+            self.price_volume = 0.0
+            self.volume = 0.0
+        self.price_volume += (high + low + close) / 3.0 * volume
+        self.volume += volume
+        self.value = self.price_volume / self.volume if self.volume else math.nan
+        return self.value
+
+
+def sma(close, period):
+    return indicatorcache.simple_moving_average(close, period)
+
+
+def ema(close, period):
+    out = np.full(len(close), np.nan)
+    if len(close) < period:
+        return out
+    values = np.asarray(close, dtype=np.float64).tolist()
+    value = (sum(values[:period - 1], 0.0) + values[period - 1]) / period  # Same seed sum as EMA.update
+    alpha = 2.0 / (period + 1)
+    result = [value]
+    for close_value in values[period:]:
+        value = value + alpha * (close_value - value)
+        result.append(value)
+    out[period - 1:] = result
+    return out
+
+
+def rolling_extreme(values, period, highest=True):
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if 1 <= period <= len(values):
+        windows = np.lib.stride_tricks.sliding_window_view(values, period)
+        out[period - 1:] = windows.max(axis=1) if highest else windows.min(axis=1)
+    return out
+
+
+def rolling_high(high, period):
+    return rolling_extreme(high, period, highest=True)
+
+
+def rolling_low(low, period):
+    return rolling_extreme(low, period, highest=False)
+
+
+def vwap(days, high, low, close, volume):
+    # days: one label per bar (e.g. vectorbacktest.session_ids); bars must be in time order
+    days = np.asarray(days)
+    typical = (np.asarray(high, dtype=np.float64) + np.asarray(low, dtype=np.float64)
+               + np.asarray(close, dtype=np.float64)) / 3.0
+    volume = np.asarray(volume, dtype=np.float64)
+    out = np.full(len(days), np.nan)
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]]) if len(days) else np.empty(0, dtype=int)
+    for start, stop in zip(starts, np.r_[starts[1:], len(days)]):
+        price_volume = np.cumsum(typical[start:stop] * volume[start:stop])
+        cumulative = np.cumsum(volume[start:stop])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[start:stop] = np.where(cumulative != 0, price_volume / cumulative, np.nan)
+    return out
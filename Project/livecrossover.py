@@ -0,0 +1,171 @@
+import argparse
+import time
+
+import numpy as np
+
+import indicators
+
+# The MA-crossover rules of backtest2.py (long only) and backtest3.py (long/short) on a live
+# bar stream, one on_bar() call per completed bar, using the streaming SMAs of indicators.py.
+#
+# The bookkeeping follows the backtrader strategies bar for bar: an order placed on a bar
+# fills before the next one, so the position check of the next bar already sees it; P&L is
+# taken at the close of the signal bar; a trade still open at the end stays open. The result
+# attributes have the same names as the strategies, so backtest2.print_results(runner) works too.
+#
+#   runner = CrossoverRunner(14, 50)
+#   builder.subscribe(runner.on_bar_event)            # barbuilder.BarBuilder, e.g. 5m bars
+#
+#   python livecrossover.py data.csv --short 14 --long 50 --verify
+#   python livecrossover.py data.csv --long-short --verify
+#   python livecrossover.py ticks/ticks-20261016.bin --security 1333 --interval 5m
+
+
+class CrossoverRunner:
+    def __init__(self, short_period=14, long_period=50, long_short=False, lot_size=None, interval=None):
+        self.short_ma = indicators.SMA(short_period)
+        self.long_ma = indicators.SMA(long_period)
+        self.long_short = long_short
+        # backtest2 reports price points, backtest3 multiplies by the 15-unit BankNifty lot
+        self.lot_size = lot_size if lot_size is not None else (15 if long_short else 1)
+        self.interval = interval  # Only bars of this interval are used by on_bar_event
+
+        self.position = 0  # 1 long, -1 short, 0 flat
+        self.entry_price = None
+        self.entry_date = None
+        self.trade_count = 0
+        self.successful_trades = 0
+        self.failed_trades = 0
+        self.total_gain = 0
+        self.total_loss = 0
+        self.total_profit = 0
+        self.buy_signals = []
+        self.sell_signals = []
+        self.successful_trades_points = []
+        self.failed_trades_points = []
+        self.latencies_ns = []
+
+    def on_bar(self, bar_time, close):
+        # bar_time: timezone-naive datetime/Timestamp of the bar; returns 'buy', 'sell' or None
+        start = time.perf_counter_ns()
+        short_ma = self.short_ma.update(close)
+        long_ma = self.long_ma.update(close)
+        action = None
+        if not (short_ma == short_ma and long_ma == long_ma):  # Either SMA still warming up (NaN)
+            self.latencies_ns.append(time.perf_counter_ns() - start)
+            return action
+
+        current_date = bar_time.date()
+        if not self.position:
+            if short_ma > long_ma:
+                action = self.enter(1, bar_time, close, current_date)
+            elif self.long_short and short_ma < long_ma:
+                action = self.enter(-1, bar_time, close, current_date)
+        elif self.position > 0 and (short_ma < long_ma or current_date != self.entry_date):
+            action = self.exit(bar_time, close)
+        elif self.position < 0 and (short_ma > long_ma or current_date != self.entry_date):
+            action = self.exit(bar_time, close)
+        self.latencies_ns.append(time.perf_counter_ns() - start)
+        return action
+
+    def enter(self, side, bar_time, close, current_date):
+        self.position = side
+        self.entry_price = close
+        self.entry_date = current_date
+        self.trade_count += 1
+        (self.buy_signals if side > 0 else self.sell_signals).append(bar_time)
+        return 'buy' if side > 0 else 'sell'
+
+    def exit(self, bar_time, close):
+        side = self.position
+        profit = (close - self.entry_price) * side * self.lot_size
+        if profit > 0:
+            self.total_gain += profit
+            self.successful_trades += 1
+            self.successful_trades_points.append(bar_time)
+        else:
+            self.total_loss += abs(profit)
+            self.failed_trades += 1
+            self.failed_trades_points.append(bar_time)
+        self.total_profit = self.total_gain - self.total_loss
+        self.position = 0
+        return 'sell' if side > 0 else 'buy'
+
+    def on_bar_event(self, interval, bar):
+        # barbuilder subscriber
+        if self.interval is None or interval == self.interval:
+            self.on_bar(bar['Datetime'].tz_localize(None), bar['Close'])
+
+    def latency_stats(self):
+        # Microseconds per on_bar call
+        if not self.latencies_ns:
+            return {}
+        micros = np.asarray(self.latencies_ns) / 1000.0
+        return {'bars': len(micros), 'mean_us': micros.mean(), 'p50_us': np.percentile(micros, 50),
+                'p99_us': np.percentile(micros, 99), 'max_us': micros.max()}
+
+
+def print_results(runner):
+    # Same report as backtest2.print_results, without importing backtrader
+    print(f"Total trades taken: {runner.trade_count}")
+    print(f"Successful trades: {runner.successful_trades}")
+    print(f"Failed trades: {runner.failed_trades}")
+    print(f"Total Gain points: {runner.total_gain:.2f}")
+    print(f"Total Loss points: {runner.total_loss:.2f}")
+    print(f"Net Profit (Total Points): {runner.total_profit:.2f}")
+
+
+def replay_frame(runner, data):
+    # Feed a historical DataFrame bar by bar (timezone-naive index)
+    for bar_time, close in zip(data.index, data['Close'].to_numpy(dtype=float).tolist()):
+        runner.on_bar(bar_time, close)
+    return runner
+
+
+def verify_with_backtrader(runner, data, long_short):
+    # Same data through the backtrader strategy with backtrader's own SMA, and compare
+    script = __import__('backtest3' if long_short else 'backtest2')
+    strategy = script.run_strategy(data, short_period=runner.short_ma.period, long_period=runner.long_ma.period,
+                                   sma_cache=None)
+    expected = (strategy.trade_count, strategy.successful_trades, strategy.failed_trades, strategy.total_profit)
+    got = (runner.trade_count, runner.successful_trades, runner.failed_trades, runner.total_profit)
+    same = expected[:3] == got[:3] and np.isclose(expected[3], got[3])
+    print("Backtrader check:", "results match." if same else f"MISMATCH - backtrader {expected}, live {got}")
+    return same
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the MA-crossover rules on a bar stream.")
+    parser.add_argument('file', help="bar CSV (dataBacktest.py / barbuilder.py) or tickingest .bin file")
+    parser.add_argument('--short', type=int, default=14)
+    parser.add_argument('--long', type=int)
+    parser.add_argument('--long-short', action='store_true', help="backtest3.py rules instead of backtest2.py")
+    parser.add_argument('--security', type=int, help="tick files: security id")
+    parser.add_argument('--interval', default='5m', help="tick files: bar interval")
+    parser.add_argument('--verify', action='store_true', help="CSV input: compare with the backtrader run")
+    args = parser.parse_args(argv)
+    long_period = args.long or (26 if args.long_short else 50)  # The strategies' defaults
+
+    runner = CrossoverRunner(args.short, long_period, long_short=args.long_short, interval=args.interval)
+    if args.file.endswith('.bin'):
+        import barbuilder
+        import tickingest
+        barbuilder.build_from_records(tickingest.read_ticks(args.file), args.security, [args.interval],
+                                      [runner.on_bar_event])
+    else:
+        import dataloader
+        data = dataloader.load_ohlcv(args.file)
+        data.index = data.index.tz_localize(None)
+        replay_frame(runner, data)
+        if args.verify:
+            verify_with_backtrader(runner, data, args.long_short)
+
+    print_results(runner)
+    stats = runner.latency_stats()
+    if stats:
+        print(f"Per-bar latency: mean {stats['mean_us']:.2f} us, p50 {stats['p50_us']:.2f} us, "
+              f"p99 {stats['p99_us']:.2f} us over {stats['bars']} bars")
+
+
+if __name__ == "__main__":
+    main()
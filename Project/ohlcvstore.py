@@ -0,0 +1,213 @@
+import json
+import os
+import re
+import shutil
+
+import pandas as pd
+
+import dataloader
+import tradingcalendar
+
+# Local OHLCV store, one folder per (ticker, interval).
+# Every download is appended as a new chunk (same .npy column format as dataloader.py)
+# and manifest.json records which UTC time ranges the store already holds. A query only
+# downloads the gaps, then serves the merged bars (deduplicated on timestamp) locally.
+# A range only counts as held up to the end of the last complete bar a download returned, so
+# a failed (empty) download and a candle that is still forming are fetched again next time.
+#
+# The downloader is any callable downloader(ticker, start, end, interval) -> DataFrame,
+# with start/end as UTC Timestamps, so tests can plug in a local fake instead of yfinance.
+
+EXCHANGE_TZ = 'Asia/Kolkata'
+PERIODS = "'Nd', 'Nwk', 'Nmo', 'Ny', 'ytd' or 'max'"
+BAR_SECONDS = {'m': 60, 'h': 3600, 'd': 86400, 'wk': 7 * 86400, 'mo': 31 * 86400}  # A month as its longest
+
+
+def session_start(days, now):
+    # 9:15 open of the `days`-th most recent NSE session that has opened by `now`, in UTC
+    local = utc(now).tz_convert(EXCHANGE_TZ)
+    opened = tradingcalendar.trading_days(local - pd.Timedelta(days=2 * days + 14), local)
+    if len(opened) and local - local.normalize() < pd.Timedelta(seconds=tradingcalendar.SESSION_OPEN):
+        opened = opened[opened < local.date()]  # Today's session has not opened yet
+    day = pd.Timestamp(opened[-min(days, len(opened))])
+    return (day + pd.Timedelta(seconds=tradingcalendar.SESSION_OPEN)).tz_localize(EXCHANGE_TZ).tz_convert('UTC')
+
+
+def period_start(period, now, sessions=True):
+    # Translate a yfinance period ("5d", "1wk", "1mo", "1y", "ytd", "max") into a start time. Like
+    # yfinance, "Nd" means the last N trading sessions ("1d" on a Sunday is Friday's session);
+    # sessions=False counts wall-clock days instead, for markets that trade around the clock.
+    if period == 'max':
+        return pd.Timestamp(0, tz='UTC')
+    if period == 'ytd':
+        return now.normalize().replace(month=1, day=1)
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if match is None:
+        raise ValueError(f"Unknown period {period!r}, expected {PERIODS}")
+    number, unit = match.groups()
+    if unit == 'd':
+        return session_start(int(number), now) if sessions else now - pd.Timedelta(days=int(number))
+    if unit == 'wk':
+        return now - pd.Timedelta(weeks=int(number))
+    if unit == 'mo':
+        return now - pd.DateOffset(months=int(number))
+    return now - pd.DateOffset(years=int(number))
+
+
+def bar_length(interval):
+    # yfinance interval ("5m", "1h", "1d", "1wk", "1mo") as a Timedelta
+    match = re.fullmatch(r'(\d+)(m|h|d|wk|mo)', interval)
+    if match is None:
+        raise ValueError(f"Unknown interval {interval!r}, expected a number and m, h, d, wk or mo")
+    number, unit = match.groups()
+    return pd.Timedelta(seconds=int(number) * BAR_SECONDS[unit])
+
+
+def utc(timestamp):
+    timestamp = pd.Timestamp(timestamp)
+    return timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
+
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(ranges, start, end):
+    # Gaps of [start, end) not covered by the (merged, sorted) ranges, all in UTC ns
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in ranges:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def yfinance_downloader(ticker, start, end, interval):
+    import yfinance as yf  # Only needed when something is actually missing locally
+    data = yf.download(ticker, start=start, end=end, interval=interval, progress=False)
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)  # Newer yfinance adds a ticker level
+    return data
+
+
+class OHLCVStore:
+    def __init__(self, root='ohlcv_store', downloader=yfinance_downloader):
+        self.root = root
+        self.downloader = downloader
+        self.frames = {}  # (ticker, interval) -> merged DataFrame, rebuilt after every append
+
+    def folder(self, ticker, interval):
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', ticker)
+        return os.path.join(self.root, f"{safe}_{interval}")
+
+    def manifest(self, ticker, interval):
+        path = os.path.join(self.folder(ticker, interval), 'manifest.json')
+        if not os.path.exists(path):
+            return {'chunks': [], 'ranges': [], 'next_chunk': 0}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_manifest(self, ticker, interval, manifest):
+        folder = self.folder(ticker, interval)
+        tmp_path = os.path.join(folder, 'manifest.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(folder, 'manifest.json'))
+
+    def new_chunk_name(self, manifest):
+        number = manifest['next_chunk']
+        manifest['next_chunk'] = number + 1
+        return f"chunk{number:06d}"
+
+    def append(self, ticker, interval, data, covered_start, covered_end):
+        # Add one downloaded chunk and mark [covered_start, covered_end) as held
+        folder = self.folder(ticker, interval)
+        os.makedirs(folder, exist_ok=True)
+        manifest = self.manifest(ticker, interval)
+        if len(data):
+            name = self.new_chunk_name(manifest)
+            dataloader.write_columns(data, os.path.join(folder, name))
+            manifest['chunks'].append(name)
+        if covered_end > covered_start:
+            manifest['ranges'] = merge_ranges(manifest['ranges'] + [[covered_start, covered_end]])
+        self.save_manifest(ticker, interval, manifest)
+        self.frames.pop((ticker, interval), None)
+
+    def fetch_missing(self, ticker, interval, start, end, now=None):
+        start_ns, end_ns = utc(start).value, utc(end).value
+        now = pd.Timestamp.now(tz='UTC') if now is None else utc(now)
+        length = bar_length(interval).value
+        fetched = 0
+        for gap_start, gap_end in missing_ranges(self.manifest(ticker, interval)['ranges'], start_ns, end_ns):
+            data = self.downloader(ticker, pd.Timestamp(gap_start, tz='UTC'), pd.Timestamp(gap_end, tz='UTC'), interval)
+            if not len(data):
+                continue  # yfinance returns an empty frame on errors too, so nothing is marked held
+            fetched += len(data)
+
+            # Held up to the end of the last bar, or up to its start while it is still forming
+            last = utc(data.index[-1]).value
+            covered_end = min(gap_end, last + length if last + length <= now.value else last)
+            self.append(ticker, interval, data, gap_start, covered_end)
+        return fetched
+
+    def load(self, ticker, interval):
+        # All stored bars, merged across chunks; later chunks win on duplicate timestamps
+        key = (ticker, interval)
+        if key not in self.frames:
+            folder = self.folder(ticker, interval)
+            chunks = [dataloader.read_columns(os.path.join(folder, name))
+                      for name in self.manifest(ticker, interval)['chunks']]
+            if chunks:
+                data = pd.concat(chunks)
+                data = data[~data.index.duplicated(keep='last')].sort_index()
+            else:
+                data = pd.DataFrame()
+            self.frames[key] = data
+        return self.frames[key]
+
+    def query(self, ticker, interval, start, end):
+        # Local range query [start, end), no downloads
+        data = self.load(ticker, interval)
+        if data.empty:
+            return data
+        tz = data.index.tz
+        bounds = [utc(start), utc(end)]
+        if tz is None:
+            bounds = [bound.tz_localize(None) for bound in bounds]
+        else:
+            bounds = [bound.tz_convert(tz) for bound in bounds]
+        return data[(data.index >= bounds[0]) & (data.index < bounds[1])]
+
+    def get(self, ticker, interval, start, end, now=None):
+        # Download only what is missing, then answer from the local store
+        self.fetch_missing(ticker, interval, start, end, now)
+        return self.query(ticker, interval, start, end)
+
+    def compact(self, ticker, interval):
+        # Rewrite all chunks as one (optional housekeeping, the ranges stay the same)
+        data = self.load(ticker, interval)
+        folder = self.folder(ticker, interval)
+        manifest = self.manifest(ticker, interval)
+        old_chunks = manifest['chunks']
+        if len(old_chunks) < 2:
+            return
+        name = self.new_chunk_name(manifest)
+        dataloader.write_columns(data, os.path.join(folder, name))
+        manifest['chunks'] = [name]
+        self.save_manifest(ticker, interval, manifest)
+        for old in old_chunks:
+            shutil.rmtree(os.path.join(folder, old), ignore_errors=True)
+        self.frames.pop((ticker, interval), None)
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+import indicatorcache
+import resultcache
+import tradingcalendar
+import vectorbacktest
+
+# MA-crossover optimizer shared by backtest4bestcondition.py and backtestcli.py.
+# backtrader is only imported for the engines that need it, so the numpy sweep starts fast.
+
+SHORT_PERIODS = range(5, 20)  # Short MA from 5 to 19
+LONG_PERIODS = range(50, 101)  # Long MA from 50 to 100
+ENGINES = ('numpy', 'backtrader', 'parallel', 'halving', 'bayesian')
+SEARCH_ENGINES = ('halving', 'bayesian')  # paramsearch.py: only part of the grid is run
+
+
+def best_row(results):
+    # First pair with the highest profit (loop order), or None when nothing traded
+    if results.empty or not results['total_profit'].notna().any():
+        return None
+    best = results.loc[results['total_profit'].idxmax()]
+    return {
+        'short_period': int(best['short_period']),
+        'long_period': int(best['long_period']),
+        'total_profit': best['total_profit'],
+        'trade_count': int(best['trade_count']),
+        'successful_trades': int(best['successful_trades']),
+        'failed_trades': int(best['failed_trades']),
+    }
+
+
+def backtrader_sweep(data, pairs):
+    from backtest4bestcondition import run_backtest
+
+    rows = []
+    for short_ma, long_ma in pairs:
+        net_profit, trade_count, successful_trades, failed_trades = run_backtest(
+            data, short_ma, long_ma, sma_cache=indicatorcache.default_cache)  # SMAs shared across runs
+        rows.append((short_ma, long_ma, net_profit, trade_count, successful_trades, failed_trades))
+    return pd.DataFrame(rows, columns=vectorbacktest.RESULT_COLUMNS)
+
+
+def strategy_key(engine):
+    # Result cache key of an engine: the numpy engine and the backtrader strategy are cached apart.
+    # Both hash the SMA code (indicatorcache) and the session ids behind the end-of-day exit
+    # (tradingcalendar) along with the trading rules, so editing any of them misses the cache.
+    if engine == 'numpy':
+        return resultcache.strategy_fingerprint('numpy', vectorbacktest, indicatorcache, tradingcalendar)
+    from backtest4bestcondition import MovingAverageCrossStrategy, run_backtest
+    return resultcache.strategy_fingerprint('backtrader', MovingAverageCrossStrategy, run_backtest,
+                                            indicatorcache, tradingcalendar)
+
+
+def pair_params(short_period, long_period, engine, lot_size):
+    # The backtrader strategy always trades a 15-unit lot
+    return {'short_period': short_period, 'long_period': long_period, 'stop_loss': 0,
+            'lot_size': lot_size if engine == 'numpy' else 15}
+
+
+def run_pairs(data, engine, pairs, lot_size, progress, cache_spec=None):
+    if engine == 'backtrader':
+        return backtrader_sweep(data, pairs)
+    if engine == 'parallel':
+        import parallelsweep
+        on_result = parallelsweep.print_progress(len(pairs)) if progress else None
+        return parallelsweep.run_parallel_sweep(data, None, None, engine='backtrader', lot_size=lot_size,
+                                                on_result=on_result, pairs=pairs, cache_spec=cache_spec)
+    return vectorbacktest.ma_cross_pairs(data, pairs, lot_size=lot_size)
+
+
+def verify_with_backtrader(data, best):
+    # Re-run one pair through backtrader and compare with the numpy engine
+    # (the strategy trades a 15-unit lot, so other lot sizes are scaled to it)
+    from backtest4bestcondition import run_backtest
+
+    profit, trade_count, successful_trades, failed_trades = run_backtest(
+        data, best['short_period'], best['long_period'], sma_cache=indicatorcache.default_cache,
+        stop_loss=best.get('stop_loss', 0))
+    check = (profit * best.get('lot_size', 15) / 15, trade_count, successful_trades, failed_trades)
+    expected = (best['total_profit'], best['trade_count'], best['successful_trades'], best['failed_trades'])
+    if np.allclose(check, expected):
+        print("Backtrader check: numpy engine result matches.")
+    else:
+        print(f"Backtrader check: MISMATCH - backtrader {check}, numpy {expected}")
+    return np.allclose(check, expected)
+
+
+def optimize(data, engine='numpy', short_periods=SHORT_PERIODS, long_periods=LONG_PERIODS, lot_size=15,
+             verify=False, progress=False, stop_losses=(0,), lot_sizes=None, result_cache=None):
+    # Returns (results table, best pair dict or None). stop_losses and lot_sizes widen the
+    # search and need one of the SEARCH_ENGINES; their results only hold the pairs they ran.
+    # With a resultcache.ResultCache only the pairs it does not hold yet are run.
+    if engine in SEARCH_ENGINES:
+        import paramsearch
+        space = paramsearch.search_space(short_periods, long_periods, stop_losses, lot_sizes or (lot_size,))
+        results, best, cost = paramsearch.search(data, engine, space)
+        if progress:
+            print(f"{engine}: {len(results)} of {len(paramsearch.candidates(space))} combinations run to the end, "
+                  f"cost {cost:.0f} full-data runs")
+        if verify and best is not None:
+            verify_with_backtrader(data, best)
+        return results, best
+    if tuple(stop_losses) != (0,) or (lot_sizes and list(lot_sizes) != [lot_size]):
+        raise ValueError(f"Stop losses and lot size lists need one of the engines {SEARCH_ENGINES}")
+
+    pairs = [(short, long_) for short in short_periods for long_ in long_periods]
+    if result_cache is None:
+        results = run_pairs(data, engine, pairs, lot_size, progress)
+    else:
+        results = cached_sweep(data, engine, pairs, lot_size, progress, result_cache)
+
+    best = best_row(results)
+    if verify and engine == 'numpy' and best is not None:
+        verify_with_backtrader(data, best)
+    return results, best
+
+
+def cached_sweep(data, engine, pairs, lot_size, progress, result_cache):
+    # Look every pair up first and run only the missing ones. The parallel workers store their
+    # own results as they finish, the other engines store theirs here in one transaction.
+    data_key = resultcache.data_fingerprint(data)
+    key = strategy_key(engine)
+    params = [pair_params(short, long_, engine, lot_size) for short, long_ in pairs]
+    found = result_cache.get_many(data_key, key, params)
+    missing = [pair for pair, p in zip(pairs, params) if resultcache.params_key(p) not in found]
+    if progress:
+        print(f"Result cache: {len(pairs) - len(missing)} of {len(pairs)} combinations cached")
+
+    rows = []
+    if missing:
+        computed = run_pairs(data, engine, missing, lot_size, progress, cache_spec=(result_cache, data_key, key))
+        if engine != 'parallel':
+            result_cache.put_many(data_key, key, [(pair_params(row[0], row[1], engine, lot_size), row[2:])
+                                                  for row in computed.itertuples(index=False, name=None)])
+        rows = list(computed.itertuples(index=False, name=None))
+    for (short, long_), p in zip(pairs, params):
+        result = found.get(resultcache.params_key(p))
+        if result is not None:
+            rows.append((short, long_) + tuple(result))
+
+    results = pd.DataFrame(rows, columns=vectorbacktest.RESULT_COLUMNS)
+    if engine == 'parallel':
+        import parallelsweep
+        return parallelsweep.rank_results(results)
+    order = {pair: i for i, pair in enumerate(pairs)}  # Back to loop order for best_row's tie-break
+    results['order'] = [order[(short, long_)] for short, long_ in zip(results['short_period'], results['long_period'])]
+    return results.sort_values('order').drop(columns='order').reset_index(drop=True)
+
+
+def print_best(best):
+    if best is None:
+        print("No trades taken")
+        return
+    trade_count = best['trade_count']
+    print(f"Best Combination: Short MA = {best['short_period']}, Long MA = {best['long_period']}")
+    if best.get('stop_loss'):
+        print(f"Stop Loss: {best['stop_loss']:g} points")
+    if 'lot_size' in best:
+        print(f"Lot Size: {best['lot_size']}")
+    print(f"Net Profit: {best['total_profit']:.2f}")
+    print(f"Total Trades: {trade_count}")
+    print(f"Successful Trades: {best['successful_trades']}")
+    print(f"Failed Trades: {best['failed_trades']}")
+    print(f"Success Rate: {best['successful_trades'] / trade_count:.2f}" if trade_count > 0 else "No trades taken")
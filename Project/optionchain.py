@@ -1,8 +1,13 @@
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 
-# URL to fetch the Nifty options chain data
-url = "https://www.nseindia.com/api/option-chain-indices?symbol=NIFTY"
+# NSE option chain endpoint; base_url can point at a local stub server instead
+BASE_URL = "https://www.nseindia.com"
+CHAIN_PATH = "/api/option-chain-indices?symbol={symbol}"
+HOME_PATH = "/option-chain"  # NSE sets its cookies on this page before the API answers
+
+COLUMNS = ['strikePrice', 'lastPrice', 'openInterest', 'changeinOpenInterest', 'totalTradedVolume']
 
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.102 Safari/537.36",
@@ -15,45 +20,58 @@ headers = {
     "Sec-Fetch-User": "?1",
     "Sec-Fetch-Dest": "document",
     "Referer": "https://www.nseindia.com/get-quotes/derivatives?symbol=NIFTY",
-    "Host": "www.nseindia.com",
 }
 
-# Make a request to the NSE website
-session = requests.Session()
 
-try:
-    response = session.get(url, headers=headers)
-    
-    # Check if response was successful
-    if response.status_code == 200:
+def chain_url(symbol, base_url=BASE_URL):
+    return base_url.rstrip('/') + CHAIN_PATH.format(symbol=symbol)
+
+
+def make_session(pool_size=10):
+    # One keep-alive connection pool shared by every request
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def warm_up(session, base_url=BASE_URL, timeout=10):
+    # Visit the NSE page once for the cookies; a stub server does not need it
+    if base_url.rstrip('/') == BASE_URL:
+        session.get(BASE_URL + HOME_PATH, timeout=timeout)
+
+
+def fetch_chain(session, symbol, base_url=BASE_URL, timeout=10):
+    # Raw JSON of one chain; raises on HTTP errors and timeouts
+    response = session.get(chain_url(symbol, base_url), timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def split_chain(data, columns=COLUMNS):
+    # Extract the call (CE) and put (PE) legs into two DataFrames sorted by strike
+    records = data['records']['data']
+    calls_data = [record['CE'] for record in records if 'CE' in record]
+    puts_data = [record['PE'] for record in records if 'PE' in record]
+    calls_df = pd.DataFrame(calls_data, columns=None if calls_data else columns)
+    puts_df = pd.DataFrame(puts_data, columns=None if puts_data else columns)
+    calls_df = calls_df[columns].sort_values(by='strikePrice')
+    puts_df = puts_df[columns].sort_values(by='strikePrice')
+    return calls_df, puts_df
+
+
+def main():
+    # Make a request to the NSE website
+    session = make_session()
+
+    try:
+        warm_up(session)
+        data = fetch_chain(session, "NIFTY")
         print("Data fetched successfully!")
-        data = response.json()
-
-        # Extract the relevant data from the JSON response
-        records = data['records']['data']
-        
-        # Prepare empty lists to store call and put option data
-        calls_data = []
-        puts_data = []
-
-        # Loop through the records and append call and put data to respective lists
-        for record in records:
-            if 'CE' in record:  # Check if call option (CE) data exists
-                calls_data.append(record['CE'])
-            if 'PE' in record:  # Check if put option (PE) data exists
-                puts_data.append(record['PE'])
-
-        # Convert lists into Pandas DataFrames
-        calls_df = pd.DataFrame(calls_data)
-        puts_df = pd.DataFrame(puts_data)
-
-        # Select relevant columns to display
-        calls_df = calls_df[['strikePrice', 'lastPrice', 'openInterest', 'changeinOpenInterest', 'totalTradedVolume']]
-        puts_df = puts_df[['strikePrice', 'lastPrice', 'openInterest', 'changeinOpenInterest', 'totalTradedVolume']]
-
-        # Sort DataFrames by strike price for better readability
-        calls_df = calls_df.sort_values(by='strikePrice')
-        puts_df = puts_df.sort_values(by='strikePrice')
+
+        calls_df, puts_df = split_chain(data)
 
         # Display the first 10 rows of each DataFrame
         print("\nCall Options Data:")
@@ -65,8 +83,11 @@ try:
         # Optionally save data to CSV if needed
         calls_df.to_csv("nifty_calls_data.csv", index=False)
         puts_df.to_csv("nifty_puts_data.csv", index=False)
-    else:
-        print(f"Failed to fetch data. Status code: {response.status_code}")
+    except requests.HTTPError as e:
+        print(f"Failed to fetch data. Status code: {e.response.status_code}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+
 
-except Exception as e:
-    print(f"An error occurred: {e}")
+if __name__ == "__main__":
+    main()
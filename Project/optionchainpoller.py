@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import pandas as pd
+import requests
+
+import optionchain
+
+# Polls several option chains at once and keeps only what changed:
+#
+#   python optionchainpoller.py                                   # NIFTY/BANKNIFTY/FINNIFTY from NSE
+#   python optionchainpoller.py --base-url http://127.0.0.1:8000  # a local stub server
+#   python optionchainpoller.py --symbol NIFTY=3 --symbol BANKNIFTY=5 --duration 600
+#   python optionchainpoller.py --store chain_store                # snapshots into chainstore.py
+#
+# Every symbol has its own schedule (seconds between polls) and runs as one asyncio task.
+# The HTTP calls go through one pooled requests.Session (keep-alive, shared by all symbols)
+# in worker threads, so a slow chain never delays the others. A failed poll backs off
+# exponentially with jitter. The NSE cookies are fetched before the first poll and again
+# whenever the API answers 401/403 (they expire); a failed warm-up backs off the same way. After each snapshot the sink gets the rows (expiry, strike, side)
+# whose fields differ from the previous snapshot, plus the full snapshot for sinks that keep
+# their own deltas and need to see which legs disappeared (chainstore.ChainStoreSink).
+
+SCHEDULES = {'NIFTY': 3.0, 'BANKNIFTY': 3.0, 'FINNIFTY': 5.0}  # symbol -> seconds between polls
+COOKIE_ERRORS = (401, 403)  # NSE's answer once the session cookies have expired
+KEY_COLUMNS = ['side', 'expiryDate', 'strikePrice']
+FIELDS = ['lastPrice', 'openInterest', 'changeinOpenInterest', 'totalTradedVolume', 'impliedVolatility',
+          'bidprice', 'askPrice', 'underlyingValue']
+
+
+def chain_rows(data, fields=FIELDS):
+    # One row per (side, expiry, strike) leg with the tracked fields
+    rows = []
+    for record in data['records']['data']:
+        for side in ('CE', 'PE'):
+            if side in record:
+                leg = record[side]
+                rows.append([side, leg.get('expiryDate', record.get('expiryDate')), leg.get('strikePrice')]
+                            + [leg.get(field) for field in fields])
+    return pd.DataFrame(rows, columns=KEY_COLUMNS + list(fields))
+
+
+class ChainDiffer:
+    # Remembers the last snapshot per symbol and returns the rows that are new or changed
+    def __init__(self):
+        self.previous = {}
+
+    def changes(self, symbol, rows):
+        current = rows.drop_duplicates(KEY_COLUMNS, keep='last').set_index(KEY_COLUMNS)
+        previous = self.previous.get(symbol)
+        self.previous[symbol] = current
+        if previous is None:
+            return current.reset_index()
+
+        old = previous.reindex(current.index)
+        new_values, old_values = current.to_numpy(dtype=object), old.to_numpy(dtype=object)
+        differs = (new_values != old_values) & ~(pd.isna(new_values) & pd.isna(old_values))
+        changed = differs.any(axis=1)
+        return current[changed].reset_index()
+
+
+class CsvChangeSink:
+    # Appends changed rows to {directory}/{symbol}_changes.csv with the snapshot time
+    def __init__(self, directory='option_chain_changes'):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, symbol, timestamp, changed, rows):
+        if changed.empty:
+            return
+        path = os.path.join(self.directory, f"{symbol}_changes.csv")
+        changed = changed.copy()
+        changed.insert(0, 'timestamp', timestamp)
+        changed.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+
+class OptionChainPoller:
+    def __init__(self, schedules=None, base_url=optionchain.BASE_URL, sink=None, timeout=10.0,
+                 backoff_base=1.0, backoff_max=60.0, fields=FIELDS):
+        self.schedules = dict(schedules or SCHEDULES)
+        self.base_url = base_url
+        self.sink = sink if sink is not None else CsvChangeSink()
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.fields = fields
+        self.session = optionchain.make_session(pool_size=max(2, len(self.schedules)))
+        self.differ = ChainDiffer()
+        self.warm_up_lock = asyncio.Lock()
+        self.cookies_stale = True  # No cookies yet
+        self.warm_ups = 0
+        self.stats = {symbol: {'polls': 0, 'errors': 0, 'changed_rows': 0, 'last_latency': None}
+                      for symbol in self.schedules}
+
+    def backoff(self, failures):
+        # 1s, 2s, 4s, ... capped, with +-25% jitter so the symbols do not retry in lockstep
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (failures - 1))
+        return delay * random.uniform(0.75, 1.25)
+
+    async def refresh_cookies(self):
+        # One warm-up at a time; symbols that waited on the lock reuse the fresh cookies
+        async with self.warm_up_lock:
+            if self.cookies_stale:
+                await asyncio.wait_for(asyncio.to_thread(optionchain.warm_up, self.session, self.base_url,
+                                                         self.timeout), timeout=self.timeout + 1)
+                self.cookies_stale = False
+                self.warm_ups += 1
+
+    def poll_once(self, symbol):
+        # Blocking fetch + parse, run in a worker thread
+        start = time.perf_counter()
+        data = optionchain.fetch_chain(self.session, symbol, self.base_url, self.timeout)
+        return chain_rows(data, self.fields), time.perf_counter() - start
+
+    async def run_symbol(self, symbol, stop_at=None):
+        interval = self.schedules[symbol]
+        stats = self.stats[symbol]
+        failures = 0
+        loop = asyncio.get_running_loop()
+        next_poll = loop.time()
+        while stop_at is None or loop.time() < stop_at:
+            warm_ups = self.warm_ups
+            try:
+                if self.cookies_stale:
+                    await self.refresh_cookies()
+                    warm_ups = self.warm_ups
+                rows, latency = await asyncio.wait_for(asyncio.to_thread(self.poll_once, symbol),
+                                                       timeout=self.timeout + 1)
+            except Exception as e:
+                # Cookies expired: warm up again, unless another symbol already did since this poll
+                if (isinstance(e, requests.HTTPError) and e.response is not None
+                        and e.response.status_code in COOKIE_ERRORS and warm_ups == self.warm_ups):
+                    self.cookies_stale = True
+                failures += 1
+                stats['errors'] += 1
+                delay = self.backoff(failures)
+                print(f"{symbol}: poll failed ({e!r}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                next_poll = loop.time()
+                continue
+
+            failures = 0
+            timestamp = pd.Timestamp.now(tz='Asia/Kolkata')
+            changed = self.differ.changes(symbol, rows)
+            self.sink(symbol, timestamp, changed, rows)
+            stats['polls'] += 1
+            stats['changed_rows'] += len(changed)
+            stats['last_latency'] = latency
+
+            # Fixed-rate schedule: a slow poll eats into the wait instead of shifting every later poll
+            next_poll += interval
+            await asyncio.sleep(max(0.0, next_poll - loop.time()))
+            next_poll = max(next_poll, loop.time() - interval)
+
+    async def run(self, duration=None):
+        stop_at = None if duration is None else asyncio.get_running_loop().time() + duration
+        await asyncio.gather(*(self.run_symbol(symbol, stop_at) for symbol in self.schedules))
+        return self.stats
+
+    def close(self):
+        self.session.close()
+        if hasattr(self.sink, 'close'):
+            self.sink.close()
+
+
+def parse_schedule(text):
+    symbol, _, seconds = text.partition('=')
+    return symbol.upper(), float(seconds or 3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Poll option chains and store only the changed strikes.")
+    parser.add_argument('--symbol', action='append', type=parse_schedule,
+                        help="SYMBOL=seconds, repeatable (default: NIFTY=3 BANKNIFTY=3 FINNIFTY=5)")
+    parser.add_argument('--base-url', default=optionchain.BASE_URL)
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--duration', type=float, help="stop after this many seconds")
+    parser.add_argument('--out', default='option_chain_changes', help="folder for the change CSVs")
+    parser.add_argument('--store', help="write to a chainstore folder instead of CSVs")
+    args = parser.parse_args(argv)
+
+    if args.store:
+        import chainstore
+        sink = chainstore.ChainStoreSink(args.store)
+    else:
+        sink = CsvChangeSink(args.out)
+    poller = OptionChainPoller(dict(args.symbol) if args.symbol else SCHEDULES, base_url=args.base_url,
+                               sink=sink, timeout=args.timeout)
+    try:
+        stats = asyncio.run(poller.run(args.duration))
+    except KeyboardInterrupt:
+        stats = poller.stats
+    finally:
+        poller.close()
+    for symbol, values in stats.items():
+        print(f"{symbol}: {values['polls']} polls, {values['errors']} errors, {values['changed_rows']} changed rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import indicatorcache
+import vectorbacktest
+
+# Parallel version of the optimizer loop in backtest4bestcondition.py.
+# The OHLCV frame is copied into one shared memory block up front. Each worker attaches
+# to it once (in the pool initializer) and rebuilds its DataFrame from that block, so the
+# tasks themselves only carry the (short, long) periods. With a cache_spec the workers also
+# store every result in the shared resultcache.ResultCache as soon as it is computed.
+
+class SharedFrame:
+    def __init__(self, data):
+        self.columns = list(data.columns)
+        self.index_name = data.index.name
+        self.length = len(data)
+        index = pd.DatetimeIndex(data.index).as_unit('ns')  # read_csv may pick s/us resolution
+        self.tz = str(index.tz) if index.tz is not None else None
+
+        # Layout: int64 timestamps followed by one float64 array per column
+        nbytes = max(8 * self.length * (len(self.columns) + 1), 1)
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        block = self.view(self.shm)
+        block[0] = index.asi8
+        for i, column in enumerate(self.columns, start=1):
+            block[i] = data[column].to_numpy(dtype=np.float64).view(np.int64)
+
+    def view(self, shm):
+        return np.ndarray((len(self.columns) + 1, self.length), dtype=np.int64, buffer=shm.buf)
+
+    def spec(self):
+        # Small, picklable description that workers use to attach
+        return self.shm.name, self.length, self.columns, self.index_name, self.tz
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach_frame(spec):
+    name, length, columns, index_name, tz = spec
+    shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray((len(columns) + 1, length), dtype=np.int64, buffer=shm.buf)
+    index = pd.DatetimeIndex(block[0].view('datetime64[ns]'), name=index_name)
+    if tz is not None:
+        index = index.tz_localize('UTC').tz_convert(tz)  # asi8 of an aware index is UTC
+    data = pd.DataFrame({column: block[i].view(np.float64) for i, column in enumerate(columns, start=1)},
+                        index=index)
+    return shm, data
+
+
+# Per-process state, filled in by init_worker()
+worker_shm = None
+worker_data = None
+worker_cache = None  # (ResultCache, data key, strategy key) or None
+
+
+def init_worker(spec, cache_spec=None):
+    global worker_shm, worker_data, worker_cache
+    worker_shm, worker_data = attach_frame(spec)
+    worker_cache = cache_spec
+
+
+def store_rows(rows, engine, lot_size):
+    if worker_cache is not None:
+        from optimizer import pair_params
+        cache, data_key, strategy_key = worker_cache
+        cache.put_many(data_key, strategy_key, [(pair_params(row[0], row[1], engine, lot_size), row[2:])
+                                                for row in rows])
+
+
+def backtrader_task(short_period, long_period):
+    # Imported here so the numpy engine never pays for backtrader in the workers
+    from backtest4bestcondition import run_backtest
+    # The per-process SMA cache is reused by every task this worker runs
+    profit, trades, successful, failed = run_backtest(worker_data, short_period, long_period,
+                                                      sma_cache=indicatorcache.default_cache)
+    rows = [(short_period, long_period, profit, trades, successful, failed)]
+    store_rows(rows, 'backtrader', 15)
+    return rows
+
+
+def numpy_task(short_period, long_periods, lot_size):
+    # One short period against every long period in a single batched call
+    results = vectorbacktest.ma_cross_grid(worker_data, [short_period], long_periods, lot_size=lot_size)
+    rows = list(results.itertuples(index=False, name=None))
+    store_rows(rows, 'numpy', lot_size)
+    return rows
+
+
+def rank_results(rows):
+    results = pd.DataFrame(rows, columns=vectorbacktest.RESULT_COLUMNS)
+    results = results.sort_values(['short_period', 'long_period'])
+    # Stable sort keeps the loop order for equal profits, same tie-break as the optimizer loop
+    return results.sort_values('total_profit', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def run_parallel_sweep(data, short_periods, long_periods, engine='backtrader', max_workers=None,
+                       lot_size=15, on_result=None, pairs=None, cache_spec=None):
+    # on_result(row, rows_so_far) is called as every result comes back.
+    # pairs: explicit (short, long) list instead of short_periods x long_periods.
+    if pairs is None:
+        pairs = [(short, long_) for short in short_periods for long_ in long_periods]
+    max_workers = max_workers or os.cpu_count() or 1
+
+    shared = SharedFrame(data)
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                                 initargs=(shared.spec(), cache_spec)) as pool:
+            if engine == 'numpy':
+                by_short = {}
+                for short, long_ in pairs:
+                    by_short.setdefault(short, []).append(long_)
+                futures = [pool.submit(numpy_task, short, longs, lot_size) for short, longs in by_short.items()]
+            else:
+                futures = [pool.submit(backtrader_task, short, long_) for short, long_ in pairs]
+
+            for future in as_completed(futures):
+                for row in future.result():
+                    rows.append(row)
+                    if on_result is not None:
+                        on_result(row, rows)
+    finally:
+        shared.close()
+
+    return rank_results(rows)
+
+
+def print_progress(total):
+    # Simple on_result callback: one line per finished combination with the running best
+    best = [None]
+
+    def report(row, rows):
+        if best[0] is None or row[2] > best[0][2]:
+            best[0] = row
+        print(f"[{len(rows)}/{total}] Short MA = {row[0]}, Long MA = {row[1]}, Net Profit: {row[2]:.2f}"
+              f" | Best so far: {best[0][0]}/{best[0][1]} ({best[0][2]:.2f})")
+
+    return report
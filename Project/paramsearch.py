@@ -0,0 +1,178 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+import indicatorcache
+import vectorbacktest
+
+# Search strategies for the MA-crossover parameters, as an alternative to running every
+# combination on the full data:
+#
+#   grid      every candidate on all bars (what optimizer.py does)
+#   halving   successive halving: every candidate on a short prefix of the data, the best
+#             1/eta of them on an eta times longer prefix, ... until the survivors run on all bars
+#   bayesian  a Gaussian-process model of profit over the (scaled) parameters; each step runs the
+#             candidate with the highest expected improvement
+#
+# The search space is a dict of parameter -> values, so stop losses and lot sizes widen the
+# search without anyone writing another loop:
+#
+#   space = search_space(stop_losses=(0, 25, 50, 100), lot_sizes=(15, 30))
+#   results, best, cost = search(data, 'halving', space)
+#
+# cost counts evaluations in full-data runs (a pair on a third of the bars costs 1/3), so it
+# can be compared with the grid's len(candidates). Profit is linear in the lot size (the
+# engine assumes every order fills), so lot sizes share one run per (short, long, stop_loss).
+
+SPACE_KEYS = ('short_period', 'long_period', 'stop_loss', 'lot_size')
+STRATEGIES = ('grid', 'halving', 'bayesian')
+
+
+def search_space(short_periods=range(5, 20), long_periods=range(50, 101), stop_losses=(0,), lot_sizes=(15,)):
+    return {'short_period': list(short_periods), 'long_period': list(long_periods),
+            'stop_loss': list(stop_losses), 'lot_size': list(lot_sizes)}
+
+
+def candidates(space):
+    # Every combination in loop order (short outer, lot size inner), as an (n x 4) array
+    return np.array(list(itertools.product(*(space[key] for key in SPACE_KEYS))), dtype=np.float64)
+
+
+class CrossoverObjective:
+    # Runs candidate rows on the first `bars` bars of the data. SMAs come from the shared
+    # cache, so every prefix reuses the same full-length arrays.
+    def __init__(self, data, cache=None, max_cells=8_000_000):
+        cache = cache or indicatorcache.default_cache
+        self.close = data['Close'].to_numpy(dtype=np.float64)
+        self.session_end = vectorbacktest.session_end_index(vectorbacktest.session_ids(data.index))
+        self.key = indicatorcache.fingerprint(self.close)
+        self.cache = cache
+        self.max_cells = max_cells
+        self.cost = 0.0
+
+    def __len__(self):
+        return len(self.close)
+
+    def sma(self, period):
+        return self.cache.sma(self.close, period, key=self.key)
+
+    def __call__(self, rows, bars=None):
+        # (profit, trade_count, successful, failed) arrays, one entry per candidate row
+        n = len(self.close) if bars is None else bars
+        close = self.close[:n]
+        session_end = np.minimum(self.session_end[:n], n)
+        self.cost += len(rows) * n / len(self.close)
+
+        out = [np.zeros(len(rows)), np.zeros(len(rows), dtype=np.int64), np.zeros(len(rows), dtype=np.int64),
+               np.zeros(len(rows), dtype=np.int64)]
+        pairs, pair_of_row = np.unique(rows[:, :2].astype(np.int64), axis=0, return_inverse=True)
+        pair_of_row = pair_of_row.reshape(-1)
+        batch_size = max(1, self.max_cells // (n + 1))
+        for i in range(0, len(pairs), batch_size):
+            batch = [tuple(pair) for pair in pairs[i:i + batch_size].tolist()]
+            smas = {period: self.sma(period)[:n] for period in {p for pair in batch for p in pair}}
+            next_bull, next_bear, starts = vectorbacktest.signal_indices(smas, batch)
+            selected = np.flatnonzero((pair_of_row >= i) & (pair_of_row < i + len(batch)))
+            # One walk per (pair, stop loss); the lot size only scales the result
+            walks, walk_of_row = np.unique(np.column_stack([pair_of_row[selected], rows[selected, 2]]),
+                                           axis=0, return_inverse=True)
+            walk_of_row = walk_of_row.reshape(-1)
+            profit, trades, successful, failed = vectorbacktest.walk_trades(
+                close, session_end, next_bull, next_bear, starts, lot_size=1.0, stop_loss=walks[:, 1],
+                pair_index=walks[:, 0].astype(np.int64) - i)
+            out[0][selected] = profit[walk_of_row] * rows[selected, 3]
+            out[1][selected] = trades[walk_of_row]
+            out[2][selected] = successful[walk_of_row]
+            out[3][selected] = failed[walk_of_row]
+        return out
+
+
+def grid_search(objective, rows):
+    return np.arange(len(rows)), objective(rows)
+
+
+def successive_halving(objective, rows, eta=3, min_fraction=1 / 9):
+    # Rungs of eta times more bars for the best 1/eta of the candidates; the last rung uses
+    # every bar. The first prefix is never shorter than three times the longest period, so
+    # every pair gets a few signals.
+    n = len(objective)
+    bars = min(n, max(int(n * min_fraction), 3 * int(rows[:, :2].max())))
+    alive = np.arange(len(rows))
+    while True:
+        result = objective(rows[alive], bars)
+        if bars >= n:
+            return alive, result
+        if len(alive) > 1:
+            keep = max(1, len(alive) // eta)
+            order = np.lexsort((np.arange(len(alive)), -result[0]))  # Highest profit first, ties in loop order
+            alive = np.sort(alive[order[:keep]])
+        bars = min(n, bars * eta)
+
+
+def expected_improvement(mean, std, best, xi=0.01):
+    from optiongreeks import norm_cdf
+
+    std = np.maximum(std, 1e-12)
+    z = (mean - best - xi) / std
+    pdf = np.exp(-0.5 * z * z) / np.sqrt(2.0 * np.pi)
+    return (mean - best - xi) * norm_cdf(z) + std * pdf
+
+
+def bayesian_search(objective, rows, initial=20, iterations=40, length_scale=0.2, seed=0):
+    # Gaussian process with an RBF kernel on the parameters scaled to [0, 1]; the noise term
+    # only keeps the kernel matrix invertible (a backtest is deterministic)
+    rng = np.random.default_rng(seed)
+    low, high = rows.min(axis=0), rows.max(axis=0)
+    scaled = (rows - low) / np.where(high > low, high - low, 1.0)
+
+    def kernel(a, b):
+        distance = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)
+        return np.exp(-0.5 * distance / length_scale ** 2)
+
+    chosen = list(rng.choice(len(rows), size=min(initial, len(rows)), replace=False))
+    results = [list(values) for values in objective(rows[chosen])]
+    while len(chosen) < min(initial + iterations, len(rows)):
+        y = np.asarray(results[0])
+        scale = y.std() or 1.0
+        target = (y - y.mean()) / scale
+        x = scaled[chosen]
+        factor = np.linalg.cholesky(kernel(x, x) + 1e-6 * np.eye(len(x)))
+        alpha = np.linalg.solve(factor.T, np.linalg.solve(factor, target))
+
+        remaining = np.setdiff1d(np.arange(len(rows)), chosen)
+        cross = kernel(scaled[remaining], x)
+        mean = cross @ alpha
+        v = np.linalg.solve(factor, cross.T)
+        std = np.sqrt(np.maximum(1.0 - (v * v).sum(axis=0), 0.0))
+        pick = remaining[np.argmax(expected_improvement(mean, std, target.max()))]
+
+        chosen.append(pick)
+        for result, value in zip(results, objective(rows[[pick]])):
+            result.append(value[0])
+    order = np.argsort(chosen, kind='stable')
+    return np.asarray(chosen)[order], [np.asarray(result)[order] for result in results]
+
+
+def search(data, strategy='halving', space=None, cache=None, **options):
+    # Returns (results of the full-data runs, best dict or None, cost in full-data runs).
+    # The best dict has the optimizer.best_row keys plus stop_loss and lot_size.
+    space = space or search_space()
+    rows = candidates(space)
+    objective = CrossoverObjective(data, cache=cache)
+    runner = {'grid': grid_search, 'halving': successive_halving, 'bayesian': bayesian_search}[strategy]
+    picked, (profit, trades, successful, failed) = runner(objective, rows, **options)
+
+    results = pd.DataFrame(rows[picked], columns=list(SPACE_KEYS))
+    for key in ('short_period', 'long_period', 'lot_size'):
+        results[key] = results[key].astype(np.int64)
+    results['total_profit'] = profit
+    results['trade_count'] = trades
+    results['successful_trades'] = successful
+    results['failed_trades'] = failed
+
+    best = None
+    if len(results):
+        i = results['total_profit'].to_numpy().argmax()  # First of the equal best, like optimizer.best_row
+        best = {key: results[key].iloc[i].item() for key in results.columns}
+    return results, best, objective.cost
@@ -0,0 +1,231 @@
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+import synthdata
+
+# Parity checks between the fast engines and the reference paths they replace.
+#
+#   python paritycheck.py
+#   python paritycheck.py --checks ma_cross_numpy --days 20 --seed 3
+#
+# Every check runs a handful of parameter sets through both paths on the same seeded
+# synthetic bars (synthdata.py) and lists every result that differs. The backtrader side
+# always uses backtrader's own SimpleMovingAverage (sma_cache=None), not the prefix-sum SMA
+# of indicatorcache.py that the fast engines share, so the SMA arithmetic is checked too.
+# The exit code is 1 when any check finds a difference, so the script can run before a
+# commit or in CI.
+
+MA_PAIRS = [(5, 50), (9, 21), (14, 50), (19, 100), (3, 8)]
+STOP_LOSSES = (0, 20.0, 60.0)  # Points; about one and two 5-minute bar ranges on the synthetic data
+
+
+def differences(label, expected, got):
+    # One line per field that differs; floats are compared with np.isclose, the rest exactly
+    lines = []
+    for i, (want, have) in enumerate(zip(expected, got)):
+        same = np.isclose(want, have) if isinstance(want, float) or isinstance(have, float) else want == have
+        if not same:
+            lines.append(f"{label}: field {i} expected {want!r}, got {have!r}")
+    return lines
+
+
+def check_ma_cross_numpy(data):
+    # vectorbacktest.walk_trades (with and without stop loss) against backtest4bestcondition
+    import indicatorcache
+    import vectorbacktest
+    from backtest4bestcondition import run_backtest
+
+    close = data['Close'].to_numpy(dtype=np.float64)
+    session_end = vectorbacktest.session_end_index(vectorbacktest.session_ids(data.index))
+    smas = {period: indicatorcache.simple_moving_average(close, period) for pair in MA_PAIRS for period in pair}
+    next_bull, next_bear, starts = vectorbacktest.signal_indices(smas, MA_PAIRS)
+
+    problems = []
+    for stop_loss in STOP_LOSSES:
+        profit, trades, successful, failed = vectorbacktest.walk_trades(
+            close, session_end, next_bull, next_bear, starts, stop_loss=stop_loss)
+        for j, (short, long_) in enumerate(MA_PAIRS):
+            expected = run_backtest(data, short, long_, sma_cache=None, stop_loss=stop_loss)
+            got = (float(profit[j]), int(trades[j]), int(successful[j]), int(failed[j]))
+            problems += differences(f"{short}/{long_} stop {stop_loss:g}", expected, got)
+    return problems
+
+
+def check_streaming_indicators(data):
+    # indicators.py: every streaming object, bar by bar, against its batch function (bit for bit)
+    import indicators
+    import vectorbacktest
+
+    high, low, close, volume = (data[column].to_numpy(dtype=np.float64) for column in ('High', 'Low', 'Close', 'Volume'))
+    problems = []
+    for period in (5, 14, 50):
+        for name, stream, batch, values in (('SMA', indicators.SMA, indicators.sma, close),
+                                            ('EMA', indicators.EMA, indicators.ema, close),
+                                            ('RollingHigh', indicators.RollingHigh, indicators.rolling_high, high),
+                                            ('RollingLow', indicators.RollingLow, indicators.rolling_low, low)):
+            indicator = stream(period)
+            streamed = np.array([indicator.update(value) for value in values.tolist()])
+            if not np.array_equal(streamed, batch(values, period), equal_nan=True):
+                problems.append(f"{name}({period}): streaming and batch values differ")
+
+    days = vectorbacktest.session_ids(data.index)
+    indicator = indicators.VWAP()
+    streamed = np.array([indicator.update(*bar) for bar in zip(days.tolist(), high.tolist(), low.tolist(),
+                                                              close.tolist(), volume.tolist())])
+    if not np.array_equal(streamed, indicators.vwap(days, high, low, close, volume), equal_nan=True):
+        problems.append("VWAP: streaming and batch values differ")
+    return problems
+
+
+def check_live_crossover(data):
+    # livecrossover.CrossoverRunner replayed bar by bar against the backtest2 / backtest3 strategies
+    import backtest2
+    import backtest3
+    import livecrossover
+
+    problems = []
+    for long_short, script in ((False, backtest2), (True, backtest3)):
+        for short, long_ in MA_PAIRS:
+            runner = livecrossover.replay_frame(
+                livecrossover.CrossoverRunner(short, long_, long_short=long_short), data)
+            strategy = script.run_strategy(data, short_period=short, long_period=long_, sma_cache=None)
+            names = ('trade_count', 'successful_trades', 'failed_trades', 'total_profit')
+            expected = tuple(getattr(strategy, name) for name in names)
+            got = tuple(getattr(runner, name) for name in names)
+            problems += differences(f"{script.__name__} {short}/{long_}", expected, got)
+    return problems
+
+
+def check_param_search(data):
+    # paramsearch.CrossoverObjective (full data and a prefix, stop losses, lot sizes) against
+    # backtrader, and the halving / bayesian results against the grid's rows for the same candidates
+    import indicatorcache
+    import paramsearch
+    from backtest4bestcondition import run_backtest
+
+    space = paramsearch.search_space(sorted({short for short, _ in MA_PAIRS}), sorted({long_ for _, long_ in MA_PAIRS}),
+                                     STOP_LOSSES, (15, 30))
+    rows = np.array([row for row in paramsearch.candidates(space).tolist()
+                     if (int(row[0]), int(row[1])) in MA_PAIRS])
+    objective = paramsearch.CrossoverObjective(data, cache=indicatorcache.SMACache())
+    problems = []
+    for bars in (len(data), len(data) // 3):
+        results = objective(rows, bars)
+        for j, (short, long_, stop_loss, lot_size) in enumerate(rows.tolist()):
+            profit, trades, successful, failed = run_backtest(data.iloc[:bars], int(short), int(long_),
+                                                              sma_cache=None, stop_loss=stop_loss)
+            expected = (profit * lot_size / 15, trades, successful, failed)  # The strategy trades 15 units
+            got = (float(results[0][j]), int(results[1][j]), int(results[2][j]), int(results[3][j]))
+            problems += differences(f"{bars} bars {int(short)}/{int(long_)} stop {stop_loss:g} lot {int(lot_size)}",
+                                    expected, got)
+
+    space = paramsearch.search_space(range(5, 20, 2), range(20, 61, 5), (0, 40.0))
+    grid = paramsearch.search(data, 'grid', space, cache=indicatorcache.SMACache())[0].set_index(list(paramsearch.SPACE_KEYS))
+    for strategy in ('halving', 'bayesian'):
+        results = paramsearch.search(data, strategy, space, cache=indicatorcache.SMACache())[0]
+        results = results.set_index(list(paramsearch.SPACE_KEYS))
+        if not np.allclose(results.to_numpy(dtype=np.float64), grid.loc[results.index].to_numpy(dtype=np.float64)):
+            problems.append(f"{strategy}: full-data results differ from the grid's")
+    return problems
+
+
+def check_longshort_numpy(data):
+    # vectorlongshort.run_strategy against backtest3's strategy: totals and every marker list
+    import backtest3
+    import indicatorcache
+    import vectorlongshort
+
+    problems = []
+    for short, long_ in MA_PAIRS:
+        result = vectorlongshort.run_strategy(data, short, long_, sma_cache=indicatorcache.SMACache())
+        strategy = backtest3.run_strategy(data, short_period=short, long_period=long_, sma_cache=None)
+        for name in vectorlongshort.compare_results(strategy, result):
+            problems.append(f"{short}/{long_}: {name} differs")
+    return problems
+
+
+def check_chart_downsample(data):
+    # chartrender buckets against a pandas groupby over the same buckets (a range that fits the
+    # width has one bucket per bar, i.e. full resolution); every marker keeps a candle of its own
+    # at its own price, and the SMA lines equal the full SMA at each bucket's last bar
+    import chartrender
+    import indicatorcache
+    import vectorlongshort
+
+    result = vectorlongshort.run_strategy(data, 9, 21, sma_cache=indicatorcache.SMACache())
+    markers = result.ledger.markers(data['Close'].to_numpy())
+    close = data['Close'].to_numpy(dtype=np.float64)
+    problems = []
+    for width_px in (300, 900):
+        chart = chartrender.CandleChart(data, mav=(9, 21), width_px=width_px,
+                                        markers=[(values, {}) for values in markers.values()])
+        for lo, hi in ((0, len(data)), (len(data) // 4, len(data) // 2)):
+            frame, lines, points = chart.prepare(lo, hi)
+            starts = data.index[lo:hi].get_indexer(frame.index)
+            labels = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, hi - lo)))
+            groups = data.iloc[lo:hi].groupby(labels)
+            expected = np.column_stack([groups['Open'].first(), groups['High'].max(), groups['Low'].min(),
+                                        groups['Close'].last(), groups['Volume'].sum()])
+            label = f"{width_px}px bars {lo}-{hi}"
+            if not np.allclose(frame[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(), expected):
+                problems.append(f"{label}: bucket OHLCV differs from the groupby")
+            ends = np.append(starts[1:], hi - lo) - 1 + lo
+            for period, values in lines:
+                if not np.array_equal(values, indicatorcache.simple_moving_average(close, period)[ends],
+                                      equal_nan=True):
+                    problems.append(f"{label}: SMA({period}) line differs")
+            kinds = [kind for kind, values in markers.items() if not np.isnan(values).all()]  # As in chart.markers
+            for kind, (full, _), (small, _) in zip(kinds, chart.markers, points):
+                rows = np.flatnonzero(~np.isnan(full[lo:hi]))
+                kept = np.isin(rows, starts) & np.isin(rows + 1, np.append(starts, hi - lo))
+                if not kept.all() or np.count_nonzero(~np.isnan(small)) != len(rows):
+                    problems.append(f"{label}: {kind} markers lost their own candle")
+                elif not np.array_equal(small[np.searchsorted(starts, rows)], full[lo:hi][rows]):
+                    problems.append(f"{label}: {kind} marker prices moved")
+    return problems
+
+
+# name -> function(data) returning a list of differences (empty when both paths agree)
+CHECKS = {
+    'ma_cross_numpy': check_ma_cross_numpy,
+    'streaming_indicators': check_streaming_indicators,
+    'live_crossover': check_live_crossover,
+    'param_search': check_param_search,
+    'longshort_numpy': check_longshort_numpy,
+    'chart_downsample': check_chart_downsample,
+}
+
+
+def run_checks(names=None, days=10, interval='5min', seed=0):
+    data = synthdata.generate_frame(days=days, interval=interval, seed=seed)
+    results = {}
+    for name in names or CHECKS:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # The backtest scripts print as they go
+            problems = CHECKS[name](data)
+        results[name] = problems
+        status = "ok" if not problems else f"{len(problems)} differences"
+        print(f"{name:28s} {status:>16s}  {time.perf_counter() - start:7.2f} s")
+        for line in problems:
+            print(f"    {line}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the fast engines with their reference paths.")
+    parser.add_argument('--checks', nargs='+', choices=list(CHECKS), help="default: all checks")
+    parser.add_argument('--days', type=int, default=10, help="trading days of synthetic bars")
+    parser.add_argument('--interval', default='5min')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = run_checks(args.checks, args.days, args.interval, args.seed)
+    return 1 if any(results.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
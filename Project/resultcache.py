@@ -0,0 +1,152 @@
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+# On-disk cache of backtest results, shared by every sweep and every process:
+#
+#   (data fingerprint, strategy fingerprint, params) -> (total_profit, trade_count, successful, failed)
+#
+# The data fingerprint hashes the bars themselves (timestamps and OHLCV values), so a renamed
+# CSV still hits and a re-downloaded one with a changed bar misses. The strategy fingerprint
+# hashes the source code of the strategy and of the modules it computes with (indicators,
+# trading calendar), so editing any of them starts a fresh set of entries.
+#
+# SQLite in WAL mode lets parallel workers read while one of them writes; writers take the
+# write lock up front (BEGIN IMMEDIATE) and wait up to `timeout` seconds for it. Every lookup
+# refreshes last_used, and once the table holds more than max_entries rows the least
+# recently used ones are deleted.
+#
+#   cache = ResultCache()
+#   found = cache.get_many(data_key, strategy_key, params_list)      # {params json: result}
+#   cache.put_many(data_key, strategy_key, [(params, result), ...])
+
+DEFAULT_PATH = 'backtest_cache.sqlite'
+
+
+def data_fingerprint(data):
+    index = pd.DatetimeIndex(data.index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(index.as_unit('ns').asi8).tobytes())
+    for column in ('Open', 'High', 'Low', 'Close', 'Volume'):
+        if column in data:
+            digest.update(column.encode())
+            digest.update(np.ascontiguousarray(data[column].to_numpy(dtype=np.float64)).tobytes())
+    return f"{len(data)}:{digest.hexdigest()}"
+
+
+def strategy_fingerprint(name, *objects):
+    # name plus a hash of the source of the classes / functions / modules that decide the result
+    digest = hashlib.blake2b(digest_size=8)
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+    return f"{name}:{digest.hexdigest()}"
+
+
+def params_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+class ResultCache:
+    def __init__(self, path=DEFAULT_PATH, max_entries=200_000, timeout=30.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.connection = None
+        self.pid = None
+
+    def __getstate__(self):
+        # Workers open their own connection
+        state = self.__dict__.copy()
+        state['connection'] = None
+        state['pid'] = None
+        return state
+
+    def connect(self):
+        if self.connection is None or self.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                               'data_key TEXT, strategy_key TEXT, params TEXT, total_profit REAL, '
+                               'trade_count INTEGER, successful_trades INTEGER, failed_trades INTEGER, '
+                               'last_used REAL, PRIMARY KEY (data_key, strategy_key, params))')
+            connection.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+            self.connection = connection
+            self.pid = os.getpid()
+        return self.connection
+
+    def get_many(self, data_key, strategy_key, params_list):
+        # {params json: (total_profit, trade_count, successful_trades, failed_trades)} for the cached ones
+        wanted = {params_key(params) for params in params_list}
+        connection = self.connect()
+        rows = connection.execute('SELECT params, total_profit, trade_count, successful_trades, failed_trades '
+                                  'FROM results WHERE data_key = ? AND strategy_key = ?', (data_key, strategy_key))
+        found = {row[0]: tuple(row[1:]) for row in rows if row[0] in wanted}
+        self.hits += len(found)
+        self.misses += len(wanted) - len(found)
+        if found:
+            now = time.time()
+            with self.transaction() as connection:
+                connection.executemany('UPDATE results SET last_used = ? '
+                                       'WHERE data_key = ? AND strategy_key = ? AND params = ?',
+                                       [(now, data_key, strategy_key, key) for key in found])
+        return found
+
+    def get(self, data_key, strategy_key, params):
+        return self.get_many(data_key, strategy_key, [params]).get(params_key(params))
+
+    def put_many(self, data_key, strategy_key, items):
+        # items: [(params dict, (total_profit, trade_count, successful_trades, failed_trades))]
+        now = time.time()
+        rows = [(data_key, strategy_key, params_key(params), float(result[0]), int(result[1]), int(result[2]),
+                 int(result[3]), now) for params, result in items]
+        if not rows:
+            return
+        with self.transaction() as connection:
+            connection.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            excess = connection.execute('SELECT COUNT(*) FROM results').fetchone()[0] - self.max_entries
+            if excess > 0:
+                connection.execute('DELETE FROM results WHERE rowid IN '
+                                   '(SELECT rowid FROM results ORDER BY last_used LIMIT ?)', (excess,))
+
+    def put(self, data_key, strategy_key, params, result):
+        self.put_many(data_key, strategy_key, [(params, result)])
+
+    def transaction(self):
+        return Transaction(self.connect())
+
+    def __len__(self):
+        return self.connect().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def clear(self):
+        with self.transaction() as connection:
+            connection.execute('DELETE FROM results')
+
+    def close(self):
+        if self.connection is not None and self.pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+
+
+class Transaction:
+    # BEGIN IMMEDIATE ... COMMIT (ROLLBACK on an exception)
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Seeded synthetic intraday bars for benchmarks and local replays.
+# Bars follow the NSE cash session: weekdays only, 9:15 to 15:30 IST, labelled by their
+# start time like the yfinance CSVs (so the last 1-minute bar of a day is 15:29).
+
+SESSION_OPEN = pd.Timedelta('09:15:00')
+SESSION_CLOSE = pd.Timedelta('15:30:00')
+START_PRICES = {'NIFTY': 24000.0, 'BANKNIFTY': 51000.0, 'FINNIFTY': 23000.0}
+
+
+def session_offsets(interval):
+    # Bar start times inside one session, as offsets from midnight
+    step = pd.Timedelta(interval)
+    count = int((SESSION_CLOSE - SESSION_OPEN) // step)
+    return SESSION_OPEN + pd.to_timedelta(np.arange(count) * step.value, unit='ns')
+
+
+def trading_days(days, start_date='2020-01-01', holidays=()):
+    holidays = pd.DatetimeIndex(pd.to_datetime(list(holidays))) if len(holidays) else None
+    result = pd.DatetimeIndex([])
+    start = pd.Timestamp(start_date)
+    while len(result) < days:
+        batch = pd.bdate_range(start, periods=days - len(result) + 30)
+        if holidays is not None:
+            batch = batch[~batch.isin(holidays)]
+        result = result.append(batch)
+        start = batch[-1] + pd.Timedelta(days=1) if len(batch) else start + pd.Timedelta(days=30)
+    return result[:days]
+
+
+def generate_frame(days=20, interval='1min', seed=0, start_price=24000.0, start_date='2020-01-01',
+                   holidays=(), tz=None, daily_vol=0.012):
+    # One symbol: OHLCV bars from a geometric random walk with an overnight gap each day
+    rng = np.random.default_rng(seed)
+    offsets = session_offsets(interval)
+    sessions = trading_days(days, start_date, holidays)
+    index = (sessions.values[:, None] + offsets.values[None, :]).ravel()
+    per_day = len(offsets)
+    n = len(index)
+
+    bar_vol = daily_vol / np.sqrt(per_day)
+    returns = rng.normal(0.0, bar_vol, n)
+    gaps = np.zeros(n)
+    gaps[per_day::per_day] = rng.normal(0.0, daily_vol / 3, days - 1)  # Overnight gap into each open
+    log_close = np.log(start_price) + np.cumsum(returns + gaps)
+    close = np.exp(log_close)
+    open_ = np.exp(log_close - returns)  # Previous close, plus the gap on the first candle of a day
+
+    wick = np.abs(rng.normal(0.0, bar_vol / 2, (2, n))) * close
+    high = np.maximum(open_, close) + wick[0]
+    low = np.minimum(open_, close) - wick[1]
+    volume = rng.integers(1_000, 50_000, n)
+
+    close, open_, high, low = (np.round(values, 2) for values in (close, open_, high, low))
+    frame = pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Adj Close': close,
+                          'Volume': volume}, index=pd.DatetimeIndex(index, name='Datetime'))
+    if tz is not None:
+        frame.index = frame.index.tz_localize(tz)
+    return frame
+
+
+def generate_bars(symbols=('NIFTY',), days=20, interval='1min', seed=0, **kwargs):
+    # {symbol: DataFrame}, every symbol with its own seed derived from the base seed
+    return {symbol: generate_frame(days=days, interval=interval, seed=seed + i,
+                                   start_price=START_PRICES.get(symbol, 10000.0), **kwargs)
+            for i, symbol in enumerate(symbols)}
+
+
+def frame_with_bars(bars, interval='1min', seed=0, **kwargs):
+    # Roughly `bars` bars: whole sessions, trimmed to the exact count
+    per_day = len(session_offsets(interval))
+    days = max(1, -(-bars // per_day))
+    return generate_frame(days=days, interval=interval, seed=seed, **kwargs).iloc[:bars]
@@ -0,0 +1,308 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# Tick ingestion for the Dhan market feed:
+#
+#   feed source -> decode_tick -> TickRingBuffer (preallocated fixed-width records)
+#                                      |
+#                               TickWriter thread -> ticks-YYYYMMDD.bin (+ .json dtype), in batches
+#
+# The feed thread only decodes and copies a few numbers into the ring buffer; all disk work
+# happens on the writer thread. When the writer falls behind and the buffer is full, new
+# ticks are dropped and counted instead of blocking the feed.
+#
+#   DHAN_CLIENT_ID=... DHAN_ACCESS_TOKEN=... python tickingest.py --instrument NSE:1333
+#   python tickingest.py --replay ticks.jsonl            # local replay, no broker connection
+#
+# Files are raw record arrays: read_ticks('ticks/ticks-20261016.bin') gives them back.
+
+TICK_DTYPE = np.dtype([
+    ('recv_ns', 'i8'),  # Local receive time, UTC ns
+    ('exchange', 'i1'),
+    ('kind', 'i1'),  # KINDS code
+    ('security_id', 'i4'),
+    ('ltt', 'i4'),  # Exchange last trade time, seconds after midnight IST (-1 if absent)
+    ('ltp', 'f8'),
+    ('ltq', 'i4'),
+    ('volume', 'i8'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('oi', 'i8'),
+])
+KINDS = {'Ticker Data': 1, 'Quote Data': 2, 'Full Data': 3, 'OI Data': 4, 'Prev Close': 5, 'Market Status': 6}
+
+
+def credentials_from_env():
+    # Dhan credentials never live in the source files
+    client_id = os.environ.get('DHAN_CLIENT_ID')
+    access_token = os.environ.get('DHAN_ACCESS_TOKEN')
+    if not client_id or not access_token:
+        raise RuntimeError("Set DHAN_CLIENT_ID and DHAN_ACCESS_TOKEN in the environment.")
+    return client_id, access_token
+
+
+def seconds_of_day(text):
+    # "13:22:13" -> 48133
+    if not text:
+        return -1
+    hours, minutes, seconds = str(text).split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(float(seconds))
+
+
+def number(message, key, default=0):
+    value = message.get(key)
+    return default if value in (None, '') else value
+
+
+def decode_tick(message, recv_ns):
+    # One feed message (dict) -> one TICK_DTYPE row as a tuple; None for messages without a security
+    if not isinstance(message, dict) or 'security_id' not in message:
+        return None
+    return (recv_ns, int(number(message, 'exchange_segment')), KINDS.get(message.get('type'), 0),
+            int(message['security_id']), seconds_of_day(message.get('LTT')),
+            float(number(message, 'LTP', 'nan')), int(number(message, 'LTQ')), int(number(message, 'volume')),
+            float(number(message, 'open', 'nan')), float(number(message, 'high', 'nan')),
+            float(number(message, 'low', 'nan')), float(number(message, 'close', 'nan')),
+            int(number(message, 'OI')))
+
+
+class TickRingBuffer:
+    # Single producer (feed thread), single consumer (writer thread). head and tail only ever
+    # grow; slot = position % capacity. A full buffer drops the incoming tick.
+    def __init__(self, capacity=1 << 20):
+        self.capacity = capacity
+        self.records = np.zeros(capacity, dtype=TICK_DTYPE)
+        self.head = 0  # Next position to write (producer only)
+        self.tail = 0  # Next position to read (consumer only)
+        self.dropped = 0
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def push(self, row):
+        if self.head - self.tail >= self.capacity:
+            self.dropped += 1
+            return False
+        self.records[self.head % self.capacity] = row
+        self.head += 1  # Publish after the slot is written
+        return True
+
+    def drain(self, max_records=None):
+        # Copy out everything written so far (up to max_records) and free the slots
+        head, tail = self.head, self.tail
+        count = head - tail if max_records is None else min(head - tail, max_records)
+        if count <= 0:
+            return self.records[:0].copy()
+        start = tail % self.capacity
+        stop = start + count
+        if stop <= self.capacity:
+            batch = self.records[start:stop].copy()
+        else:
+            batch = np.concatenate([self.records[start:], self.records[:stop - self.capacity]])
+        self.tail = tail + count
+        return batch
+
+
+class TickWriter(threading.Thread):
+    # Background thread: drains the ring buffer every `interval` seconds (or as soon as a batch
+    # is full) and appends the records to one binary file per UTC day
+    def __init__(self, buffer, directory='ticks', batch_size=65536, interval=0.5):
+        super().__init__(daemon=True)
+        self.buffer = buffer
+        self.directory = directory
+        self.batch_size = batch_size
+        self.interval = interval
+        self.stopping = threading.Event()
+        self.written = 0
+        self.batches = 0
+        self.bytes = 0
+        self.files = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, day):
+        return os.path.join(self.directory, f"ticks-{day}.bin")
+
+    def write(self, batch):
+        days = (batch['recv_ns'] // 86_400_000_000_000).astype('M8[D]').astype(str)
+        unique_days = np.unique(days)
+        for day in unique_days:
+            part = batch[days == day] if len(unique_days) > 1 else batch
+            key = day.replace('-', '')
+            if key not in self.files:
+                path = self.path_for(key)
+                with open(path[:-4] + '.json', 'w') as f:
+                    json.dump({'dtype': TICK_DTYPE.descr}, f)
+                self.files[key] = open(path, 'ab')
+            part.tofile(self.files[key])
+            self.files[key].flush()
+            self.bytes += part.nbytes
+        self.written += len(batch)
+        self.batches += 1
+
+    def run(self):
+        while not self.stopping.is_set():
+            if len(self.buffer) < self.batch_size:
+                self.stopping.wait(self.interval)
+            batch = self.buffer.drain(self.batch_size)
+            if len(batch):
+                self.write(batch)
+        while len(self.buffer):  # Final drain after stop()
+            self.write(self.buffer.drain(self.batch_size))
+        for f in self.files.values():
+            f.close()
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
+
+
+def read_ticks(path):
+    return np.fromfile(path, dtype=TICK_DTYPE)
+
+
+class DhanSource:
+    # Live ticks from dhanhq's marketfeed (imported only when used)
+    def __init__(self, instruments, client_id=None, access_token=None):
+        from dhanhq import marketfeed
+        if client_id is None or access_token is None:
+            client_id, access_token = credentials_from_env()
+        self.feed = marketfeed.DhanFeed(client_id, access_token, instruments)
+
+    def __iter__(self):
+        while True:
+            self.feed.run_forever()  # Keep connection alive
+            response = self.feed.get_data()
+            if response:
+                yield response
+
+    def close(self):
+        self.feed.disconnect()
+
+
+class ReplaySource:
+    # Replays feed messages from a JSON-lines file (or any iterable of dicts).
+    # speed=None replays as fast as possible; otherwise messages with a 'recv_ns' key are paced.
+    def __init__(self, messages, speed=None, repeat=1):
+        self.messages = messages
+        self.speed = speed
+        self.repeat = repeat
+
+    def load(self):
+        if isinstance(self.messages, str):
+            with open(self.messages) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        return list(self.messages)
+
+    def __iter__(self):
+        messages = self.load()
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            first = None
+            for message in messages:
+                if self.speed and 'recv_ns' in message:
+                    first = message['recv_ns'] if first is None else first
+                    delay = (message['recv_ns'] - first) / 1e9 / self.speed - (time.perf_counter() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+                yield message
+
+    def close(self):
+        pass
+
+
+class TickIngestor:
+    def __init__(self, source, directory='ticks', capacity=1 << 20, batch_size=65536, interval=0.5):
+        self.source = source
+        self.buffer = TickRingBuffer(capacity)
+        self.writer = TickWriter(self.buffer, directory, batch_size, interval)
+        self.received = 0
+        self.decode_errors = 0
+        self.started = None
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return {
+            'received': self.received,
+            'decode_errors': self.decode_errors,
+            'dropped': self.buffer.dropped,
+            'buffered': len(self.buffer),
+            'written': self.writer.written,
+            'batches': self.writer.batches,
+            'bytes': self.writer.bytes,
+            'ticks_per_sec': self.received / elapsed if elapsed else 0.0,
+        }
+
+    def run(self, max_ticks=None, report_every=5.0):
+        self.started = time.perf_counter()
+        self.writer.start()
+        next_report = self.started + report_every if report_every else None
+        push, decode, clock = self.buffer.push, decode_tick, time.time_ns
+        try:
+            for message in self.source:
+                self.received += 1
+                try:
+                    row = decode(message, clock())
+                except (ValueError, TypeError, KeyError):
+                    self.decode_errors += 1
+                    continue
+                if row is not None:
+                    push(row)
+                if max_ticks is not None and self.received >= max_ticks:
+                    break
+                if next_report is not None and time.perf_counter() >= next_report:
+                    print(self.format_stats())
+                    next_report += report_every
+        finally:
+            self.source.close()
+            self.writer.stop()
+        return self.stats()
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"received {s['received']:,}  written {s['written']:,}  dropped {s['dropped']:,}  "
+                f"decode errors {s['decode_errors']:,}  {s['ticks_per_sec']:,.0f} ticks/s")
+
+
+def parse_instrument(text):
+    # "NSE:1333" or "NSE:1333:Quote" -> (marketfeed.NSE, "1333", marketfeed.Quote)
+    from dhanhq import marketfeed
+    parts = text.split(':')
+    exchange = getattr(marketfeed, parts[0])
+    mode = getattr(marketfeed, parts[2]) if len(parts) > 2 else marketfeed.Ticker
+    return exchange, parts[1], mode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest Dhan market-feed ticks to disk.")
+    parser.add_argument('--instrument', action='append', default=[],
+                        help="EXCHANGE:SECURITY_ID[:MODE], repeatable (default: NSE:1333, HDFC Bank)")
+    parser.add_argument('--replay', help="JSON-lines file of feed messages to replay instead")
+    parser.add_argument('--speed', type=float, help="replay pacing factor (default: as fast as possible)")
+    parser.add_argument('--out', default='ticks', help="folder for the tick files")
+    parser.add_argument('--capacity', type=int, default=1 << 20, help="ring buffer size in ticks")
+    parser.add_argument('--batch', type=int, default=65536)
+    parser.add_argument('--max-ticks', type=int)
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        source = ReplaySource(args.replay, speed=args.speed)
+    else:
+        source = DhanSource([parse_instrument(text) for text in args.instrument or ['NSE:1333']])
+
+    ingestor = TickIngestor(source, args.out, args.capacity, args.batch)
+    try:
+        ingestor.run(args.max_ticks)
+    except KeyboardInterrupt:
+        pass
+    print(ingestor.format_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+# Trade ledger for the backtest strategies: one fixed-width record per trade in a preallocated
+# NumPy structured array, instead of four Python lists of datetimes.
+#
+#   ledger = TradeLedger(index=data.index)
+#   ledger.open(bar_index, side, entry_price)            # side 1 long, -1 short
+#   ledger.close(exit_index, exit_price, pnl)            # closes the last open trade
+#   markers = ledger.markers(data['Close'].to_numpy())   # chart marker arrays, no get_loc loop
+#   ledger.to_frame()                                    # one row per trade
+#
+# The array doubles when full, so appends are amortized O(1); compact() trims the spare
+# capacity before a ledger is kept around (a record is 41 bytes, a datetime in a list ~56).
+# For sweeps, ledgers_frame({key: ledger}) stacks many runs into one DataFrame and
+# save_ledgers() writes it to Parquet (pyarrow) or to a plain .npy structured array.
+
+TRADE_DTYPE = np.dtype([
+    ('bar_index', 'i8'),  # Entry bar (row of the data)
+    ('exit_index', 'i8'),  # Exit bar, -1 while the trade is open
+    ('side', 'i1'),
+    ('entry_price', 'f8'),
+    ('exit_price', 'f8'),  # NaN while open
+    ('pnl', 'f8'),  # NaN while open
+])
+MARKERS = ('buy', 'sell', 'success', 'failure')
+
+
+class TradeLedger:
+    def __init__(self, capacity=64, index=None):
+        self.records = np.zeros(max(1, capacity), dtype=TRADE_DTYPE)
+        self.size = 0
+        self.index = index  # Bar timestamps (or a function returning them), used by times() and to_frame()
+
+    @classmethod
+    def from_arrays(cls, bar_index, exit_index, side, entry_price, exit_price, pnl, index=None):
+        # Bulk constructor for the array engines (exit_index -1 / NaN prices for open trades)
+        ledger = cls(len(bar_index), index=index)
+        trades = ledger.records[:len(bar_index)]
+        trades['bar_index'] = bar_index
+        trades['exit_index'] = exit_index
+        trades['side'] = side
+        trades['entry_price'] = entry_price
+        trades['exit_price'] = exit_price
+        trades['pnl'] = pnl
+        ledger.size = len(bar_index)
+        return ledger
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def trades(self):
+        return self.records[:self.size]
+
+    def grow(self):
+        records = np.zeros(2 * len(self.records), dtype=TRADE_DTYPE)
+        records[:self.size] = self.records[:self.size]
+        self.records = records
+
+    def open(self, bar_index, side, entry_price):
+        if self.size == len(self.records):
+            self.grow()
+        self.records[self.size] = (bar_index, -1, side, entry_price, np.nan, np.nan)
+        self.size += 1
+
+    def close(self, exit_index, exit_price, pnl):
+        record = self.records[self.size - 1]
+        record['exit_index'] = exit_index
+        record['exit_price'] = exit_price
+        record['pnl'] = pnl
+
+    def compact(self):
+        self.records = self.records[:max(1, self.size)].copy()
+        return self
+
+    def rows(self, kind):
+        # Bar indices of one marker kind: 'buy' / 'sell' entries, 'success' / 'failure' exits
+        trades = self.trades
+        if kind == 'buy':
+            return trades['bar_index'][trades['side'] > 0]
+        if kind == 'sell':
+            return trades['bar_index'][trades['side'] < 0]
+        closed = trades['exit_index'] >= 0
+        won = trades['pnl'] > 0
+        return trades['exit_index'][closed & (won if kind == 'success' else ~won)]
+
+    def markers(self, close):
+        # {kind: array of len(close)}: the close at every marker bar, NaN elsewhere
+        close = np.asarray(close, dtype=np.float64)
+        result = {}
+        for kind in MARKERS:
+            marker = np.full(len(close), np.nan)
+            rows = self.rows(kind)
+            marker[rows] = close[rows]
+            result[kind] = marker
+        return result
+
+    def bar_times(self):
+        return self.index() if callable(self.index) else self.index
+
+    def times(self, kind):
+        # Timezone-naive datetimes of one marker kind, like the strategies' old point lists
+        index = pd.DatetimeIndex(self.bar_times())
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index[self.rows(kind)].to_pydatetime().tolist()
+
+    def to_frame(self):
+        frame = pd.DataFrame(self.trades)
+        if self.index is not None:
+            index = pd.DatetimeIndex(self.bar_times())
+            frame['entry_time'] = index[frame['bar_index'].to_numpy()]
+            exit_index = frame['exit_index'].to_numpy()
+            frame['exit_time'] = pd.Series(index[np.maximum(exit_index, 0)]).where(exit_index >= 0)
+        return frame
+
+
+class LedgerPoints:
+    # Mixin for the strategies: the old point-list attributes, read from self.ledger
+    @property
+    def buy_signals(self):
+        return self.ledger.times('buy')
+
+    @property
+    def sell_signals(self):
+        return self.ledger.times('sell')
+
+    @property
+    def successful_trades_points(self):
+        return self.ledger.times('success')
+
+    @property
+    def failed_trades_points(self):
+        return self.ledger.times('failure')
+
+
+def ledgers_frame(ledgers, key_names=('run',)):
+    # {key: ledger} -> one DataFrame, the key (a tuple for several names) in the first columns
+    frames = []
+    for key, ledger in ledgers.items():
+        frame = ledger.to_frame()
+        values = key if isinstance(key, tuple) else (key,)
+        for name, value in zip(key_names, values):
+            frame.insert(key_names.index(name), name, value)
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=list(key_names) + list(TRADE_DTYPE.names))
+    return pd.concat(frames, ignore_index=True)
+
+
+def save_ledgers(path, ledgers, key_names=('run',)):
+    # .parquet needs pyarrow (or fastparquet); any other path is saved with np.save
+    frame = ledgers_frame(ledgers, key_names)
+    if path.endswith('.parquet'):
+        frame.to_parquet(path, index=False)
+    else:
+        np.save(path, frame.to_records(index=False))
+    return path
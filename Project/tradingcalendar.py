@@ -0,0 +1,173 @@
+import os
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# NSE trading calendar for a bar index, computed once per dataset:
+#
+#   calendar = calendar_for(data.index)
+#   calendar.session_id[i]    # int32 session (trading day) number of bar i, 0 for the first day
+#   calendar.seconds[i]       # seconds since the 9:15 open on that day (negative before it)
+#   calendar.minute[i]        # the same in whole minutes
+#   calendar.days[s]          # date of session s
+#
+# The end-of-day exit in the strategies becomes an integer comparison
+# (session_id[bar] != entry_session) instead of building a datetime.date on every bar, and the
+# 9:15 rule reads its day groups and times of day from here instead of index.date / index.time.
+# Times are local wall-clock times, like the backtests use (an aware index keeps its local time).
+#
+# Sessions are numbered in time order; an index that is not in time order is numbered by sorted
+# date instead, so bars of one day always share an id. Weekends and NSE_HOLIDAYS only matter for
+# trading_days(), missing_sessions() and holiday_sessions(). The built-in list follows the NSE
+# holiday circulars up to 2026; later years (or special closures) go into nse_holidays.txt next
+# to this file, one YYYY-MM-DD date per line, without a code change (or pass holidays=).
+#
+# The backtrader strategies read their session ids through feed_sessions(self.data): the
+# precomputed calendar when the feed wraps a DataFrame (bt.feeds.PandasData, BarStore.feed),
+# the bar's own date for feeds that only see bars as they arrive (GenericCSVData, live feeds).
+
+SESSION_OPEN = 9 * 3600 + 15 * 60  # 9:15, seconds after midnight
+SESSION_CLOSE = 15 * 3600 + 30 * 60  # 15:30
+DAY_NS = 86_400_000_000_000
+
+NSE_HOLIDAYS = (
+    # 2024
+    '2024-01-22', '2024-01-26', '2024-03-08', '2024-03-25', '2024-03-29', '2024-04-11', '2024-04-17',
+    '2024-05-01', '2024-05-20', '2024-06-17', '2024-07-17', '2024-08-15', '2024-10-02', '2024-11-01',
+    '2024-11-15', '2024-11-20', '2024-12-25',
+    # 2025
+    '2025-02-26', '2025-03-14', '2025-03-31', '2025-04-10', '2025-04-14', '2025-04-18', '2025-05-01',
+    '2025-08-15', '2025-08-27', '2025-10-02', '2025-10-21', '2025-10-22', '2025-11-05', '2025-12-25',
+    # 2026
+    '2026-01-15', '2026-01-26', '2026-03-03', '2026-03-26', '2026-03-31', '2026-04-03', '2026-04-14',
+    '2026-05-01', '2026-05-28', '2026-06-26', '2026-09-14', '2026-10-02', '2026-10-20', '2026-11-10',
+    '2026-11-24', '2026-12-25',
+)
+HOLIDAYS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nse_holidays.txt')
+
+
+def read_holidays(file_path):
+    # One YYYY-MM-DD date per line; blank lines and # comments are skipped
+    with open(file_path) as f:
+        lines = [line.split('#', 1)[0].strip() for line in f]
+    return tuple(line for line in lines if line)
+
+
+if os.path.exists(HOLIDAYS_FILE):
+    NSE_HOLIDAYS = tuple(sorted(set(NSE_HOLIDAYS) | set(read_holidays(HOLIDAYS_FILE))))
+
+
+def trading_days(start, end, holidays=NSE_HOLIDAYS):
+    # NSE trading dates from start to end (both included) as datetime64[D]
+    days = np.arange(np.datetime64(pd.Timestamp(start).date(), 'D'), np.datetime64(pd.Timestamp(end).date(), 'D')
+                     + 1)
+    return days[np.is_busday(days, holidays=list(holidays))]
+
+
+class TradingCalendar:
+    def __init__(self, index, holidays=NSE_HOLIDAYS, session_open=SESSION_OPEN, session_close=SESSION_CLOSE):
+        index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_localize(None)  # Keep the local wall-clock time
+        stamps = index.as_unit('ns').asi8
+        day = stamps // DAY_NS
+        self.holidays = list(holidays)
+        self.session_open = session_open
+        self.session_close = session_close
+
+        if len(day) and np.all(day[1:] >= day[:-1]):
+            changes = np.concatenate(([False], day[1:] != day[:-1]))
+            self.session_id = np.cumsum(changes).astype(np.int32)
+            unique_days = day[np.flatnonzero(np.concatenate(([True], changes[1:])))]
+        else:
+            unique_days, session_id = np.unique(day, return_inverse=True)
+            self.session_id = session_id.reshape(-1).astype(np.int32)
+        self.days = unique_days.astype('datetime64[D]')
+        self.seconds = ((stamps - day * DAY_NS) // 1_000_000_000 - session_open).astype(np.int32)
+
+    def __len__(self):
+        return len(self.session_id)
+
+    @property
+    def minute(self):
+        return self.seconds // 60
+
+    @property
+    def sessions(self):
+        return len(self.days)
+
+    def in_session(self):
+        # Bars between the open (included) and the close (excluded)
+        return (self.seconds >= 0) & (self.seconds < self.session_close - self.session_open)
+
+    def offset(self, time_text):
+        # "09:30:00" -> seconds after the open, comparable with self.seconds
+        return int(pd.Timedelta(time_text).total_seconds()) - self.session_open
+
+    def session_starts(self):
+        # First bar of every session (bars in time order)
+        return np.flatnonzero(np.diff(self.session_id, prepend=-1) != 0)
+
+    def session_end(self):
+        # For every bar, the first bar of the next session (len(self) if none); bars in time order
+        n = len(self.session_id)
+        ends = np.append(self.session_starts()[1:], n)
+        return ends[self.session_id] if n else np.zeros(0, dtype=np.int64)
+
+    def holiday_sessions(self):
+        # Dates in the data that are weekends or exchange holidays (special sessions or bad data)
+        return self.days[~np.is_busday(self.days, holidays=self.holidays)]
+
+    def missing_sessions(self):
+        # Trading days between the first and last date without a single bar
+        if not len(self.days):
+            return self.days
+        expected = trading_days(self.days.min(), self.days.max(), self.holidays)
+        return expected[~np.isin(expected, self.days)]
+
+
+# id(index) -> (weak reference to the index, calendar); the backtrader strategies ask for the
+# same frame's calendar once per run, so a sweep builds it only once
+calendars = {}
+
+
+def calendar_for(index, max_entries=8):
+    entry = calendars.get(id(index))
+    if entry is not None and entry[0]() is index:
+        return entry[1]
+    calendar = TradingCalendar(index)
+    calendars[id(index)] = (weakref.ref(index), calendar)
+    while len(calendars) > max_entries:
+        calendars.pop(next(iter(calendars)))
+    return calendar
+
+
+def feed_frame(data):
+    # The DataFrame behind a backtrader feed (PandasData on a DatetimeIndex), else None
+    frame = getattr(data.p, 'dataname', None)
+    if isinstance(frame, pd.DataFrame) and isinstance(frame.index, pd.DatetimeIndex):
+        return frame
+    return None
+
+
+def feed_sessions(data):
+    # session(bar) -> session id of bar `bar` (len(strategy) - 1, the current bar). Other feeds
+    # use the current bar's date ordinal: different numbers, but equal exactly on the same day.
+    frame = feed_frame(data)
+    if frame is not None:
+        return calendar_for(frame.index).session_id.__getitem__
+    return lambda bar: data.datetime.date(0).toordinal()
+
+
+def feed_index(data):
+    # Bar timestamps for a TradeLedger: the frame's index, or a function that reads the
+    # timestamps of the bars the feed has delivered so far
+    frame = feed_frame(data)
+    if frame is not None:
+        return frame.index
+
+    def delivered():
+        import backtrader as bt
+        return pd.DatetimeIndex([bt.num2date(value) for value in data.datetime.array])
+    return delivered
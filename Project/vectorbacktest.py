@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+import indicatorcache
+import tradingcalendar
+
+# Pure NumPy version of the MovingAverageCrossStrategy used in backtest4bestcondition.py.
+# The rules are the same as the backtrader path:
+#   - while flat, buy on the first bar where the short SMA is above the long SMA
+#   - while long, sell on the first later bar where the short SMA is below the long SMA
+#     or the date is different from the entry date
+#   - profit = (exit close - entry close) * lot_size, a zero profit counts as a failed trade
+#   - optional stop loss: also sell on the first later close at or below entry close - stop_loss
+# backtrader fills market orders on the next bar, so a position is held for at least one
+# bar and a new entry can happen on the bar right after an exit. We mirror that here.
+# Like the backtrader run, a trade still open on the last bar is counted but never closed.
+# The engine assumes every order is filled (the 100000 cash always covers one unit).
+# python paritycheck.py runs several pairs and stop losses through both engines and compares them.
+
+RESULT_COLUMNS = ['short_period', 'long_period', 'total_profit', 'trade_count',
+                  'successful_trades', 'failed_trades']
+
+
+def session_ids(index):
+    # Number every bar by its trading date (local wall-clock date, like the backtests do);
+    # computed once per index by the shared trading calendar
+    return tradingcalendar.calendar_for(index).session_id
+
+
+def session_end_index(sessions):
+    # For every bar, the index of the first bar of the next session (len(sessions) if none)
+    n = len(sessions)
+    starts = np.flatnonzero(np.diff(sessions) != 0) + 1
+    ends = np.append(starts, n)
+    return ends[sessions - sessions[0]] if n else np.zeros(0, dtype=np.int64)
+
+
+def first_true_from(mask):
+    # next_idx[row, i] = first k >= i where mask[row, k] is True, else n.
+    # There is one extra column so that next_idx[row, n] == n.
+    rows, n = mask.shape
+    dtype = np.int32 if n < np.iinfo(np.int32).max else np.int64
+    positions = np.arange(n + 1, dtype=dtype)
+    idx = np.empty((rows, n + 1), dtype=dtype)
+    idx[:, :n] = np.where(mask, positions[:n], n)
+    idx[:, n] = n
+    return np.minimum.accumulate(idx[:, ::-1], axis=1)[:, ::-1]
+
+
+def signal_indices(smas, pairs):
+    # next_bull / next_bear index matrices (pairs x bars + 1) and the first bar each pair can trade.
+    # Built once per batch of pairs; any bar range can then be walked with walk_trades().
+    short_ma = np.stack([smas[short] for short, _ in pairs])
+    long_ma = np.stack([smas[long_] for _, long_ in pairs])
+
+    # NaN comparisons are False, so nothing fires before both SMAs are ready
+    next_bull = first_true_from(short_ma > long_ma)
+    next_bear = first_true_from(short_ma < long_ma)
+    del short_ma, long_ma
+
+    n = next_bull.shape[1] - 1
+    starts = np.array([max(short, long_) - 1 for short, long_ in pairs])
+    return next_bull, next_bear, np.minimum(starts, n)
+
+
+def stop_exits(close, entry, exit_idx, stop_loss):
+    # First bar after each entry whose close is stop_loss points or more below the entry close,
+    # if that comes before exit_idx. The search never leaves the entry session, so it is at
+    # most one session of bars wide.
+    width = int((exit_idx - entry).max()) - 1 if len(entry) else 0
+    if width <= 0:
+        return exit_idx
+    bars = entry[:, None] + 1 + np.arange(width)
+    hit = (bars < exit_idx[:, None]) & (close[np.minimum(bars, len(close) - 1)]
+                                         <= (close[entry] - stop_loss)[:, None])
+    first = hit.argmax(axis=1)
+    return np.where(hit.any(axis=1), entry + 1 + first, exit_idx)
+
+
+def walk_trades(close, session_end, next_bull, next_bear, starts, lot_size=15, lo=0, hi=None,
+                stop_loss=None, pair_index=None, settle=False):
+    # Trade every pair over bars [lo, hi) together. Every pair walks through its trades at
+    # the same time, so the Python loop runs once per trade, not once per bar. The range end
+    # behaves like the end of the data: a trade still open there is counted but not closed.
+    # With settle=True new trades still only open before hi, but one that is open at hi is
+    # followed to its own exit (at the latest the first bar of the next session).
+    # stop_loss (points, scalar or one per walk, 0 = none) also exits on the first close at or
+    # below entry - stop_loss. pair_index maps each walk to a row of next_bull / next_bear, so
+    # one pair can be walked with several stop losses without copying its index rows.
+    n = len(close)
+    hi = n if hi is None else hi
+    pair_index = np.arange(len(starts)) if pair_index is None else np.asarray(pair_index)
+    batch = len(pair_index)
+    rows = np.arange(batch)
+    if stop_loss is not None:
+        stop_loss = np.broadcast_to(np.asarray(stop_loss, dtype=np.float64), (batch,))
+    entry = next_bull[pair_index, np.maximum(starts[pair_index], lo)].astype(np.int64)
+    trade_count = np.zeros(batch, dtype=np.int64)
+    successful = np.zeros(batch, dtype=np.int64)
+    failed = np.zeros(batch, dtype=np.int64)
+    total_gain = np.zeros(batch)
+    total_loss = np.zeros(batch)
+
+    active = entry < hi
+    while active.any():
+        r = rows[active]
+        p = pair_index[r]
+        e = entry[active]
+        trade_count[r] += 1
+
+        # Exit on the first bearish bar after the entry or on the first bar of the next day
+        exit_idx = np.minimum(next_bear[p, e + 1], session_end[e]).astype(np.int64)
+        if stop_loss is not None:
+            stopped = stop_loss[r] > 0
+            exit_idx[stopped] = stop_exits(close, e[stopped], exit_idx[stopped], stop_loss[r][stopped])
+        closed = exit_idx < (n if settle else hi)
+        rc, ec, xc = r[closed], e[closed], exit_idx[closed]
+
+        profit = (close[xc] - close[ec]) * lot_size
+        win = profit > 0
+        total_gain[rc] += np.where(win, profit, 0.0)
+        total_loss[rc] += np.where(win, 0.0, np.abs(profit))
+        successful[rc] += win
+        failed[rc] += ~win
+
+        # Flat again on the bar after the exit: look for the next entry from there
+        following = np.full(len(r), n, dtype=np.int64)
+        following[closed] = next_bull[p[closed], xc + 1]
+        entry[r] = following
+        active = entry < hi
+
+    return total_gain - total_loss, trade_count, successful, failed
+
+
+def evaluate_pairs(close, session_end, smas, pairs, lot_size=15):
+    # Evaluate a batch of (short, long) pairs together over all bars
+    next_bull, next_bear, starts = signal_indices(smas, pairs)
+    return walk_trades(close, session_end, next_bull, next_bear, starts, lot_size)
+
+
+def ma_cross_grid(data, short_periods, long_periods, lot_size=15, max_cells=8_000_000, cache=None):
+    # Run every (short, long) combination over the data and return one row per pair,
+    # in the same order as the nested optimizer loop
+    pairs = [(short, long_) for short in short_periods for long_ in long_periods]
+    return ma_cross_pairs(data, pairs, lot_size, max_cells, cache)
+
+
+def ma_cross_pairs(data, pairs, lot_size=15, max_cells=8_000_000, cache=None):
+    # Same as ma_cross_grid for any list of (short, long) pairs, one row per pair in list order
+    cache = cache or indicatorcache.default_cache
+    close = data['Close'].to_numpy(dtype=np.float64)
+    n = len(close)
+    session_end = session_end_index(session_ids(data.index))
+
+    key = indicatorcache.fingerprint(close)
+    smas = {period: cache.sma(close, period, key=key)
+            for period in sorted({p for pair in pairs for p in pair})}
+
+    # Keep the (pairs x bars) index matrices within max_cells entries each
+    batch_size = max(1, max_cells // (n + 1))
+    rows = []
+    for i in range(0, len(pairs), batch_size):
+        batch = pairs[i:i + batch_size]
+        profit, trades, successful, failed = evaluate_pairs(close, session_end, smas, batch, lot_size)
+        for j, (short, long_) in enumerate(batch):
+            rows.append((short, long_, profit[j], int(trades[j]), int(successful[j]), int(failed[j])))
+
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+
+def run_vector_backtest(data, short_period, long_period, lot_size=15):
+    # Single combination, same return shape as run_backtest() in backtest4bestcondition.py
+    row = ma_cross_grid(data, [short_period], [long_period], lot_size=lot_size).iloc[0]
+    return row['total_profit'], int(row['trade_count']), int(row['successful_trades']), int(row['failed_trades'])
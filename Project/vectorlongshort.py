@@ -0,0 +1,117 @@
+import numpy as np
+
+import indicatorcache
+import tradeledger
+import vectorbacktest
+
+# Array version of the long/short MovingAverageCrossStrategy in backtest3.py:
+#   - while flat, buy when the short SMA is above the long SMA, sell short when it is below
+#   - a long exits on the first later bar with short < long or a new date,
+#     a short exits on the first later bar with short > long or a new date
+#   - profit = (exit - entry) * lot_size for longs, (entry - exit) * lot_size for shorts
+#
+# The next bullish / bearish bar for every bar is computed once (vectorbacktest.first_true_from),
+# so finding a trade's exit and the next entry are two array lookups. The only Python loop
+# jumps from trade to trade, never from bar to bar; P&L, totals and the marker lists are then
+# computed for all trades at once. Timing follows backtrader like vectorbacktest.py: a position
+# is held for at least one bar, the next entry can be on the bar right after an exit, and a
+# trade still open on the last bar is counted but never closed.
+#
+# The result has the same attributes as the backtrader strategy (trades in result.ledger, see
+# tradeledger.py), so backtest3.print_results and backtest3.plot_results take it as is:
+#
+#   result = run_strategy(data, short_period=14, long_period=26)
+#   python backtestcli.py ma-cross-longshort data.csv --engine numpy --verify --no-plot
+
+
+class Params:
+    def __init__(self, short_period, long_period):
+        self.short_period = short_period
+        self.long_period = long_period
+
+
+class LongShortResult(tradeledger.LedgerPoints):
+    def __init__(self, short_period, long_period):
+        self.params = Params(short_period, long_period)
+        self.trade_count = 0
+        self.successful_trades = 0
+        self.failed_trades = 0
+        self.total_profit = 0
+        self.total_loss = 0
+        self.total_gain = 0
+        self.ledger = tradeledger.TradeLedger()  # buy_signals etc. are read from it
+
+
+def trade_indices(short_ma, long_ma, session_end, start):
+    # (entries, exits, sides) of the state machine; exits[i] == n for a trade open at the end
+    n = len(short_ma)
+    masks = np.stack([short_ma > long_ma, short_ma < long_ma])
+    next_bull, next_bear = vectorbacktest.first_true_from(masks)
+    next_any = np.minimum(next_bull, next_bear).tolist()
+    next_bull, next_bear = next_bull.tolist(), next_bear.tolist()
+    session_end = session_end.tolist()
+
+    entries, exits, sides = [], [], []
+    entry = next_any[min(start, n)]
+    while entry < n:
+        if next_bull[entry] == entry:  # Long: wait for a bearish bar or the next day
+            side, exit_idx = 1, min(next_bear[entry + 1], session_end[entry])
+        else:
+            side, exit_idx = -1, min(next_bull[entry + 1], session_end[entry])
+        entries.append(entry)
+        exits.append(exit_idx)
+        sides.append(side)
+        if exit_idx >= n:
+            break
+        entry = next_any[exit_idx + 1]  # Flat from the bar after the exit
+    return (np.array(entries, dtype=np.int64), np.array(exits, dtype=np.int64),
+            np.array(sides, dtype=np.int8))
+
+
+def run_strategy(data, short_period=14, long_period=26, lot_size=15, sma_cache=None):
+    # Same defaults as backtest3.MovingAverageCrossStrategy; data needs a timezone-naive index
+    sma_cache = sma_cache or indicatorcache.default_cache
+    close = data['Close'].to_numpy(dtype=np.float64)
+    key = indicatorcache.fingerprint(close)
+    short_ma = sma_cache.sma(close, short_period, key=key)
+    long_ma = sma_cache.sma(close, long_period, key=key)
+    session_end = vectorbacktest.session_end_index(vectorbacktest.session_ids(data.index))
+
+    result = LongShortResult(short_period, long_period)
+    entries, exits, sides = trade_indices(short_ma, long_ma, session_end, max(short_period, long_period) - 1)
+    result.trade_count = len(entries)
+
+    closed = exits < len(close)
+    entry_price, exit_price = close[entries[closed]], close[exits[closed]]
+    profit = np.where(sides[closed] > 0, exit_price - entry_price, entry_price - exit_price) * lot_size
+    result.ledger = tradeledger.TradeLedger.from_arrays(
+        entries, np.where(closed, exits, -1), sides, close[entries],
+        np.where(closed, close[np.minimum(exits, len(close) - 1)], np.nan), np.full(len(entries), np.nan),
+        index=data.index)
+    result.ledger.trades['pnl'][closed] = profit
+    win = profit > 0
+    result.successful_trades = int(win.sum())
+    result.failed_trades = int((~win).sum())
+    if len(profit):
+        # cumsum adds left to right like the strategy's running totals, so the floats match bit for bit
+        result.total_gain = np.cumsum(np.where(win, profit, 0.0))[-1].item()
+        result.total_loss = np.cumsum(np.where(win, 0.0, np.abs(profit)))[-1].item()
+        result.total_profit = result.total_gain - result.total_loss
+    return result
+
+
+def compare_results(expected, got):
+    # Names of the result attributes that differ between two runs (empty when they match)
+    names = ['trade_count', 'successful_trades', 'failed_trades', 'total_gain', 'total_loss', 'total_profit',
+             'buy_signals', 'sell_signals', 'successful_trades_points', 'failed_trades_points']
+    return [name for name in names if getattr(expected, name) != getattr(got, name)]
+
+
+def verify_with_backtrader(result, data):
+    # Same data through backtest3's strategy with backtrader's own SMA, and compare everything
+    import backtest3
+    strategy = backtest3.run_strategy(data, short_period=result.params.short_period,
+                                      long_period=result.params.long_period, sma_cache=None)
+    different = compare_results(strategy, result)
+    print("Backtrader check:", "results match." if not different else f"MISMATCH in {', '.join(different)}")
+    return not different
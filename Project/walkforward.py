@@ -0,0 +1,131 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import indicatorcache
+import optimizer
+import vectorbacktest
+
+# Walk-forward version of the backtest4bestcondition.py optimization: pick the best
+# (short, long) pair on a training window, then trade that pair on the following test window
+# and report the out-of-sample result, window after window.
+#
+#   train: days 0-19    test: days 20-24
+#   train: days 5-24    test: days 25-29     (step = test window by default)
+#   ...
+#
+# The SMAs and the next-signal index matrices are computed once over the whole file and every
+# fold only walks its own bar range, so the cost is close to one full sweep, not one sweep per
+# fold. Because the SMAs come from the full history, a test window starts with warm SMAs (the
+# bars before it are used as look-back only, never for choosing the pair). A trade still open
+# at the end of a test window is followed to its exit (the end-of-day exit on the first bar of
+# the next session, at the latest), so no test trade is left without a P&L. In a training
+# window such a trade stays open, like at the end of the data: closing it would use bars
+# after the window to choose the pair.
+#
+#   python walkforward.py data.csv --train-days 20 --test-days 5
+#   python backtestcli.py walk-forward data.csv --train-days 20 --test-days 5 --anchored
+
+FOLD_COLUMNS = ['fold', 'train_start', 'train_end', 'test_start', 'test_end', 'short_period', 'long_period',
+                'train_profit', 'train_trades', 'test_profit', 'test_trades', 'test_successful', 'test_failed']
+
+
+def fold_ranges(sessions, train_days, test_days, step_days=None, anchored=False):
+    # [(train_lo, train_hi, test_lo, test_hi)] bar ranges; anchored keeps every train window at day 0
+    step_days = step_days or test_days
+    day_starts = np.append(np.flatnonzero(np.r_[True, np.diff(sessions) != 0]), len(sessions))
+    day_count = len(day_starts) - 1
+    folds = []
+    first = 0
+    while first + train_days + test_days <= day_count:
+        train_from = 0 if anchored else first
+        test_from = first + train_days
+        folds.append((day_starts[train_from], day_starts[test_from],
+                      day_starts[test_from], day_starts[test_from + test_days]))
+        first += step_days
+    return folds
+
+
+def walk_forward(data, short_periods=optimizer.SHORT_PERIODS, long_periods=optimizer.LONG_PERIODS,
+                 train_days=20, test_days=5, step_days=None, anchored=False, lot_size=15,
+                 max_cells=8_000_000, cache=None):
+    # One row per fold (FOLD_COLUMNS); an empty frame when the data is shorter than one fold
+    cache = cache or indicatorcache.default_cache
+    close = data['Close'].to_numpy(dtype=np.float64)
+    n = len(close)
+    sessions = vectorbacktest.session_ids(data.index)
+    session_end = vectorbacktest.session_end_index(sessions)
+    folds = fold_ranges(sessions, train_days, test_days, step_days, anchored)
+    if not folds:
+        return pd.DataFrame(columns=FOLD_COLUMNS)
+
+    pairs = [(short, long_) for short in short_periods for long_ in long_periods]
+    key = indicatorcache.fingerprint(close)
+    smas = {period: cache.sma(close, period, key=key)
+            for period in sorted({p for pair in pairs for p in pair})}
+
+    # (folds x pairs) results for both windows, filled batch by batch from the same index matrices
+    shape = (len(folds), len(pairs))
+    train_profit = np.zeros(shape)
+    train_trades = np.zeros(shape, dtype=np.int64)
+    test = [np.zeros(shape), np.zeros(shape, dtype=np.int64), np.zeros(shape, dtype=np.int64),
+            np.zeros(shape, dtype=np.int64)]
+    batch_size = max(1, max_cells // (n + 1))
+    for i in range(0, len(pairs), batch_size):
+        batch = pairs[i:i + batch_size]
+        columns = slice(i, i + len(batch))
+        next_bull, next_bear, starts = vectorbacktest.signal_indices(smas, batch)
+        for f, (train_lo, train_hi, test_lo, test_hi) in enumerate(folds):
+            profit, trades, _, _ = vectorbacktest.walk_trades(close, session_end, next_bull, next_bear, starts,
+                                                              lot_size, train_lo, train_hi)
+            train_profit[f, columns] = profit
+            train_trades[f, columns] = trades
+            for result, values in zip(test, vectorbacktest.walk_trades(close, session_end, next_bull, next_bear,
+                                                                       starts, lot_size, test_lo, test_hi,
+                                                                       settle=True)):
+                result[f, columns] = values
+
+    index = data.index
+    rows = []
+    for f, (train_lo, train_hi, test_lo, test_hi) in enumerate(folds):
+        best = int(np.argmax(train_profit[f]))  # First pair with the highest profit, like optimizer.best_row
+        rows.append((f + 1, index[train_lo], index[train_hi - 1], index[test_lo], index[test_hi - 1],
+                     pairs[best][0], pairs[best][1], train_profit[f, best], int(train_trades[f, best]),
+                     test[0][f, best], int(test[1][f, best]), int(test[2][f, best]), int(test[3][f, best])))
+    return pd.DataFrame(rows, columns=FOLD_COLUMNS)
+
+
+def print_summary(folds):
+    if folds.empty:
+        print("Not enough trading days for one train + test window.")
+        return
+    print(folds.to_string(index=False))
+    trades = folds['test_trades'].sum()
+    print(f"\nOut-of-sample net profit over {len(folds)} folds: {folds['test_profit'].sum():.2f}")
+    print(f"Out-of-sample trades: {trades}, successful: {folds['test_successful'].sum()}, "
+          f"failed: {folds['test_failed'].sum()}")
+    print(f"Profitable test windows: {(folds['test_profit'] > 0).sum()} of {len(folds)}")
+
+
+def main(argv=None):
+    import dataloader
+
+    parser = argparse.ArgumentParser(description="Walk-forward MA-crossover optimization.")
+    parser.add_argument('file', help="CSV written by dataBacktest.py")
+    parser.add_argument('--train-days', type=int, default=20)
+    parser.add_argument('--test-days', type=int, default=5)
+    parser.add_argument('--step-days', type=int, help="days between folds (default: --test-days)")
+    parser.add_argument('--anchored', action='store_true', help="every train window starts at the first day")
+    parser.add_argument('--lot-size', type=int, default=15)
+    args = parser.parse_args(argv)
+
+    data = dataloader.load_ohlcv(args.file)
+    data.index = data.index.tz_localize(None)
+    folds = walk_forward(data, train_days=args.train_days, test_days=args.test_days, step_days=args.step_days,
+                         anchored=args.anchored, lot_size=args.lot_size)
+    print_summary(folds)
+
+
+if __name__ == "__main__":
+    main()